@@ -0,0 +1,65 @@
+# benchmarks/bench_vad.py
+"""
+Frames-per-second of the legacy `audio_io.is_silent` vs `vad.VoiceActivityDetector`.
+
+Run from the repo root:
+    python -m benchmarks.bench_vad [--seconds 2] [--chunk 1024]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from src.audio_io import is_silent
+from src.config import SAMPLE_RATE, SILENCE_THRESHOLD
+from src.vad import VoiceActivityDetector
+
+
+def make_chunks(n_chunks: int, chunk: int, seed: int = 0) -> list:
+    """Noise with bursts of 'speech' (a loud modulated tone), as int16 bytes."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(n_chunks * chunk) / SAMPLE_RATE
+    audio = rng.normal(0, 150, size=t.shape)
+    speech = (np.sin(2 * np.pi * 3 * t) > 0) * 4000 * np.sin(2 * np.pi * 220 * t)
+    audio = np.clip(audio + speech, -32768, 32767).astype(np.int16)
+    return [audio[i * chunk:(i + 1) * chunk].tobytes() for i in range(n_chunks)]
+
+
+def bench(fn, chunks, seconds: float) -> float:
+    """Returns chunks processed per second."""
+    done = 0
+    start = time.perf_counter()
+    while True:
+        for c in chunks:
+            fn(c)
+        done += len(chunks)
+        elapsed = time.perf_counter() - start
+        if elapsed >= seconds:
+            return done / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--seconds", type=float, default=2.0)
+    parser.add_argument("--chunk", type=int, default=1024)
+    args = parser.parse_args()
+
+    chunks = make_chunks(256, args.chunk)
+    vad = VoiceActivityDetector()
+    realtime = SAMPLE_RATE / args.chunk
+
+    results = {
+        "is_silent": bench(lambda c: is_silent(c, SILENCE_THRESHOLD), chunks, args.seconds),
+        "VoiceActivityDetector": bench(vad.process, chunks, args.seconds),
+    }
+
+    print(f"chunk={args.chunk} samples ({args.chunk / SAMPLE_RATE * 1000:.0f} ms), "
+          f"real time needs {realtime:.1f} chunks/s")
+    for name, cps in results.items():
+        print(f"  {name:<24} {cps:>12,.0f} chunks/s  {cps * args.chunk:>16,.0f} samples/s  "
+              f"{cps / realtime:>10,.0f}x real time")
+    print(f"  speedup: {results['VoiceActivityDetector'] / results['is_silent']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+# benchmarks/micro.py
+"""
+Microbenchmarks for the audio and text hot paths, with a stored baseline.
+
+Every case is reported as seconds per operation (lower is better); the STT
+cases as real-time factor (processing time / audio duration). Results are
+written as JSON and compared against the baseline file: any case more
+than --tolerance slower fails the run (exit code 1), and so does a missing
+baseline (exit code 2) unless --no-compare is given.
+
+Runs offline: the LLM HTTP session is served by an in-process stub, gTTS is
+never called, and Whisper models are only used if already downloaded.
+
+Run from the repo root:
+    python -m benchmarks.micro                      # run, compare with benchmarks/baseline.json
+    python -m benchmarks.micro --save-baseline      # run and store as the new baseline
+    python -m benchmarks.micro --no-compare         # just measure
+    python -m benchmarks.micro --only calculate --skip-stt
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import timeit
+
+os.environ.setdefault("TRACE_FILE", "")
+
+import numpy as np
+import requests
+import soundfile as sf
+
+from src.config import SAMPLE_RATE, SILENCE_THRESHOLD
+from src.audio_io import is_silent, write_wav
+from src.vad import VoiceActivityDetector
+from src.barge_in import BargeInDetector
+from src.wake_word import EnergyGate
+from src.tools import calculate
+from src.tts_gtts import preprocess_text
+from src import nlp_groq
+from src.http_client import get_llm_client
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(HERE)
+DEFAULT_BASELINE = os.path.join(HERE, "baseline.json")
+DEFAULT_OUTPUT = os.path.join(HERE, "results.json")
+SAMPLE_WAV = os.path.join(REPO_ROOT, "tmp_input.wav")
+
+REPLY_TEXT = (
+    "Sure! There are a few options, e.g. trains, buses etc. The train is faster, i.e. about "
+    "two hours vs. four by bus. Let me know if you want me to look up the timetable for tomorrow "
+    "morning, or compare prices between the two."
+)
+
+
+# --- Stubbed network ---
+
+class StubAdapter(requests.adapters.BaseAdapter):
+    """Answers every request with a canned chat completion, without touching the network."""
+
+    def __init__(self, content: str = "It's sunny today."):
+        super().__init__()
+        self.body = json.dumps({"choices": [{"message": {"role": "assistant", "content": content}}]}).encode()
+
+    def send(self, request, **kwargs):
+        response = requests.Response()
+        response.status_code = 200
+        response._content = self.body
+        response.headers["Content-Type"] = "application/json"
+        response.request = request
+        response.url = request.url
+        return response
+
+    def close(self):
+        pass
+
+
+def stub_llm_network():
+    session = get_llm_client().session
+    adapter = StubAdapter()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+
+
+# --- Cases: name -> zero-argument callable, one operation per call ---
+
+def speech_like(n: int, seed: int = 0) -> np.ndarray:
+    """Background noise with a loud modulated tone, as int16."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(n) / SAMPLE_RATE
+    audio = rng.normal(0, 150, size=n) + np.sin(2 * np.pi * 220 * t) * 4000
+    return np.clip(audio, -32768, 32767).astype(np.int16)
+
+
+def build_cases(tmpdir: str) -> dict:
+    cases = {}
+
+    for chunk in (512, 1024, 4096):
+        data = speech_like(chunk).tobytes()
+        cases[f"is_silent[{chunk}]"] = lambda data=data: is_silent(data, SILENCE_THRESHOLD)
+        vad = VoiceActivityDetector()
+        cases[f"vad.process[{chunk}]"] = lambda data=data, vad=vad: vad.process(data)
+
+    # One 10 ms frame through the echo canceller and gate, during playback
+    detector = BargeInDetector(capture=None, playback=None)
+    reference = speech_like(SAMPLE_RATE, seed=1)
+    detector.reference.add(reference.astype(np.float64), 0)
+    mic = (reference * 0.5).astype(np.int16)
+    frame = detector.frame_length
+    position = SAMPLE_RATE // 2
+    cases["barge_in.process[playing]"] = lambda: detector.process(mic[position:position + frame], position)
+
+    # Idle-mode wake word gate on a quiet 512-sample Porcupine frame (the always-on cost)
+    gate = EnergyGate()
+    quiet = (np.random.default_rng(2).normal(0, 50, size=512)).astype(np.int16)
+    cases["wake_word.gate[quiet]"] = lambda: gate.update(quiet)
+
+    # The WAV round trip of record_wav -> transcribe_file (5 s of audio)
+    pcm = speech_like(5 * SAMPLE_RATE)
+    wav_path = os.path.join(tmpdir, "bench.wav")
+    write_wav(wav_path, pcm)
+    cases["record_wav.write[5s]"] = lambda: write_wav(wav_path, pcm)
+    cases["transcribe_file.read[5s]"] = lambda: sf.read(wav_path, dtype="float32")
+
+    cases["preprocess_text"] = lambda: preprocess_text(REPLY_TEXT)
+    cases["calculate[simple]"] = lambda: calculate("(12.5 + 7) * 3 / 4")
+    cases["calculate[power]"] = lambda: calculate("2 ** 64 - 1")
+
+    def build_payload():
+        messages = nlp_groq._build_messages("What's the weather like in Paris tomorrow?")
+        return json.dumps(nlp_groq._build_payload(messages))
+    cases["chat_reply.payload"] = build_payload
+    cases["chat_reply[stub]"] = lambda: nlp_groq.chat_reply("What's the weather like in Paris tomorrow?")
+    return cases
+
+
+def time_case(fn, repeat: int, min_time: float) -> float:
+    """Best-of-`repeat` seconds per call, timeit-style."""
+    timer = timeit.Timer(fn)
+    number, elapsed = timer.autorange()
+    if elapsed < min_time:
+        number = max(1, int(number * min_time / max(elapsed, 1e-9)))
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def run_stt(beam_sizes, compute_types, repeat: int) -> dict:
+    """Real-time factor of transcribe_file on tmp_input.wav, per beam size and compute type."""
+    from src.config import WHISPER_MODEL_SIZE, WHISPER_DEVICE
+    from faster_whisper import WhisperModel
+
+    duration = sf.info(SAMPLE_WAV).duration
+    results = {}
+    for compute_type in compute_types:
+        try:
+            model = WhisperModel(WHISPER_MODEL_SIZE, device=WHISPER_DEVICE, compute_type=compute_type,
+                                 local_files_only=True)
+        except Exception as e:
+            print(f"  skipping STT compute_type={compute_type}: {e}", file=sys.stderr)
+            continue
+        for beam_size in beam_sizes:
+            def transcribe():
+                segments, _ = model.transcribe(SAMPLE_WAV, beam_size=beam_size)
+                return " ".join(s.text for s in segments)
+            transcribe()  # warmup
+            best = min(_elapsed(transcribe) for _ in range(repeat))
+            results[f"stt_rtf[{WHISPER_MODEL_SIZE},{compute_type},beam={beam_size}]"] = best / duration
+    return results
+
+
+def _elapsed(fn) -> float:
+    started = time.perf_counter()
+    fn()
+    return time.perf_counter() - started
+
+
+# --- Results and baseline ---
+
+def environment() -> dict:
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "numpy": np.__version__,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """Prints the comparison and returns the names of regressed cases."""
+    regressions = []
+    print(f"\n{'case':<44} {'baseline':>12} {'now':>12} {'change':>8}")
+    for name, value in results.items():
+        base = baseline.get(name)
+        if base is None:
+            print(f"{name:<44} {'-':>12} {_fmt(name, value):>12} {'new':>8}")
+            continue
+        change = value / base - 1
+        flag = ""
+        if change > tolerance:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:<44} {_fmt(name, base):>12} {_fmt(name, value):>12} {change:>+8.0%}{flag}")
+    return regressions
+
+
+def _fmt(name: str, value: float) -> str:
+    if name.startswith("stt_rtf"):
+        return f"{value:.3f}x"
+    return f"{value * 1e6:.2f}µs"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="Where to write the JSON results")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline JSON to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the baseline")
+    parser.add_argument("--no-compare", action="store_true", help="Only measure, do not compare with the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.3, help="Allowed slowdown before failing (0.3 = 30%%)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.2, help="Seconds per timing repeat")
+    parser.add_argument("--only", help="Run only cases whose name contains this")
+    parser.add_argument("--skip-stt", action="store_true")
+    parser.add_argument("--stt-beams", default="1,5")
+    parser.add_argument("--stt-compute", default="int8,float32")
+    args = parser.parse_args()
+
+    stub_llm_network()
+    results = {}
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for name, fn in build_cases(tmpdir).items():
+            if args.only and args.only not in name:
+                continue
+            results[name] = time_case(fn, args.repeat, args.min_time)
+            print(f"{name:<44} {_fmt(name, results[name]):>12}")
+
+    if not args.skip_stt and (not args.only or "stt" in args.only):
+        try:
+            beams = [int(b) for b in args.stt_beams.split(",")]
+            stt = run_stt(beams, args.stt_compute.split(","), min(args.repeat, 3))
+        except ImportError as e:
+            print(f"  skipping STT: {e}", file=sys.stderr)
+            stt = {}
+        for name, value in stt.items():
+            print(f"{name:<44} {_fmt(name, value):>12}")
+        results.update(stt)
+
+    report = {"environment": environment(), "unit": "seconds per op (stt_rtf: processing / audio time)",
+              "results": results}
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    if args.no_compare:
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --save-baseline to create one "
+              f"(or --no-compare to only measure).", file=sys.stderr)
+        return 2
+    with open(args.baseline) as f:
+        baseline = json.load(f)["results"]
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f"\n{len(regressions)} case(s) regressed by more than {args.tolerance:.0%}: {', '.join(regressions)}")
+        return 1
+    print("\nNo regressions.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
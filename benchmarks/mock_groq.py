@@ -0,0 +1,184 @@
+# benchmarks/mock_groq.py
+"""
+Local Groq-compatible chat completions server for load tests.
+
+Answers POST /v1/chat/completions (plain JSON or SSE streaming) after a
+configurable first-token latency, streaming the canned reply word by word.
+With --tool-rate, that fraction of requests that offer tools get a
+get_current_time tool call first; the follow-up request (carrying the tool
+result) gets a text answer. For tests, fail_first makes the first requests
+fail with fail_status, and truncate_after drops streamed replies after that
+many words (no [DONE], connection closed mid-response).
+
+Standalone:
+    python -m benchmarks.mock_groq --port 8000 --latency 0.3
+    GROQ_API_URL=http://127.0.0.1:8000/v1/chat/completions python -m src.app
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_REPLY = "Sure. Here is a short answer to your question. Is there anything else I can help with?"
+
+
+class _QuietHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        pass  # clients dropping keep-alive connections at exit are expected
+
+
+class MockGroqServer:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.3, jitter: float = 0.0,
+                 token_delay: float = 0.01, tool_rate: float = 0.0, reply: str = DEFAULT_REPLY, seed: int = 0,
+                 fail_first: int = 0, fail_status: int = 503, truncate_after: int = None):
+        self.latency = latency
+        self.jitter = jitter
+        self.token_delay = token_delay
+        self.tool_rate = tool_rate
+        self.reply = reply
+        self.fail_first = fail_first
+        self.fail_status = fail_status
+        self.truncate_after = truncate_after
+        self.requests = 0
+        self.tool_calls = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = _QuietHTTPServer((host, port), self._handler())
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1/chat/completions"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="mock-groq", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _decide(self, payload: dict):
+        """Returns (tool_call or None, first-token delay) for one request, or (None, None) to fail it."""
+        with self._lock:
+            self.requests += 1
+            if self.requests <= self.fail_first:
+                return None, None
+            delay = max(0.0, self.latency + self._random.uniform(-self.jitter, self.jitter))
+            wants_tool = (payload.get("tools") and payload["messages"][-1]["role"] != "tool"
+                          and self._random.random() < self.tool_rate)
+            if wants_tool:
+                self.tool_calls += 1
+        if not wants_tool:
+            return None, delay
+        call_id = f"call_{self.requests}"
+        return {"id": call_id, "type": "function",
+                "function": {"name": "get_current_time", "arguments": "{}"}}, delay
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_HEAD(self):
+                self.send_response(200)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                tool_call, delay = server._decide(payload)
+                if delay is None:
+                    self._fail()
+                    return
+                time.sleep(delay)
+                if payload.get("stream"):
+                    self._stream(tool_call)
+                else:
+                    self._complete(tool_call)
+
+            def _complete(self, tool_call):
+                if tool_call:
+                    message = {"role": "assistant", "content": None, "tool_calls": [tool_call]}
+                else:
+                    time.sleep(server.token_delay * len(server.reply.split()))
+                    message = {"role": "assistant", "content": server.reply}
+                body = json.dumps({"choices": [{"index": 0, "message": message}]}).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _fail(self):
+                body = json.dumps({"error": {"message": f"mock failure {server.fail_status}"}}).encode()
+                self.send_response(server.fail_status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                if server.fail_status == 429:
+                    self.send_header("Retry-After", "0")
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _stream(self, tool_call):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                if tool_call:
+                    self._event({"tool_calls": [{"index": 0, **tool_call}]})
+                else:
+                    for i, word in enumerate(server.reply.split()):
+                        if i == server.truncate_after:
+                            self.close_connection = True
+                            return
+                        if i:
+                            time.sleep(server.token_delay)
+                        self._event({"content": word if i == 0 else " " + word})
+                self._send(b"data: [DONE]\n\n")
+                self._send(b"")
+
+            def _event(self, delta: dict):
+                data = json.dumps({"choices": [{"index": 0, "delta": delta}]})
+                self._send(f"data: {data}\n\n".encode())
+
+            def _send(self, data: bytes):
+                # One HTTP/1.1 chunk per call; an empty one ends the response
+                self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                self.wfile.flush()
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency", type=float, default=0.3, help="Seconds before the first token")
+    parser.add_argument("--jitter", type=float, default=0.0, help="± seconds added to --latency")
+    parser.add_argument("--token-delay", type=float, default=0.01, help="Seconds between streamed words")
+    parser.add_argument("--tool-rate", type=float, default=0.0, help="Fraction of requests answered with a tool call")
+    args = parser.parse_args()
+
+    server = MockGroqServer(port=args.port, latency=args.latency, jitter=args.jitter,
+                            token_delay=args.token_delay, tool_rate=args.tool_rate).start()
+    print(f"Mock Groq listening at {server.url} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+# benchmarks/replay.py
+"""
+End-to-end replay load test of AssistantController.
+
+Plays WAV files into the pipeline through a ReplayCaptureEngine (no
+microphone), answers LLM calls from a local mock Groq server, speaks with
+the silent TTS backend into a null sink, and drives the controller through
+scripted turns. Reports per-stage latency percentiles (from metrics.py) and
+turns per second.
+
+Turns are closed-loop: the next utterance starts once the controller is
+listening again and the previous reply has finished.
+
+Without --wav, every turn is a synthetic speech-like utterance: enough for
+the VAD and the rest of the pipeline, but Whisper will not find words in
+it, so pair it with --transcript or pass real recordings.
+
+Run from the repo root:
+    python -m benchmarks.replay --turns 500 --speed 20 --transcript "what's the weather"  # skip Whisper
+    python -m benchmarks.replay --turns 200 --speed 4 --wav question1.wav --wav question2.wav
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+from benchmarks.mock_groq import MockGroqServer
+
+
+def synthetic_utterance(seconds: float = 1.5, sample_rate: int = 16000) -> np.ndarray:
+    """A voiced 140 Hz tone with harmonics, amplitude-modulated at a syllable-like 4 Hz."""
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    voiced = sum(np.sin(2 * np.pi * 140 * k * t) / k for k in (1, 2, 3))
+    envelope = 0.6 + 0.4 * np.sin(2 * np.pi * 4 * t)
+    return (voiced * envelope * 3000).astype(np.int16)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--turns", type=int, default=100)
+    parser.add_argument("--wav", action="append", help="Utterance(s) to replay, cycled (default: synthetic)")
+    parser.add_argument("--gain-db", type=float, default=0.0, help="Gain applied to --wav recordings")
+    parser.add_argument("--speed", type=float, default=1.0, help="Audio playback speed (x real time)")
+    parser.add_argument("--llm-latency", type=float, default=0.3, help="Mock LLM first-token latency (s)")
+    parser.add_argument("--llm-jitter", type=float, default=0.05)
+    parser.add_argument("--token-delay", type=float, default=0.01, help="Mock LLM seconds per streamed word")
+    parser.add_argument("--tool-rate", type=float, default=0.2, help="Fraction of LLM requests answered with a tool call")
+    parser.add_argument("--transcript", help="Skip Whisper and use this text as every transcription")
+    parser.add_argument("--realtime-tts", action="store_true", help="Let replies take as long as they would to play")
+    parser.add_argument("--turn-timeout", type=float, default=60.0)
+    parser.add_argument("--trace", default="", help="Also write the per-turn JSONL trace here")
+    parser.add_argument("--json", help="Write the report as JSON to this path")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    server = MockGroqServer(latency=args.llm_latency, jitter=args.llm_jitter,
+                            token_delay=args.token_delay, tool_rate=args.tool_rate).start()
+
+    # config.py is read at import time, so the environment has to be set first
+    os.environ.setdefault("GROQ_API_KEY", "replay")
+    os.environ.setdefault("PICOVOICE_ACCESS_KEY", "replay")
+    os.environ["GROQ_API_URL"] = server.url
+    os.environ["PLAYBACK_SINK"] = "null-realtime" if args.realtime_tts else "null"
+    os.environ["TRACE_FILE"] = args.trace
+    if args.transcript:
+        os.environ["STREAMING_STT"] = "false"
+
+    from src import controller as controller_module
+    from src.capture import ReplayCaptureEngine, set_capture_engine, load_pcm16
+    from src.metrics import tracer
+    from src.settings import SettingsManager
+
+    if args.transcript:
+        controller_module.transcribe_array = lambda audio, **kwargs: args.transcript
+
+    gain = 10 ** (args.gain_db / 20)
+    utterances = [np.clip(load_pcm16(path) * gain, -32768, 32767).astype(np.int16) for path in args.wav or []]
+    utterances = utterances or [synthetic_utterance()]
+
+    engine = ReplayCaptureEngine(speed=args.speed)
+    set_capture_engine(engine)
+    engine.start()
+
+    settings = SettingsManager(path=None)
+    settings.update({"wake_word_enabled": False, "tts_backend": "silent"})
+
+    listening = threading.Event()
+    def on_status(text, color):
+        if "Listening" in text:
+            listening.set()
+
+    assistant = controller_module.AssistantController(settings, on_status)
+    assistant.start_listening()
+
+    def wait_for(condition, timeout):
+        deadline = time.monotonic() + timeout
+        while not condition():
+            if time.monotonic() > deadline:
+                return False
+            time.sleep(0.005)
+        return True
+
+    started = time.monotonic()
+    stalled = 0
+    for i in range(args.turns):
+        previous_done = wait_for(lambda: tracer.turns_finished >= i and listening.is_set(), args.turn_timeout)
+        if not previous_done:
+            stalled += 1
+            print(f"turn {i}: controller not ready after {args.turn_timeout}s", file=sys.stderr)
+        listening.clear()
+        engine.play(utterances[i % len(utterances)]).wait()
+        if (i + 1) % 25 == 0:
+            print(f"  {i + 1}/{args.turns} turns fed ({time.monotonic() - started:.1f}s)")
+    wait_for(lambda: tracer.turns_finished >= args.turns, args.turn_timeout)
+    elapsed = time.monotonic() - started
+
+    assistant.stop_listening()
+    assistant.thread.join(timeout=5.0)
+    server.stop()
+
+    finished = tracer.turns_finished - tracer.outcomes.get("stopped", 0)
+    report = {
+        "turns": args.turns,
+        "turns_finished": finished,
+        "stalled": stalled,
+        "outcomes": dict(tracer.outcomes),
+        "seconds": elapsed,
+        "turns_per_second": finished / elapsed if elapsed else 0.0,
+        "speed": args.speed,
+        "llm_requests": server.requests,
+        "llm_tool_calls": server.tool_calls,
+        "stages": tracer.summary(),
+    }
+
+    print(f"\n{finished}/{args.turns} turns in {elapsed:.1f}s = {report['turns_per_second']:.2f} turns/s "
+          f"(audio at {args.speed:g}x, {server.requests} LLM requests, {server.tool_calls} tool calls)")
+    print(f"outcomes: {report['outcomes']}")
+    print(f"\n{'stage':<22} {'count':>6} {'p50':>9} {'p95':>9} {'p99':>9}")
+    for name, stats in report["stages"].items():
+        print(f"{name:<22} {stats['count']:>6} " + " ".join(
+            f"{stats.get(q, 0) * 1000:>7.1f}ms" for q in ("p50", "p95", "p99")))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport written to {args.json}")
+    return 0 if finished >= args.turns and not stalled else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
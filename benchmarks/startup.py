@@ -0,0 +1,196 @@
+# benchmarks/startup.py
+"""
+Startup report: import time of each entry point and time to ready.
+
+Every measurement runs in a fresh interpreter, so nothing is already in
+sys.modules, and the median of --repeat runs is reported:
+
+- import[<module>]: `python -X importtime -c "import <module>"`, cumulative
+  time of the module itself (interpreter startup excluded), plus the
+  heaviest top-level packages it pulls in;
+- time_to_controller: first import of src to a constructed AssistantController
+  with deferred init, i.e. what the GUI waits for before the window shows;
+- time_to_ready / startup[<component>]: the background initialization of
+  src.app (wake word, Whisper, ...). The network components (LLM warmup,
+  TTS prewarm) are off unless --with-network.
+
+Results are written as JSON and compared with a baseline like
+benchmarks.micro; --budget fails the run if time_to_controller exceeds it.
+
+Run from the repo root:
+    python -m benchmarks.startup --save-baseline   # once, on the reference machine
+    python -m benchmarks.startup --budget 0.5      # later: compare, exit code 1 on regressions
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(HERE)
+DEFAULT_BASELINE = os.path.join(HERE, "startup_baseline.json")
+DEFAULT_OUTPUT = os.path.join(HERE, "startup_results.json")
+
+ENTRY_POINTS = ["src.config", "src.controller", "src.gui", "src.app", "src.server"]
+
+# Runs in the child interpreter; prints one JSON line (the logger also writes to stdout)
+READY_SCRIPT = """
+import json
+from src.startup import since_start
+from src.app import start_background_init
+from src.controller import AssistantController
+from src.settings import SettingsManager
+settings = SettingsManager(path=None)
+controller = AssistantController(settings, None, defer_init=True)
+constructed = since_start()
+readiness = start_background_init(controller, settings)
+done = readiness.wait(timeout={timeout})
+print("RESULT", json.dumps({{"time_to_controller": constructed, "time_to_ready": readiness.ready_at if done else None,
+                  "components": readiness.durations,
+                  "errors": {{name: str(e) for name, e in readiness.errors.items()}}}}))
+"""
+
+
+def _run(args: list, env: dict) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, *args], cwd=REPO_ROOT, env=env, capture_output=True, text=True)
+
+
+def import_time(module: str, repeat: int, env: dict):
+    """Median cumulative import seconds of `module`, and {package: seconds} of its heaviest dependencies."""
+    totals, packages = [], {}
+    for _ in range(repeat):
+        result = _run(["-X", "importtime", "-c", f"import {module}"], env)
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr.strip().splitlines()[-1])
+        subtree = []                # imports since the last top-level one (interpreter startup comes first)
+        for line in result.stderr.splitlines():
+            if not line.startswith("import time:") or "|" not in line:
+                continue
+            _, cumulative, name = line.split("|")
+            try:
+                seconds = int(cumulative) / 1e6
+            except ValueError:
+                continue            # header line
+            if name[2:3] == " ":    # nested: " " + two spaces per level
+                subtree.append((name.strip(), seconds))
+                continue
+            if name.strip() == module:
+                totals.append(seconds)
+                for dependency, dependency_seconds in subtree:
+                    if "." not in dependency and dependency != "src":
+                        packages.setdefault(dependency, []).append(dependency_seconds)
+            subtree = []
+    heaviest = sorted(((statistics.median(v), k) for k, v in packages.items()), reverse=True)[:5]
+    return statistics.median(totals), {name: seconds for seconds, name in heaviest}
+
+
+def time_to_ready(repeat: int, timeout: float, env: dict) -> dict:
+    runs = []
+    for _ in range(repeat):
+        result = _run(["-c", READY_SCRIPT.format(timeout=timeout)], env)
+        lines = [line for line in result.stdout.splitlines() if line.startswith("RESULT ")]
+        if result.returncode != 0 or not lines:
+            raise RuntimeError((result.stderr.strip().splitlines() or ["no output"])[-1])
+        runs.append(json.loads(lines[-1][len("RESULT "):]))
+
+    results = {"time_to_controller": statistics.median(r["time_to_controller"] for r in runs)}
+    ready = [r["time_to_ready"] for r in runs if r["time_to_ready"] is not None]
+    if ready:
+        results["time_to_ready"] = statistics.median(ready)
+    for name in runs[-1]["components"]:
+        results[f"startup[{name}]"] = statistics.median(r["components"].get(name, 0.0) for r in runs)
+    for name, error in runs[-1]["errors"].items():
+        print(f"  {name} failed to initialize: {error}", file=sys.stderr)
+    return results
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """Prints the comparison and returns the names of regressed entries."""
+    regressions = []
+    print(f"\n{'entry':<36} {'baseline':>10} {'now':>10} {'change':>8}")
+    for name, value in results.items():
+        base = baseline.get(name)
+        if not base:
+            print(f"{name:<36} {'-':>10} {value * 1000:>8.1f}ms {'new':>8}")
+            continue
+        change = value / base - 1
+        flag = ""
+        if change > tolerance:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:<36} {base * 1000:>8.1f}ms {value * 1000:>8.1f}ms {change:>+8.0%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="Where to write the JSON results")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline JSON to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.3, help="Allowed slowdown before failing (0.3 = 30%%)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--budget", type=float, help="Fail if time_to_controller exceeds this many seconds")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Seconds to wait for time_to_ready")
+    parser.add_argument("--with-network", action="store_true", help="Include the LLM warmup and TTS prewarm")
+    args = parser.parse_args()
+
+    env = dict(os.environ, TRACE_FILE="")
+    if not args.with_network:
+        env.update(LLM_PREWARM="false", TTS_PREWARM="false")
+
+    results, dependencies = {}, {}
+    for module in ENTRY_POINTS:
+        try:
+            results[f"import[{module}]"], dependencies[module] = import_time(module, args.repeat, env)
+        except RuntimeError as e:
+            print(f"  import {module} failed: {e}", file=sys.stderr)
+            continue
+        heaviest = ", ".join(f"{k} {v * 1000:.0f}ms" for k, v in dependencies[module].items())
+        print(f"{'import[' + module + ']':<36} {results[f'import[{module}]'] * 1000:>8.1f}ms   ({heaviest})")
+    try:
+        ready = time_to_ready(args.repeat, args.timeout, env)
+    except RuntimeError as e:
+        print(f"  time to ready failed: {e}", file=sys.stderr)
+        ready = {}
+    for name, value in ready.items():
+        print(f"{name:<36} {value * 1000:>8.1f}ms")
+    results.update(ready)
+
+    report = {"environment": {"python": platform.python_version(), "platform": platform.platform(),
+                              "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S")},
+              "unit": "seconds", "results": results, "dependencies": dependencies}
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    failed = False
+    controller = results.get("time_to_controller")
+    if args.budget is not None and controller is not None and controller > args.budget:
+        print(f"time_to_controller {controller:.3f}s is over the {args.budget:.3f}s budget")
+        failed = True
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+        return int(failed)
+
+    if not os.path.exists(args.baseline):
+        print("No baseline yet; run with --save-baseline to create one.")
+        return int(failed)
+    with open(args.baseline) as f:
+        baseline = json.load(f)["results"]
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f"\n{len(regressions)} entries regressed by more than {args.tolerance:.0%}: {', '.join(regressions)}")
+        return 1
+    print("\nNo regressions.")
+    return int(failed)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
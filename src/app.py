@@ -1,4 +1,5 @@
 # src/app.py
+from .startup import Readiness, since_start   # first: marks process start
 import signal
 import sys
 import tkinter as tk
@@ -7,32 +8,67 @@ import traceback
 from .logger import logger
 from .settings import SettingsManager
 from .gui import VoiceAssistantGUI
+from .config import WHISPER_PRELOAD, LLM_PREWARM, TTS_PREWARM, METRICS_PORT, require_keys
+from .controller import AssistantController
+from .tts_gtts import prewarm_cache
+from .http_client import get_llm_client
+from .stt_faster_whisper import model_manager
+from .metrics import tracer
 
 def _shutdown(*_):
     logger.info("👋 Bye!")
     sys.exit(0)
 
+def start_background_init(controller: AssistantController, settings_manager: SettingsManager,
+                          on_change=None) -> Readiness:
+    """
+    Loads everything slow on background threads once the window is up:
+    API keys check, wake word engine, Whisper, the LLM connection and the TTS cache.
+    """
+    components = {
+        "API keys": require_keys,
+        "wake word": controller.init_wake_word,
+    }
+    if WHISPER_PRELOAD:
+        components["speech model"] = lambda: model_manager.preload(background=False)
+    if LLM_PREWARM:
+        components["LLM"] = lambda: get_llm_client().warmup(background=False)
+    if TTS_PREWARM and settings_manager.get("tts_backend") == "gtts":
+        accent = settings_manager.get("accent", "🇺🇸 US English")
+        tld = AssistantController.ACCENTS.get(accent, "com")
+        components["voice cache"] = lambda: prewarm_cache(tld=tld, background=False)
+
+    readiness = Readiness(on_change)
+    readiness.start(components)
+    return readiness
+
 def main():
     # Clean exit on Ctrl+C / kill
     signal.signal(signal.SIGINT, _shutdown)
     signal.signal(signal.SIGTERM, _shutdown)
 
     logger.info("🚀 Launching Voice Assistant (MVC)...")
-    
+
     try:
         # 1. Initialize Settings
         settings_manager = SettingsManager()
-        
-        # 2. Initialize GUI
+        if METRICS_PORT:
+            tracer.serve(METRICS_PORT)
+
+        # 2. Initialize GUI (the controller's wake word engine loads afterwards)
         root = tk.Tk()
         logger.info("✅ Tkinter root created.")
-        
-        app = VoiceAssistantGUI(root, settings_manager)
-        logger.info("✅ App initialized. Entering mainloop...")
-        
+
+        app = VoiceAssistantGUI(root, settings_manager, defer_init=True)
+        tracer.observe("time_to_window", since_start())
+        logger.info(f"✅ App initialized in {since_start():.2f}s. Entering mainloop...")
+
+        # 3. Wake word, Whisper, LLM connection and TTS cache load while the window is usable
+        start_background_init(app.controller, settings_manager, on_change=app.update_status)
+
         root.mainloop()
         logger.info("👋 Mainloop exited.")
-        
+
     except Exception as e:
         logger.error(f"❌ App Error: {e}")
         traceback.print_exc()
@@ -1,18 +1,23 @@
 import wave
-import pyaudio
-import soundfile as sf
+import numpy as np
 import math
 import struct
-import time
+from contextlib import nullcontext
 from .logger import logger
-from .config import (
-    SAMPLE_RATE, CHANNELS, CHUNK, RECORD_SECONDS, TMP_WAV_PATH,
-    SILENCE_THRESHOLD, SILENCE_DURATION, MAX_RECORD_SECONDS
-)
+from .capture import CaptureEngine, get_capture_engine
+from .cancel import CancelToken
+from .playback import get_playback_engine
+from . import metrics
+from .vad import VoiceActivityDetector, SPEECH_START, SPEECH_END
+from .settings import Tuning, DEFAULT_TUNING
+from .config import SAMPLE_RATE, CHANNELS, PRE_ROLL_SECONDS
 
 
 def is_silent(data_chunk: bytes, threshold: int) -> bool:
-    """Returns True if the RMS amplitude of the chunk is below threshold."""
+    """
+    Returns True if the RMS amplitude of the chunk is below threshold.
+    Kept for reference and benchmarks; record_wav uses VoiceActivityDetector.
+    """
     # Convert bytes to list of shorts (int16)
     shorts = struct.unpack(f"{len(data_chunk) // 2}h", data_chunk)
     # Calculate RMS
@@ -21,93 +26,157 @@ def is_silent(data_chunk: bytes, threshold: int) -> bool:
     return rms < threshold
 
 
-def record_wav(path: str = TMP_WAV_PATH, timeout: int = None, on_speech_start=None):
+def write_wav(path: str, pcm16, sample_rate: int = SAMPLE_RATE, channels: int = CHANNELS):
+    """Writes int16 PCM (bytes or ndarray) to a WAV file."""
+    wf = wave.open(path, 'wb')
+    wf.setnchannels(channels)
+    wf.setsampwidth(2)
+    wf.setframerate(sample_rate)
+    wf.writeframes(pcm16 if isinstance(pcm16, (bytes, bytearray)) else pcm16.tobytes())
+    wf.close()
+
+
+def capture_pcm16(timeout: int = None, on_speech_start=None, start_position: int = None,
+                  capture: CaptureEngine = None, on_audio=None, cancel: CancelToken = None,
+                  tuning: Tuning = None, hold_timeout=None):
     """
-    Records audio from the microphone.
+    Records int16 audio from the shared capture engine until the VAD reports end of speech.
     - timeout: Max seconds to wait for speech to START. If None, waits indefinitely (or until max duration).
+    - hold_timeout: Optional callable; while it returns True the timeout does not run (e.g. while
+      the previous reply is still being answered or spoken), it counts from when it last did.
     - on_speech_start: Callback function to run when speech is first detected.
+    - start_position: Ring buffer position to start from (e.g. where the wake word ended).
+      If None, recording starts PRE_ROLL_SECONDS before now.
+    - on_audio: Called with every captured int16 chunk (e.g. StreamingTranscriber.feed).
+    - cancel: Stops the recording as soon as the token is cancelled (speech_started stays as it was).
+    - tuning: Chunk size, silence hangover, max duration and VAD thresholds (default: the env values).
+
+    Returns (pcm16, speech_started) where pcm16 is a view over the preallocated capture buffer.
     """
-    p = pyaudio.PyAudio()
-    stream = p.open(format=pyaudio.paInt16, channels=CHANNELS,
-                    rate=SAMPLE_RATE, input=True, frames_per_buffer=CHUNK)
+    engine = capture or get_capture_engine()
+    tuning = tuning or DEFAULT_TUNING
+    pre_roll = PRE_ROLL_SECONDS if start_position is None else 0.0
+    reader = engine.reader("recorder", pre_roll=pre_roll, position=start_position)
     
     logger.info(f"🎤 Recording... (timeout={timeout}s)")
-    frames = []
-    
-    start_time = time.time()
-    silence_start_time = None
+    # Preallocate for the longest allowed recording (+1 chunk for the final read)
+    pcm = np.empty(int(tuning.max_record_seconds * SAMPLE_RATE) + tuning.chunk, dtype=np.int16)
+    vad = VoiceActivityDetector(sample_rate=SAMPLE_RATE, hangover_s=tuning.silence_duration,
+                                onset_db=tuning.vad_onset_db, offset_db=tuning.vad_offset_db,
+                                min_rms=tuning.vad_min_rms)
+    vad.prime(reader.history(1.0))
+
+    # A cancelled token wakes the reader instead of waiting for the next chunk
+    with cancel.on_cancel(reader.ring.interrupt) if cancel else nullcontext():
+        n_samples, speech_started = _record_loop(reader, pcm, vad, engine, timeout, on_speech_start, on_audio,
+                                                 cancel, tuning, hold_timeout)
+
+    logger.info(f"✅ Captured {n_samples / SAMPLE_RATE:.1f}s of audio.")
+    return pcm[:n_samples], speech_started
+
+
+def _record_loop(reader, pcm, vad, engine, timeout, on_speech_start, on_audio, cancel, tuning, hold_timeout):
+    """The chunk loop of capture_pcm16. Returns (n_samples, speech_started)."""
+    chunk_size = tuning.chunk
+    n_samples = 0
+    waiting_from = 0    # sample where the timeout started counting
     speech_started = False
-    
     while True:
-        data = stream.read(CHUNK, exception_on_overflow=False)
-        frames.append(data)
-        
-        current_time = time.time()
-        elapsed_time = current_time - start_time
+        chunk = reader.read(chunk_size, timeout=1.0, out=pcm[n_samples:n_samples + chunk_size], cancel=cancel)
+        if chunk is None:
+            if cancel and cancel.cancelled:
+                logger.info("🛑 Recording cancelled.")
+                break
+            if not engine.is_running:
+                logger.warning("⚠️ Capture engine stopped while recording.")
+                break
+            continue
+        n_samples += chunk_size
         
-        is_silent_chunk = is_silent(data, SILENCE_THRESHOLD)
-
-        if not speech_started:
-            if not is_silent_chunk:
-                speech_started = True
-                logger.info("🗣️ Speech started!")
-                
-                # Trigger callback (e.g., to kill TTS)
-                if on_speech_start:
-                    on_speech_start()
-                    
-                silence_start_time = None # Reset silence timer
-            elif timeout and elapsed_time > timeout:
+        # Durations are measured in captured audio, not wall time
+        elapsed_time = n_samples / SAMPLE_RATE
+        events = vad.process(chunk)
+        if on_audio:
+            on_audio(chunk)
+
+        if SPEECH_START in events and not speech_started:
+            speech_started = True
+            logger.info(f"🗣️ Speech started! (noise floor {vad.noise_floor_rms:.0f} RMS)")
+            
+            # Trigger callback (e.g., to kill TTS)
+            if on_speech_start:
+                on_speech_start()
+
+        if speech_started and SPEECH_END in events:
+            metrics.mark("speech_end")
+            # End-of-speech latency: the VAD hangover plus any backlog behind the live mic
+            metrics.record("eos_detect", tuning.silence_duration + reader.available() / SAMPLE_RATE)
+            logger.info(f"🛑 End of speech detected ({tuning.silence_duration}s silence). Stopping.")
+            break
+
+        if not speech_started and timeout:
+            if hold_timeout and hold_timeout():
+                waiting_from = n_samples
+            elif (n_samples - waiting_from) / SAMPLE_RATE > timeout:
                 logger.info(f"🛑 Timeout reached ({timeout}s) without speech. Stopping.")
                 break
-        else:
-            # Speech has started, look for end of speech (silence)
-            if is_silent_chunk:
-                if silence_start_time is None:
-                    silence_start_time = current_time
-                elif current_time - silence_start_time > SILENCE_DURATION:
-                    logger.info(f"🛑 End of speech detected ({SILENCE_DURATION}s silence). Stopping.")
-                    break
-            else:
-                silence_start_time = None # Reset if they talk again
-
-        # Check max duration
-        if elapsed_time > MAX_RECORD_SECONDS:
-            logger.info(f"🛑 Max duration ({MAX_RECORD_SECONDS}s) reached. Stopping.")
+
+        # Check max duration (also guards the preallocated buffer)
+        if elapsed_time > tuning.max_record_seconds or n_samples + chunk_size > len(pcm):
+            logger.info(f"🛑 Max duration ({tuning.max_record_seconds}s) reached. Stopping.")
             break
 
-    stream.stop_stream()
-    stream.close()
-    p.terminate()
+    return n_samples, speech_started
 
-    # If we timed out without speech starting, don't save (or save but return False)
-    if not speech_started and timeout and elapsed_time > timeout:
-         # We can still save it for debugging, or just return False
-         # Let's save it but return False so the GUI knows to ignore it.
-         pass
 
-    # Save via wave
-    wf = wave.open(path, 'wb')
-    wf.setnchannels(CHANNELS)
-    wf.setsampwidth(p.get_sample_size(pyaudio.paInt16))
-    wf.setframerate(SAMPLE_RATE)
-    wf.writeframes(b''.join(frames))
-    wf.close()
-    logger.info(f"✅ Saved {len(frames) * CHUNK / SAMPLE_RATE:.1f}s of audio.")
-    
-    # Return True if speech was detected (or if we didn't have a timeout logic active)
+def record_audio(timeout: int = None, on_speech_start=None, start_position: int = None,
+                 on_audio=None, debug_wav_path: str = None, capture: CaptureEngine = None,
+                 cancel: CancelToken = None, tuning: Tuning = None, hold_timeout=None):
+    """
+    Records audio from the microphone into memory (no temp file round trip).
+    See capture_pcm16 for the arguments.
+    - debug_wav_path: If set, the captured audio is also written there as a WAV file
+      (see SessionContext.debug_wav_path).
+
+    Returns a float32 array in [-1, 1) at SAMPLE_RATE (ready for transcribe_array),
+    or None if the timeout passed without any speech or the recording was cancelled.
+    """
+    pcm16, speech_started = capture_pcm16(timeout=timeout, on_speech_start=on_speech_start,
+                                          start_position=start_position, capture=capture,
+                                          on_audio=on_audio, cancel=cancel, tuning=tuning,
+                                          hold_timeout=hold_timeout)
+    if cancel and cancel.cancelled:
+        return None
+    if debug_wav_path:
+        write_wav(debug_wav_path, pcm16)
+
     # If timeout was set, and speech_started is False, then we timed out.
     if timeout and not speech_started:
-        return False
-    return True
+        return None
+    return pcm16_to_float32(pcm16)
+
+
+def pcm16_to_float32(pcm16: np.ndarray, out: np.ndarray = None) -> np.ndarray:
+    """Scales int16 PCM to float32 in [-1, 1), the format faster-whisper expects."""
+    if out is None:
+        out = np.empty(len(pcm16), dtype=np.float32)
+    np.multiply(pcm16, np.float32(1.0 / 32768.0), out=out)
+    return out
+
+
+def record_wav(path: str, timeout: int = None, on_speech_start=None):
+    """
+    Records audio from the microphone and saves it to `path`.
+    Returns False if the timeout passed without any speech, True otherwise.
+    """
+    pcm16, speech_started = capture_pcm16(timeout=timeout, on_speech_start=on_speech_start)
+    write_wav(path, pcm16)
+    return not (timeout and not speech_started)
 
 
 def play_pcm16_bytes(pcm_bytes: bytes, sample_rate: int = 22050, channels: int = 1):
-    """Generic player for raw PCM16 mono/stereo bytes."""
-    p = pyaudio.PyAudio()
-    stream = p.open(format=pyaudio.paInt16, channels=channels,
-                    rate=sample_rate, output=True)
-    stream.write(pcm_bytes)
-    stream.stop_stream()
-    stream.close()
-    p.terminate()
+    """Generic player for raw PCM16 mono/stereo bytes. Blocks until played."""
+    pcm = np.frombuffer(pcm_bytes, dtype=np.int16)
+    if channels > 1:
+        pcm = pcm.reshape(-1, channels).mean(axis=1).astype(np.int16)
+    get_playback_engine().play(pcm, sample_rate).wait()
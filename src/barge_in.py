@@ -0,0 +1,231 @@
+# src/barge_in.py
+import threading
+import time
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from .logger import logger
+from .cancel import CancelToken
+from .config import (
+    SAMPLE_RATE, VAD_MIN_RMS, BARGE_IN_FRAME_MS, BARGE_IN_ONSET_FRAMES, BARGE_IN_MARGIN_DB,
+    BARGE_IN_FILTER_MS, BARGE_IN_DELAY_MS, BARGE_IN_STEP
+)
+
+
+class EchoReference:
+    """
+    The audio being played, resampled to the capture rate and placed on the
+    capture timeline (ring buffer positions), so that a microphone frame can
+    be compared with what the speaker was playing at the same moment.
+    Positions not covered by playback read as silence.
+    """
+
+    def __init__(self, capture, sample_rate: int = SAMPLE_RATE, seconds: float = 2.0,
+                 delay_ms: int = BARGE_IN_DELAY_MS):
+        self.capture = capture
+        self.sample_rate = sample_rate
+        self.capacity = int(seconds * sample_rate)
+        self.delay = int(delay_ms * sample_rate / 1000)
+        self._data = np.zeros(self.capacity, dtype=np.float64)
+        self._end = 0           # capture position right after the newest reference sample
+        self._lock = threading.Lock()
+
+    def capture_position(self) -> int:
+        """The capture engine's sample clock now, interpolated between its buffer callbacks."""
+        ring = self.capture.ring
+        since = time.monotonic() - ring.last_write_time
+        ahead = min(since, self.capture.frames_per_buffer / self.sample_rate) * self.sample_rate
+        return ring.write_pos + int(ahead)
+
+    def tap(self, block: np.ndarray, sample_rate: int):
+        """PlaybackEngine tap: a block was just handed to the output device."""
+        samples = block.astype(np.float64)
+        if sample_rate != self.sample_rate:
+            n = max(1, int(round(len(samples) * self.sample_rate / sample_rate)))
+            samples = np.interp(np.linspace(0, len(samples) - 1, n), np.arange(len(samples)), samples)
+        self.add(samples, self.capture_position() + self.delay)
+
+    def add(self, samples: np.ndarray, position: int):
+        """Places samples at a capture position (blocks arriving early are appended after the previous one)."""
+        with self._lock:
+            start = max(position, self._end)
+            gap = min(start - self._end, self.capacity)
+            if gap:
+                self._store(start - gap, np.zeros(gap))
+            if len(samples) > self.capacity:
+                start += len(samples) - self.capacity
+                samples = samples[-self.capacity:]
+            self._store(start, samples)
+            self._end = start + len(samples)
+
+    def window(self, start: int, end: int) -> np.ndarray:
+        """Reference samples for capture positions [start, end)."""
+        out = np.zeros(end - start)
+        with self._lock:
+            lo = max(start, self._end - self.capacity)
+            hi = min(end, self._end)
+            if lo < hi:
+                first = min(hi - lo, self.capacity - lo % self.capacity)
+                out[lo - start:lo - start + first] = self._data[lo % self.capacity:lo % self.capacity + first]
+                out[lo - start + first:hi - start] = self._data[:hi - lo - first]
+        return out
+
+    def _store(self, position: int, samples: np.ndarray):
+        offset = position % self.capacity
+        first = min(len(samples), self.capacity - offset)
+        self._data[offset:offset + first] = samples[:first]
+        self._data[:len(samples) - first] = samples[first:]
+
+
+class EchoCanceller:
+    """
+    Block NLMS adaptive filter: models the speaker-to-microphone echo path
+    as an FIR filter over the reference signal and subtracts its prediction
+    from the microphone frame. Vectorized over the frame: one matrix product
+    for the prediction and one for the weight update.
+    """
+
+    def __init__(self, taps: int, step: float = BARGE_IN_STEP):
+        self.taps = taps
+        self.step = step
+        self.weights = np.zeros(taps)
+        self._last = None
+
+    def cancel(self, mic: np.ndarray, reference: np.ndarray) -> np.ndarray:
+        """
+        mic: one frame (N samples); reference: the N + taps - 1 reference
+        samples ending at the frame's last sample. Returns the residual.
+        """
+        frames = sliding_window_view(reference, self.taps)   # row n = the taps samples up to mic[n]
+        residual = mic - frames @ self.weights
+        self._last = (frames, reference, residual)
+        return residual
+
+    def adapt(self):
+        """Updates the filter from the last cancel() call (only on echo-only frames: no double talk)."""
+        frames, reference, residual = self._last
+        power = np.dot(reference, reference) * self.taps / len(reference)
+        self.weights += self.step * (frames.T @ residual) / (len(residual) * power + self.taps)
+
+    def reset(self):
+        self.weights[:] = 0.0
+
+
+class BargeInDetector:
+    """
+    Watches the capture stream while the assistant is talking and calls
+    on_barge_in() as soon as the user really speaks over it.
+
+    Each BARGE_IN_FRAME_MS frame goes through an EchoCanceller fed with what
+    the playback engine was playing at that time (EchoReference, filled from
+    a playback tap). The residual counts as speech when it is
+    BARGE_IN_MARGIN_DB above both the noise floor and the residual echo
+    predicted from the reference energy (peak-held, to cover the echo tail),
+    for BARGE_IN_ONSET_FRAMES frames in a row. That residual echo gain is learned on echo-only frames, so the
+    gate tightens as the filter converges; if it cannot converge (delay
+    outside the filter, distorting speaker) this degrades gracefully to
+    plain energy-ratio gating against the reference.
+
+    Fires at most once per stretch of playback.
+    """
+
+    def __init__(self, capture, playback, on_barge_in=None, sample_rate: int = SAMPLE_RATE,
+                 frame_ms: int = BARGE_IN_FRAME_MS, onset_frames: int = BARGE_IN_ONSET_FRAMES,
+                 margin_db: float = BARGE_IN_MARGIN_DB, filter_ms: int = BARGE_IN_FILTER_MS,
+                 step: float = BARGE_IN_STEP, min_rms: float = VAD_MIN_RMS):
+        self.capture = capture
+        self.playback = playback
+        self.on_barge_in = on_barge_in
+        self.sample_rate = sample_rate
+        self.frame_length = max(1, int(sample_rate * frame_ms / 1000))
+        self.onset_frames = max(1, onset_frames)
+        self.reference = EchoReference(capture, sample_rate)
+        self.canceller = EchoCanceller(max(1, int(sample_rate * filter_ms / 1000)), step)
+
+        self._margin = 10 ** (margin_db / 10)
+        self._min_energy = float(min_rms) ** 2
+        self.noise_floor = self._min_energy / 4
+        self.echo_gain = 1.0            # residual echo energy / reference envelope, learned
+        self._envelope = 0.0            # reference energy with a decaying peak hold (echo tail, late echo)
+        self._envelope_decay = 0.5 ** (frame_ms / 50)   # halves every 50 ms
+        self._run = 0
+        self._armed = True
+
+        self.triggers = 0
+        self.frames = 0
+        self.busy_seconds = 0.0
+        self._stop = CancelToken()
+        self._thread = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self.playback.add_tap(self.reference.tap)
+        self._thread = threading.Thread(target=self._run_loop, name="barge-in", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self.playback.remove_tap(self.reference.tap)
+        self._stop.cancel()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+    def _run_loop(self):
+        reader = self.capture.reader("barge_in")
+        logger.info(f"👂 Barge-in detector running ({self.frame_length}-sample frames, "
+                    f"{self.canceller.taps}-tap echo canceller).")
+        with self._stop.on_cancel(reader.ring.interrupt):
+            while not self._stop.cancelled:
+                frame = reader.read(self.frame_length, timeout=0.5, cancel=self._stop)
+                if frame is None:
+                    if not self.capture.is_running:
+                        self._stop.wait(0.1)
+                    continue
+                try:
+                    self.process(frame, reader.position - len(frame))
+                except Exception as e:
+                    logger.error(f"❌ Barge-in detector error: {e}")
+
+    def process(self, frame: np.ndarray, position: int) -> bool:
+        """Analyzes one int16 frame captured at `position`. Returns True if it triggered a barge-in."""
+        started = time.perf_counter()
+        self.frames += 1
+        mic = frame.astype(np.float64)
+        taps = self.canceller.taps
+        reference = self.reference.window(position - taps + 1, position + len(mic))
+        reference_energy = float(np.dot(reference, reference)) / len(reference)
+
+        self._envelope = max(reference_energy, self._envelope * self._envelope_decay)
+        if self._envelope < 1.0:
+            # Nothing playing: just follow the noise floor and re-arm
+            energy = float(np.dot(mic, mic)) / len(mic)
+            rate = 0.5 if energy < self.noise_floor else 0.02
+            self.noise_floor += rate * (energy - self.noise_floor)
+            self._run = 0
+            self._armed = True
+            self.busy_seconds += time.perf_counter() - started
+            return False
+
+        residual = self.canceller.cancel(mic, reference)
+        energy = float(np.dot(residual, residual)) / len(residual)
+        threshold = max(self._margin * self.noise_floor, self._min_energy,
+                        self._margin * self.echo_gain * self._envelope)
+        if energy > threshold:
+            self._run += 1
+        else:
+            # Echo only: adapt the filter and learn how much echo it leaves behind
+            self._run = 0
+            self.canceller.adapt()
+            self.echo_gain += 0.1 * (energy / self._envelope - self.echo_gain)
+
+        fired = self._run >= self.onset_frames and self._armed
+        if fired:
+            self._armed = False
+            self.triggers += 1
+            logger.info(f"🗣️ Barge-in: user speech over playback "
+                        f"({10 * np.log10(energy / max(threshold, 1e-9)):+.1f} dB over the echo gate).")
+            if self.on_barge_in:
+                self.on_barge_in()
+        self.busy_seconds += time.perf_counter() - started
+        return fired
+
@@ -0,0 +1,71 @@
+# src/cancel.py
+import threading
+import weakref
+from contextlib import contextmanager
+
+
+class CancelToken:
+    """
+    Thread-safe cancellation flag for one piece of work (a turn, a run).
+
+    Cancelling an asyncio task does not stop the threads it handed work to
+    (recording, Whisper, the LLM stream), so those check `cancelled`
+    between steps, or register on_cancel() callbacks that wake them up from
+    a blocking wait. Cancelling a token also cancels its children.
+
+    Has is_set(), so it can be passed where a threading.Event is expected.
+    """
+
+    def __init__(self, parent: "CancelToken" = None):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks = []
+        self._children = weakref.WeakSet()
+        if parent:
+            parent._adopt(self)
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def is_set(self) -> bool:
+        return self._event.is_set()
+
+    def wait(self, timeout: float = None) -> bool:
+        return self._event.wait(timeout)
+
+    def cancel(self):
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks = list(self._callbacks)
+            children = list(self._children)
+        for callback in callbacks:
+            callback()
+        for child in children:
+            child.cancel()
+
+    @contextmanager
+    def on_cancel(self, callback):
+        """Calls callback (from the cancelling thread) if the token is cancelled inside the block."""
+        with self._lock:
+            fire_now = self._event.is_set()
+            if not fire_now:
+                self._callbacks.append(callback)
+        if fire_now:
+            callback()
+        try:
+            yield self
+        finally:
+            with self._lock:
+                if callback in self._callbacks:
+                    self._callbacks.remove(callback)
+
+    def _adopt(self, child: "CancelToken"):
+        with self._lock:
+            cancelled = self._event.is_set()
+            if not cancelled:
+                self._children.add(child)
+        if cancelled:
+            child.cancel()
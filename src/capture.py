@@ -0,0 +1,308 @@
+# src/capture.py
+import queue
+import threading
+import time
+import numpy as np
+import soundfile as sf
+from .logger import logger
+from .config import SAMPLE_RATE, CHANNELS, CHUNK, RING_BUFFER_SECONDS
+
+
+class RingBuffer:
+    """
+    Fixed-size int16 ring buffer with a single writer and any number of readers.
+
+    Positions are absolute sample counts since the buffer was created, so a
+    reader only has to remember one integer (its cursor). Data older than
+    `capacity` samples is overwritten; readers that fall that far behind are
+    moved forward to the oldest sample still available.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._data = np.zeros(capacity, dtype=np.int16)
+        self._write_pos = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self.last_write_time = 0.0   # time.monotonic() of the last write, to interpolate the sample clock
+
+    @property
+    def write_pos(self) -> int:
+        return self._write_pos
+
+    @property
+    def oldest_pos(self) -> int:
+        return max(0, self._write_pos - self.capacity)
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def write(self, samples: np.ndarray):
+        n = len(samples)
+        if n >= self.capacity:
+            samples = samples[n - self.capacity:]
+            self._write_pos += n - self.capacity
+            n = self.capacity
+        start = self._write_pos % self.capacity
+        first = min(n, self.capacity - start)
+        self._data[start:start + first] = samples[:first]
+        self._data[:n - first] = samples[first:]
+        with self._cond:
+            self._write_pos += n
+            self.last_write_time = time.monotonic()
+            self._cond.notify_all()
+
+    def read(self, pos: int, n: int, out: np.ndarray = None) -> np.ndarray:
+        """Copies n samples starting at absolute position pos (which must still be available)."""
+        if out is None:
+            out = np.empty(n, dtype=np.int16)
+        start = pos % self.capacity
+        first = min(n, self.capacity - start)
+        out[:first] = self._data[start:start + first]
+        out[first:n] = self._data[:n - first]
+        return out
+
+    def wait_for(self, pos: int, timeout: float = None, cancel=None) -> bool:
+        """
+        Blocks until the buffer holds data up to pos. False on timeout, close,
+        or once `cancel` (an Event or CancelToken) is set and interrupt() is called.
+        """
+        with self._cond:
+            return self._cond.wait_for(
+                lambda: self._write_pos >= pos or self._closed or (cancel is not None and cancel.is_set()),
+                timeout=timeout
+            ) and self._write_pos >= pos and not (cancel is not None and cancel.is_set())
+
+    def interrupt(self):
+        """Wakes every waiting reader so it can re-check its cancel flag."""
+        with self._cond:
+            self._cond.notify_all()
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def reopen(self):
+        with self._cond:
+            self._closed = False
+
+
+class RingReader:
+    """An independent read cursor over a RingBuffer."""
+
+    def __init__(self, ring: RingBuffer, position: int, name: str = "reader"):
+        self.ring = ring
+        self.position = max(position, ring.oldest_pos)
+        self.name = name
+        self.overruns = 0
+
+    def available(self) -> int:
+        return self.ring.write_pos - self.position
+
+    def read(self, n: int, timeout: float = None, out: np.ndarray = None, cancel=None):
+        """
+        Returns the next n samples, blocking until they have been captured.
+        Returns None on timeout, when the capture engine is stopped, or once
+        `cancel` is set (register ring.interrupt on it to wake the wait).
+        """
+        if not self.ring.wait_for(self.position + n, timeout=timeout, cancel=cancel):
+            return None
+        oldest = self.ring.oldest_pos
+        if self.position < oldest:
+            self.overruns += 1
+            logger.warning(f"⚠️ [Capture] {self.name} fell behind, skipped {oldest - self.position} samples.")
+            self.position = oldest
+            if not self.ring.wait_for(self.position + n, timeout=timeout, cancel=cancel):
+                return None
+        data = self.ring.read(self.position, n, out)
+        self.position += n
+        return data
+
+    def history(self, seconds: float, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+        """Returns up to `seconds` of audio captured just before this cursor, without moving it."""
+        start = max(self.ring.oldest_pos, self.position - int(seconds * sample_rate))
+        return self.ring.read(start, self.position - start)
+
+
+class CaptureEngine:
+    """
+    One long-lived microphone stream (PyAudio callback mode) writing into a
+    RingBuffer. Wake word detection, recording and barge-in each get their own
+    RingReader, so the device is never reopened between stages and audio
+    spoken right after the wake word is not lost.
+    """
+
+    def __init__(self, sample_rate: int = SAMPLE_RATE, channels: int = CHANNELS,
+                 frames_per_buffer: int = CHUNK, buffer_seconds: float = RING_BUFFER_SECONDS):
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.frames_per_buffer = frames_per_buffer
+        self.ring = RingBuffer(int(buffer_seconds * sample_rate))
+        self._pa = None
+        self._stream = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_running(self) -> bool:
+        return self._stream is not None
+
+    def start(self):
+        with self._lock:
+            if self._stream is not None:
+                return
+            import pyaudio
+            self._pa = pyaudio.PyAudio()
+            self.ring.reopen()
+            self._stream = self._pa.open(
+                format=pyaudio.paInt16, channels=self.channels, rate=self.sample_rate,
+                input=True, frames_per_buffer=self.frames_per_buffer,
+                stream_callback=self._on_audio,
+            )
+            self._stream.start_stream()
+            logger.info(f"🎙️ Capture engine started ({self.sample_rate} Hz, {self.frames_per_buffer}-sample blocks).")
+
+    def _on_audio(self, in_data, frame_count, time_info, status):
+        self.ring.write(np.frombuffer(in_data, dtype=np.int16))
+        return (None, 0)   # pyaudio.paContinue
+
+    def stop(self):
+        with self._lock:
+            if self._stream is None:
+                return
+            try:
+                self._stream.stop_stream()
+                self._stream.close()
+            finally:
+                self._pa.terminate()
+                self._stream = None
+                self._pa = None
+                self.ring.close()
+            logger.info("🎙️ Capture engine stopped.")
+
+    def reader(self, name: str = "reader", pre_roll: float = 0.0, position: int = None) -> RingReader:
+        """
+        Creates a cursor starting at `position` (default: now), moved back by
+        `pre_roll` seconds of already-captured audio.
+        """
+        if position is None:
+            position = self.ring.write_pos
+        return RingReader(self.ring, position - int(pre_roll * self.sample_rate), name=name)
+
+
+def load_pcm16(source, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """Loads an audio file (or int16 array) as mono int16 at sample_rate."""
+    if isinstance(source, np.ndarray):
+        return source.astype(np.int16, copy=False)
+    pcm, rate = sf.read(source, dtype="float32", always_2d=True)
+    pcm = pcm.mean(axis=1)
+    if rate != sample_rate:
+        n_out = int(len(pcm) * sample_rate / rate)
+        pcm = np.interp(np.linspace(0, len(pcm) - 1, n_out), np.arange(len(pcm)), pcm)
+    return np.clip(pcm * 32768.0, -32768, 32767).astype(np.int16)
+
+
+class ReplayCaptureEngine(CaptureEngine):
+    """
+    Stand-in for the microphone: plays queued audio files into the ring
+    buffer at `speed` times real time, with low background noise in between,
+    so the rest of the pipeline runs unchanged without a device (load tests
+    and CI, see benchmarks/replay.py).
+    """
+
+    def __init__(self, sample_rate: int = SAMPLE_RATE, frames_per_buffer: int = CHUNK,
+                 buffer_seconds: float = RING_BUFFER_SECONDS, speed: float = 1.0, noise_rms: float = 30.0):
+        super().__init__(sample_rate, 1, frames_per_buffer, buffer_seconds)
+        self.speed = speed
+        self.noise_rms = noise_rms
+        self._queue = queue.Queue()
+        self._thread = None
+        self._stopped = threading.Event()
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None
+
+    def play(self, source) -> threading.Event:
+        """Queues an utterance (path or int16 array). The returned event is set once it has been fed."""
+        done = threading.Event()
+        self._queue.put((load_pcm16(source, self.sample_rate), done))
+        return done
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+            self.ring.reopen()
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run, name="replay-capture", daemon=True)
+            self._thread.start()
+            logger.info(f"🎙️ Replay capture started ({self.sample_rate} Hz, {self.speed:g}x real time).")
+
+    def stop(self):
+        with self._lock:
+            if self._thread is None:
+                return
+            self._stopped.set()
+            self._thread.join(timeout=1.0)
+            self._thread = None
+            self.ring.close()
+            logger.info("🎙️ Replay capture stopped.")
+
+    def _run(self):
+        rng = np.random.default_rng(0)
+        block = self.frames_per_buffer
+        period = block / self.sample_rate / self.speed
+        current, offset, done = None, 0, None
+        next_tick = time.monotonic()
+        while not self._stopped.is_set():
+            data = rng.normal(0, self.noise_rms, block).astype(np.int16)
+            if current is None:
+                try:
+                    current, done = self._queue.get_nowait()
+                    offset = 0
+                except queue.Empty:
+                    pass
+            if current is not None:
+                piece = current[offset:offset + block]
+                data[:len(piece)] = piece
+                offset += block
+                if offset >= len(current):
+                    done.set()
+                    current = None
+            self.ring.write(data)
+
+            next_tick += period
+            delay = next_tick - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            elif delay < -1.0:
+                next_tick = time.monotonic()  # fell far behind; do not burst to catch up
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+def get_capture_engine() -> CaptureEngine:
+    """Returns the shared, started capture engine."""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = CaptureEngine()
+        _engine.start()
+    return _engine
+
+def set_capture_engine(engine: CaptureEngine):
+    """Replaces the shared capture engine (e.g. with a ReplayCaptureEngine)."""
+    global _engine
+    with _engine_lock:
+        if _engine is not None and _engine is not engine:
+            _engine.stop()
+        _engine = engine
+
+def stop_capture_engine():
+    """Stops the shared capture engine if it was ever started."""
+    with _engine_lock:
+        if _engine is not None:
+            _engine.stop()
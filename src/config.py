@@ -9,6 +9,10 @@ OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 PICOVOICE_ACCESS_KEY = os.getenv("PICOVOICE_ACCESS_KEY")
 WAKE_WORD_MODEL_PATH = os.getenv("WAKE_WORD_MODEL_PATH") # Path to .ppn file
+# Keywords and their actions, e.g. "jarvis=wake,terminator=stop,bumblebee=tool:get_current_time,computer=mute"
+# (built-in Porcupine keyword or .ppn path = wake | stop | mute | tool:<name>[:<argument>]; see wake_word.py)
+WAKE_WORD_KEYWORDS = os.getenv("WAKE_WORD_KEYWORDS", "")
+WAKE_WORD_SENSITIVITY = float(os.getenv("WAKE_WORD_SENSITIVITY", "0.5"))  # 0..1, higher = fewer misses, more false hits
 # === Optional personalization ===
 USER_NAME = os.getenv("USER_NAME", "Neel")
 SCHEDULE = os.getenv(
@@ -21,26 +25,130 @@ SYSTEM_PROMPT = os.getenv(
     "Do not say you don't have access. Use the tools provided."
 )
 
+# === LLM backend (see http_client.py) ===
+GROQ_API_URL = os.getenv("GROQ_API_URL", "https://api.groq.com/openai/v1/chat/completions")
+GROQ_MODEL = os.getenv("GROQ_MODEL", "llama-3.3-70b-versatile")
+LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "3.05"))  # Seconds to establish a connection
+LLM_READ_TIMEOUT = float(os.getenv("LLM_READ_TIMEOUT", "20"))         # Seconds of silence from the server
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))              # Retries on 429/5xx/connection errors
+LLM_RETRY_BACKOFF = float(os.getenv("LLM_RETRY_BACKOFF", "0.25"))     # Base backoff (jittered, doubled per retry)
+LLM_TURN_BUDGET = float(os.getenv("LLM_TURN_BUDGET", "30"))           # Max seconds of LLM time per turn
+LLM_POOL_SIZE = int(os.getenv("LLM_POOL_SIZE", "4"))                  # Pooled keep-alive connections
+LLM_PREWARM = os.getenv("LLM_PREWARM", "true").lower() == "true"      # Open a connection at startup
+LLM_MAX_TOOL_ROUNDS = int(os.getenv("LLM_MAX_TOOL_ROUNDS", "3"))      # Tool-calling rounds before forcing text
+CONVERSATION_HISTORY_TURNS = int(os.getenv("CONVERSATION_HISTORY_TURNS", "6"))  # Exchanges sent back as context
+
+# === Tools (see tools.py) ===
+TOOL_TIMEOUT = float(os.getenv("TOOL_TIMEOUT", "5"))          # Default per-tool time limit in seconds
+TOOL_MAX_WORKERS = int(os.getenv("TOOL_MAX_WORKERS", "4"))    # Tools running at the same time
+
 # === Recording configuration ===
 SAMPLE_RATE = int(os.getenv("SAMPLE_RATE", "16000"))
 CHANNELS = 1
 CHUNK = 1024
 RECORD_SECONDS = int(os.getenv("RECORD_SECONDS", "10")
                      )  # push-to-talk duration
-TMP_WAV_PATH = os.getenv("TMP_WAV_PATH", "tmp_input.wav")
+DEBUG_WAV_PATH = os.getenv("DEBUG_WAV_PATH")  # If set, every recording is also saved here; "{session}" = session id
+SETTINGS_FILE = os.getenv("SETTINGS_FILE", "settings.json")
+SETTINGS_SAVE_DELAY = float(os.getenv("SETTINGS_SAVE_DELAY", "0.5"))        # Debounce before settings.json is written
+SETTINGS_WATCH_INTERVAL = float(os.getenv("SETTINGS_WATCH_INTERVAL", "1"))  # Poll settings.json for edits (0 = off)
+RING_BUFFER_SECONDS = float(os.getenv("RING_BUFFER_SECONDS", "30"))  # Shared capture history
+PRE_ROLL_SECONDS = float(os.getenv("PRE_ROLL_SECONDS", "0.3"))  # Audio kept from before a recording starts
 
 # === Silence Detection ===
 SILENCE_THRESHOLD = int(os.getenv("SILENCE_THRESHOLD", "800"))  # Amplitude threshold
 SILENCE_DURATION = float(os.getenv("SILENCE_DURATION", "1.2"))  # Seconds of silence to stop
 MAX_RECORD_SECONDS = int(os.getenv("MAX_RECORD_SECONDS", "30")) # Max recording duration
 
+# === Speech-to-text (faster-whisper, see stt_faster_whisper.py) ===
+WHISPER_MODEL_SIZE = os.getenv("WHISPER_MODEL_SIZE", "base.en")
+WHISPER_COMMAND_MODEL = os.getenv("WHISPER_COMMAND_MODEL")  # e.g. "tiny.en" for short commands
+WHISPER_COMMAND_MAX_SECONDS = float(os.getenv("WHISPER_COMMAND_MAX_SECONDS", "3"))  # Utterances up to this use it
+WHISPER_DEVICE = os.getenv("WHISPER_DEVICE", "cpu")
+WHISPER_COMPUTE_TYPE = os.getenv("WHISPER_COMPUTE_TYPE", "int8")
+WHISPER_CPU_THREADS = int(os.getenv("WHISPER_CPU_THREADS", "0"))  # 0 = CTranslate2 default
+WHISPER_NUM_WORKERS = int(os.getenv("WHISPER_NUM_WORKERS", "1"))  # Parallel transcriptions per model
+WHISPER_BEAM_SIZE = int(os.getenv("WHISPER_BEAM_SIZE", "5"))
+WHISPER_IDLE_TTL = float(os.getenv("WHISPER_IDLE_TTL", "0"))      # Unload after this many idle seconds (0 = never)
+WHISPER_PRELOAD = os.getenv("WHISPER_PRELOAD", "true").lower() == "true"  # Load + warm up at startup
+
+# === Streaming STT (see stt_streaming.py) ===
+STREAMING_STT = os.getenv("STREAMING_STT", "true").lower() == "true"  # Transcribe while the user speaks
+STREAMING_STT_STEP = float(os.getenv("STREAMING_STT_STEP", "1.0"))          # Seconds of new audio per partial decode
+STREAMING_STT_MAX_WINDOW = float(os.getenv("STREAMING_STT_MAX_WINDOW", "10"))  # Max seconds re-decoded per pass
+
+# === Text-to-speech (see tts_backends.py, tts_cache.py, tts_pipeline.py) ===
+TTS_BACKEND = os.getenv("TTS_BACKEND", "gtts")   # gtts | piper (offline) | silent; overridden by settings.json
+PIPER_VOICE = os.getenv("PIPER_VOICE", "")       # Path to a Piper .onnx voice model
+TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "voice_assistant", "tts"))
+TTS_CACHE_MAX_MB = float(os.getenv("TTS_CACHE_MAX_MB", "50"))   # LRU-evicted above this size
+TTS_PREWARM = os.getenv("TTS_PREWARM", "true").lower() == "true"  # Synthesize common phrases at startup
+TTS_WORKERS = int(os.getenv("TTS_WORKERS", "3"))                     # Chunks synthesized concurrently
+TTS_CHUNK_CHARS = int(os.getenv("TTS_CHUNK_CHARS", "200"))           # Longer sentences are split at clauses
+TTS_FIRST_CHUNK_CHARS = int(os.getenv("TTS_FIRST_CHUNK_CHARS", "80"))  # Short first chunk = earlier first audio
+
+# === Audio output (see playback.py) ===
+PLAYBACK_SINK = os.getenv("PLAYBACK_SINK", "pyaudio")       # pyaudio | null | null-realtime | file:/path.wav
+PLAYBACK_BLOCK_MS = int(os.getenv("PLAYBACK_BLOCK_MS", "10"))  # Stop requests land within one block
+
+# === Latency tracing (see metrics.py) ===
+TRACE_FILE = os.getenv("TRACE_FILE", "")                 # One JSON line per turn (opt-in, e.g. trace.jsonl)
+METRICS_WINDOW = int(os.getenv("METRICS_WINDOW", "500"))  # Samples kept per stage for p50/p95/p99
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))        # Serve Prometheus text at :PORT/metrics; 0 = off
+
+# === Logging (see logger.py) ===
+LOG_FILE = os.getenv("LOG_FILE", "app.log")                  # Empty disables the file log
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_LEVELS = os.getenv("LOG_LEVELS", "")                     # Per-module overrides, e.g. "capture=WARNING,barge_in=DEBUG"
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text")                 # text | json (one object per line, with the turn id)
+LOG_ROTATE = os.getenv("LOG_ROTATE", "size")                 # size | time | none
+LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", str(5 * 1024 * 1024)))  # Size rotation threshold
+LOG_ROTATE_WHEN = os.getenv("LOG_ROTATE_WHEN", "midnight")   # Time rotation interval (S, M, H, D, midnight, W0-W6)
+LOG_BACKUPS = int(os.getenv("LOG_BACKUPS", "5"))             # Rotated files kept
+
+# === Headless server (see server.py) ===
+SERVER_HOST = os.getenv("SERVER_HOST", "127.0.0.1")
+SERVER_PORT = int(os.getenv("SERVER_PORT", "8765"))
+SERVER_MAX_SESSIONS = int(os.getenv("SERVER_MAX_SESSIONS", "8"))        # Further clients are refused (1013)
+SERVER_STT_CONCURRENCY = int(os.getenv("SERVER_STT_CONCURRENCY", "2"))  # Final decodes running at once
+SERVER_RECV_QUEUE = int(os.getenv("SERVER_RECV_QUEUE", "64"))           # Inbound messages buffered per session
+SERVER_SEND_QUEUE = int(os.getenv("SERVER_SEND_QUEUE", "256"))          # Outbound messages buffered per session
+SERVER_WORKERS = int(os.getenv("SERVER_WORKERS", "8"))                  # Threads for STT, LLM and TTS calls
+
+# === Voice Activity Detection (see vad.py) ===
+VAD_FRAME_MS = int(os.getenv("VAD_FRAME_MS", "20"))            # Analysis frame size
+VAD_ONSET_DB = float(os.getenv("VAD_ONSET_DB", "9"))           # dB above noise floor to start speech
+VAD_OFFSET_DB = float(os.getenv("VAD_OFFSET_DB", "5"))         # dB above noise floor to count as silence again
+VAD_MIN_RMS = float(os.getenv("VAD_MIN_RMS", "300"))           # Absolute RMS below which nothing is speech
+VAD_ONSET_FRAMES = int(os.getenv("VAD_ONSET_FRAMES", "3"))     # Consecutive active frames to confirm speech
+
+# === Barge-in during playback (see barge_in.py) ===
+BARGE_IN = os.getenv("BARGE_IN", "true").lower() == "true"       # Echo-suppressed interruption detector
+BARGE_IN_FRAME_MS = int(os.getenv("BARGE_IN_FRAME_MS", "10"))     # Analysis frame size
+BARGE_IN_ONSET_FRAMES = int(os.getenv("BARGE_IN_ONSET_FRAMES", "2"))  # Frames of speech in a row to cut playback
+BARGE_IN_MARGIN_DB = float(os.getenv("BARGE_IN_MARGIN_DB", "6"))  # dB above the predicted residual echo
+BARGE_IN_FILTER_MS = int(os.getenv("BARGE_IN_FILTER_MS", "64"))   # Echo path length covered by the NLMS filter
+BARGE_IN_DELAY_MS = int(os.getenv("BARGE_IN_DELAY_MS", "0"))      # Output + input latency before the echo path
+BARGE_IN_STEP = float(os.getenv("BARGE_IN_STEP", "0.5"))          # NLMS step size (0..1]
+
+# === Wake word idle mode (see wake_word.py) ===
+WAKE_WORD_IDLE_GATE = os.getenv("WAKE_WORD_IDLE_GATE", "false").lower() == "true"  # Skip Porcupine on quiet frames
+WAKE_WORD_GATE_DB = float(os.getenv("WAKE_WORD_GATE_DB", "6"))            # dB above noise floor that opens the gate
+WAKE_WORD_GATE_PREROLL_MS = int(os.getenv("WAKE_WORD_GATE_PREROLL_MS", "500"))    # Audio before the opening fed to Porcupine
+WAKE_WORD_GATE_HANGOVER_MS = int(os.getenv("WAKE_WORD_GATE_HANGOVER_MS", "1500"))  # Gate stays open after the last loud frame
+
 # === Validation: ensure API keys exist ===
-missing = [k for k, v in {
-    "GROQ_API_KEY": GROQ_API_KEY,
-    "PICOVOICE_ACCESS_KEY": PICOVOICE_ACCESS_KEY,
-}.items() if not v]
-if missing:
-    raise RuntimeError(
-        f"Missing required env vars: {', '.join(missing)}. "
-        "Create a .env file with GROQ_API_KEY and PICOVOICE_ACCESS_KEY."
-    )
+# Checked by the entry points rather than at import, so importing any module
+# stays cheap and side-effect free, and the GUI can come up and say what is missing.
+REQUIRED_KEYS = ("GROQ_API_KEY", "PICOVOICE_ACCESS_KEY")
+
+def missing_keys(keys=REQUIRED_KEYS) -> list:
+    return [k for k in keys if not globals()[k]]
+
+def require_keys(keys=REQUIRED_KEYS):
+    missing = missing_keys(keys)
+    if missing:
+        raise RuntimeError(
+            f"Missing required env vars: {', '.join(missing)}. "
+            f"Create a .env file with {' and '.join(keys)}."
+        )
@@ -1,35 +1,107 @@
+import asyncio
+import contextvars
+import functools
 import threading
 import time
 import traceback
+from concurrent.futures import ThreadPoolExecutor
 from .logger import logger
-from .settings import SettingsManager
-from .audio_io import record_wav
-from .stt_faster_whisper import transcribe_file
-from .nlp_groq import chat_reply
-from .tts_gtts import speak
+from .settings import SettingsManager, ACCENTS
+from .audio_io import record_audio
+from .capture import stop_capture_engine
+from .playback import stop_playback_engine
+from .stt_faster_whisper import transcribe_array
+from .stt_streaming import StreamingTranscriber
+from .config import STREAMING_STT, BARGE_IN
+from .nlp_groq import chat_reply_stream
+from .intent_router import intent_router
+from .tts_pipeline import TTSPipeline
+from .session import SessionContext, SharedResources
+from .cancel import CancelToken
+from .barge_in import BargeInDetector
+from .wake_word import WAKE, STOP, MUTE, run_keyword_tool
+from .metrics import tracer
+
+STAGE_QUEUE_SIZE = 1   # turns waiting between two stages; more would only be answered late
+
+
+class _TurnWork:
+    """One utterance on its way through the stages."""
+
+    def __init__(self, turn, context, token, audio, streamer, reply=None, tuning=None):
+        self.turn = turn          # metrics.Turn
+        self.context = context    # contextvars snapshot with the turn as current
+        self.token = token        # cancelled by stop and barge-in
+        self.audio = audio
+        self.streamer = streamer
+        self.tuning = tuning      # settings.Tuning taken when the turn started
+        self.text = None
+        self.reply = reply        # already known (keyword tool actions): skips the router and the LLM
+
 
 class AssistantController:
-    def __init__(self, settings_manager: SettingsManager, update_callback):
+    """
+    Runs the assistant as an asyncio pipeline of three stages on one
+    background thread:
+
+        listen (wake word + record) -> transcribe -> respond (LLM -> TTS)
+
+    plus a keyword stage running Porcupine all the time: the wake keyword
+    starts the listen stage, command keywords (stop, mute, tools; see
+    WAKE_WORD_KEYWORDS) act at once, a tool result going straight to the
+    respond stage.
+
+    connected by bounded queues, so the next recording starts as soon as an
+    utterance has ended, while the previous one is still being transcribed
+    and answered. Blocking work (recording, Whisper, the LLM stream) runs on
+    a small thread pool; each turn carries a CancelToken that stops its
+    threads and tasks. Speech starting (barge-in) cancels every turn still
+    in flight; stop_listening() cancels everything.
+
+    While a reply is playing, interruptions come from the BargeInDetector
+    (echo-cancelled, so the assistant does not interrupt itself) instead of
+    the recorder's VAD.
+    """
+
+    ACCENTS = ACCENTS
+
+    def __init__(self, settings_manager: SettingsManager, update_callback, resources: SharedResources = None,
+                 defer_init: bool = False):
         self.settings = settings_manager
         self.update_callback = update_callback  # Function to call with status updates (text, color)
         self.chat_callback = None               # Function to call with chat messages (sender, text)
-        
+
+        # Per-conversation state (history, current reply); shared objects come from resources
+        self.session = SessionContext(settings_manager, resources, accents=self.ACCENTS)
+
         self.is_running = False
         self.thread = None
-        self.current_tts_process = None
         self.was_interrupted = False
-        
-        # Initialize Wake Word
+        self.conversation_active = False
+        self.heard_during_reply = False  # the recorder's VAD fired while a reply was playing
+        self.command_heard = False       # a command keyword fired during the current recording
+        self.barge_in_detector = None
+        self.loop = None
+        self._stop = CancelToken()
+        self._executor = None
+        self._in_flight = set()         # _TurnWork handed downstream and not answered yet
+        self._in_flight_lock = threading.Lock()
+
+        # Initialize Wake Word (defer_init: the caller runs init_wake_word() on a background thread)
         self.wake_word_listener = None
-        self.init_wake_word()
+        self._wake_word_ready = threading.Event()
+        if not defer_init:
+            self.init_wake_word()
+
+        self.accents_map = self.ACCENTS
 
-        self.accents_map = {
-            "🇺🇸 US English": "com",
-            "🇬🇧 UK English": "co.uk",
-            "🇮🇳 Indian English": "co.in",
-            "🇦🇺 Australian English": "com.au",
-            "🇨🇦 Canadian English": "ca"
-        }
+    @property
+    def current_speech(self):
+        return self.session.current_speech
+
+    @current_speech.setter
+    def current_speech(self, speech):
+        self.session.current_speech = speech
 
     def init_wake_word(self):
         try:
@@ -37,6 +109,8 @@ class AssistantController:
             self.wake_word_listener = WakeWordListener()
         except Exception as e:
             logger.warning(f"⚠️ Wake Word not available: {e}")
+        finally:
+            self._wake_word_ready.set()
 
     def set_chat_callback(self, callback):
         self.chat_callback = callback
@@ -44,123 +118,459 @@ class AssistantController:
     def start_listening(self):
         if not self.is_running:
             self.is_running = True
+            self._stop = CancelToken()
             self.thread = threading.Thread(target=self._run_loop)
             self.thread.daemon = True
             self.thread.start()
 
     def stop_listening(self):
+        """Stops the assistant: cancels the wake word wait, the recording and every turn in flight."""
         self.is_running = False
+        self._stop.cancel()
         self.stop_tts()
 
     def stop_tts(self):
-        """Kills the current TTS process if running."""
-        if self.current_tts_process:
-            if self.current_tts_process.poll() is None:
+        """Stops the current reply (playback and every pending synthesis) if any."""
+        if self.current_speech:
+            if self.current_speech.stop():
                 logger.info("🛑 Interruption detected! Killing TTS.")
                 self.was_interrupted = True
-                try:
-                    self.current_tts_process.terminate()
-                    self.current_tts_process.wait(timeout=0.5)
-                except Exception as e:
-                    logger.error(f"Error killing TTS: {e}")
-            self.current_tts_process = None
+            self.current_speech = None
+
+    def barge_in(self):
+        """The user started speaking: stop the reply and cancel every earlier turn still in flight."""
+        speech = self.current_speech
+        self.stop_tts()
+        if speech is not None and not speech.started:
+            # Nothing was said yet, so this is a new request rather than "stop talking"
+            self.was_interrupted = False
+        with self._in_flight_lock:
+            pending = list(self._in_flight)
+        for work in pending:
+            work.token.cancel()
+
+    def _on_speech_start(self):
+        """Recorder VAD fired. During playback that may be our own voice, so the barge-in detector decides."""
+        speech = self.current_speech
+        if self.barge_in_detector and speech is not None and speech.started and speech.is_active:
+            self.heard_during_reply = True
+            return
+        self.barge_in()
 
     def _update_status(self, text, color="gray"):
         if self.update_callback:
             self.update_callback(text, color)
 
+    def _show_partial(self, text):
+        if text:
+            self._update_status(f"📝 {text}", "orange")
+
     def _append_chat(self, sender, message):
         if self.chat_callback:
             self.chat_callback(sender, message)
 
+    # --- pipeline ---
+
     def _run_loop(self):
         self._update_status("Starting loop...", "blue")
         logger.info("Starting assistant loop...")
-        
-        conversation_active = False
-        self.current_tts_process = None
-        self.was_interrupted = False
+        self._executor = ThreadPoolExecutor(max_workers=5, thread_name_prefix="assistant")
+        try:
+            if not self._wake_word_ready.is_set():
+                self._update_status("⏳ Loading wake word...", "blue")
+                while not self._wake_word_ready.wait(0.1):
+                    if self._stop.cancelled:
+                        return
+            asyncio.run(self._run_pipeline())
+        finally:
+            # Threads still running only finish cancelled work; don't wait for them
+            self._executor.shutdown(wait=False)
+            if self.wake_word_listener:
+                self.wake_word_listener.cleanup()
+            stop_capture_engine()
+            stop_playback_engine()
+
+    async def _run_pipeline(self):
+        self.loop = asyncio.get_running_loop()
+        if BARGE_IN:
+            resources = self.session.resources
+            self.barge_in_detector = BargeInDetector(resources.capture, resources.playback,
+                                                     on_barge_in=self.barge_in)
+            self.barge_in_detector.start()
+        wakes = asyncio.Queue(maxsize=1)
+        utterances = asyncio.Queue(maxsize=STAGE_QUEUE_SIZE)
+        transcripts = asyncio.Queue(maxsize=STAGE_QUEUE_SIZE)
+        stages = [
+            asyncio.ensure_future(self._listen_stage(wakes, utterances)),
+            asyncio.ensure_future(self._transcribe_stage(utterances, transcripts)),
+            asyncio.ensure_future(self._respond_stage(transcripts)),
+        ]
+        if self._keywords_ready:
+            stages.append(asyncio.ensure_future(self._keyword_stage(wakes, transcripts)))
+        stopped = asyncio.Event()
+        stop_waiter = asyncio.ensure_future(stopped.wait())
+        # A wake word wait must notice the setting being switched off (e.g. settings.json reloaded)
+        unsubscribe = self.settings.subscribe(lambda key, value: self._call_soon(self._recheck_wake, wakes),
+                                              keys=("wake_word_enabled",))
+        try:
+            with self._stop.on_cancel(lambda: self._call_soon(stopped.set)):
+                # Stages only return on stop; one finishing earlier means it crashed
+                await asyncio.wait(stages + [stop_waiter], return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            unsubscribe()
+        for task in stages + [stop_waiter]:
+            task.cancel()
+        results = await asyncio.gather(*stages, return_exceptions=True)
+        for result in results:
+            if isinstance(result, Exception):
+                logger.error(f"Pipeline stage failed: {result}")
+                self._update_status(f"Error: {result}", "red")
+        self.is_running = False
+        if self.barge_in_detector:
+            self.barge_in_detector.stop()
+            self.barge_in_detector = None
+
+        with self._in_flight_lock:
+            pending, self._in_flight = list(self._in_flight), set()
+        for work in pending:
+            self._drop(work, "stopped")
+
+    @staticmethod
+    def _recheck_wake(wakes: asyncio.Queue):
+        """Wakes the listen stage with None so it re-reads wake_word_enabled."""
+        if wakes.empty():
+            wakes.put_nowait(None)
+
+    def _call_soon(self, fn, *args):
+        """Schedules fn on the pipeline loop from any thread (no-op once the loop has closed)."""
+        try:
+            self.loop.call_soon_threadsafe(fn, *args)
+        except RuntimeError:
+            pass
+
+    def _in_thread(self, fn, *args, **kwargs):
+        """Runs blocking fn on the worker pool, carrying the current context (metrics turn) along."""
+        call = functools.partial(contextvars.copy_context().run, functools.partial(fn, *args, **kwargs))
+        return self.loop.run_in_executor(self._executor, call)
+
+    async def _run_cancellable(self, work: _TurnWork, coro):
+        """Runs coro as a task in the turn's context; cancelling the turn's token cancels the task."""
+        task = work.context.run(asyncio.ensure_future, coro)
+        with work.token.on_cancel(lambda: self._call_soon(task.cancel)):
+            return await task
+
+    def _reply_pending(self) -> bool:
+        """True while an earlier turn is still being transcribed, answered or spoken."""
+        speech = self.current_speech
+        return bool(self._in_flight) or (speech is not None and speech.is_active)
+
+    def _drop(self, work: _TurnWork, outcome: str):
+        with self._in_flight_lock:
+            self._in_flight.discard(work)
+        if work.streamer:
+            work.streamer.cancel()
+        work.turn.finish(outcome)
+
+    @property
+    def _keywords_ready(self) -> bool:
+        return bool(self.wake_word_listener and self.wake_word_listener.porcupine)
+
+    async def _keyword_stage(self, wakes: asyncio.Queue, replies: asyncio.Queue):
+        """Runs Porcupine continuously and dispatches every keyword it hears."""
+        listener = self.wake_word_listener
+        while True:
+            if not await self._in_thread(listener.listen, self._stop):
+                if self._stop.cancelled:
+                    return
+                await asyncio.sleep(1)
+                continue
+
+            keyword = listener.detected
+            if keyword.action == WAKE:
+                if self.conversation_active or not self.settings.get("wake_word_enabled", True):
+                    continue   # already listening: the recorder hears the request itself
+                if wakes.full():
+                    wakes.get_nowait()
+                wakes.put_nowait((listener.detection_position, listener.detection_latency))
+                continue
 
-        while self.is_running:
+            try:
+                await self._keyword_command(keyword, listener.detection_latency, replies)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error running keyword '{keyword.name}': {e}")
+
+    async def _keyword_command(self, keyword, latency: float, replies: asyncio.Queue):
+        """Stop / mute / tool keyword: acted on directly, without recording or transcribing anything."""
+        resources = self.session.resources
+        self.command_heard = True
+        context = contextvars.copy_context()
+        turn = context.run(tracer.start_turn)
+        turn.record("wake_detect", latency)
+        turn.mark("speech_end")
+        turn.set("answered_by", "keyword")
+        turn.set("keyword", keyword.name)
+
+        with turn.span("keyword_action"):
+            if keyword.action == STOP:
+                self.barge_in()
+                self._update_status(f"🛑 Stopped ('{keyword.name}')", "gray")
+            elif keyword.action == MUTE:
+                playback = resources.playback
+                playback.muted = not playback.muted
+                self._update_status("🔇 Muted" if playback.muted else "🔊 Unmuted", "gray")
+                logger.info(f"{'🔇 Speaker muted' if playback.muted else '🔊 Speaker unmuted'} ('{keyword.name}')")
+            else:
+                # Tool keyword: the result is the reply, no STT or LLM round trip
+                self.barge_in()
+                work = _TurnWork(turn, context, CancelToken(parent=self._stop), None, None,
+                                 reply=await self._in_thread(run_keyword_tool, keyword))
+                work.text = keyword.name
+                with self._in_flight_lock:
+                    self._in_flight.add(work)
+                self._append_chat("You", f"({keyword.name})")
+                await replies.put(work)
+                return
+        turn.finish("ok")
+
+    async def _listen_stage(self, wakes: asyncio.Queue, out: asyncio.Queue):
+        session = self.session
+        resources = session.resources
+        start_position = None
+        wake_latency = None
+
+        while True:
+            work = None
             try:
                 # 0. Wake Word Check
-                if self.wake_word_listener and not conversation_active and self.settings.get("wake_word_enabled", True):
+                if self._keywords_ready and not self.conversation_active and self.settings.get("wake_word_enabled", True):
                     keyword = self.wake_word_listener.keyword_name
                     self._update_status(f"👂 Waiting for '{keyword}'...", "blue")
-                    
-                    if not self.wake_word_listener.listen():
-                        if not self.is_running: break
-                        continue 
-                    
+
+                    # Detected by the keyword stage (None: the setting changed, check again)
+                    wake = await wakes.get()
+                    if wake is None:
+                        continue
+                    start_position, wake_latency = wake
+
                     self._update_status("⚡ Wake Word Detected!", "green")
                     logger.info("Wake word detected")
-                    conversation_active = True
-                    self.stop_tts()
-                
+                    self.conversation_active = True
+                    self.barge_in()
+
                 # 1. Record
-                timeout_val = 10 if conversation_active else None
-                status_text = "🎤 Listening... (Speak to interrupt)" if conversation_active else "🎤 Listening..."
+                timeout_val = 10 if self.conversation_active else None
+                status_text = "🎤 Listening... (Speak to interrupt)" if self.conversation_active else "🎤 Listening..."
                 self._update_status(status_text, "red")
 
+                # Every stage from here on reports into this turn (see metrics.py)
+                turn = tracer.start_turn()
+                if wake_latency is not None:
+                    turn.record("wake_detect", wake_latency)
+                    wake_latency = None
+                # Settings changed from here on apply to the next turn
+                tuning = session.tuning()
+                work = _TurnWork(turn, contextvars.copy_context(), CancelToken(parent=self._stop), None,
+                                 StreamingTranscriber(on_partial=self._show_partial, manager=resources.models,
+                                                      tuning=tuning) if STREAMING_STT else None,
+                                 tuning=tuning)
+
                 self.was_interrupted = False
-                speech_detected = record_wav(timeout=timeout_val, on_speech_start=self.stop_tts)
-                self.stop_tts() 
-                
-                if not self.is_running: break
-                
+                self.heard_during_reply = False
+                self.command_heard = False
+                try:
+                    work.audio = await self._in_thread(
+                        record_audio, timeout=timeout_val, hold_timeout=self._reply_pending,
+                        on_speech_start=self._on_speech_start,
+                        start_position=start_position,
+                        on_audio=work.streamer.feed if work.streamer else None,
+                        debug_wav_path=session.debug_wav_path, capture=resources.capture, cancel=work.token,
+                        tuning=tuning)
+                except asyncio.CancelledError:
+                    self._drop(work, "stopped")
+                    raise
+                start_position = None
+
+                if self._stop.cancelled:
+                    self._drop(work, "stopped")
+                    return
+
                 if self.was_interrupted:
                     logger.info("🔄 Interruption detected. Discarding audio and listening again...")
                     self._update_status("🔄 Interrupted! Listening for new query...", "red")
+                    self._drop(work, "discarded")
                     continue
 
-                if not speech_detected:
-                    self._update_status("💤 Timeout (No speech)", "gray")
-                    conversation_active = False
+                if self.command_heard and work.audio is not None:
+                    # The utterance was a command keyword, already handled
+                    self._drop(work, "keyword")
                     continue
 
-                # 2. Transcribe
-                self._update_status("📝 Transcribing...", "orange")
-                user_text = transcribe_file()
-                
-                if not user_text:
-                    self._update_status("🤷 No speech detected", "gray")
-                    conversation_active = False
-                    continue
-                
-                self._append_chat("You", user_text)
-                logger.info(f"User: {user_text}")
-
-                if not self.is_running: break
-
-                # 3. LLM
-                self._update_status("🤖 Thinking...", "purple")
-                bot_text = chat_reply(user_text)
-                
-                if not bot_text:
-                    self._update_status("🤖 Empty reply", "gray")
+                if self.heard_during_reply and work.audio is not None:
+                    # Speech started over the reply and the detector did not call it the user: our own echo
+                    logger.info("🔇 Recording started on the assistant's own voice. Discarding it.")
+                    self._drop(work, "echo")
                     continue
 
-                self._append_chat("Assistant", bot_text)
-                logger.info(f"Assistant: {bot_text}")
+                if work.audio is None:
+                    self._update_status("💤 Timeout (No speech)", "gray")
+                    self.conversation_active = False
+                    session.forget()
+                    self._drop(work, "timeout")
+                    continue
 
-                if not self.is_running: break
+                with self._in_flight_lock:
+                    self._in_flight.add(work)
+                await out.put(work)
+                work = None         # downstream stages own it now
 
-                # 4. TTS
-                self._update_status("🗣️ Speaking...", "green")
-                
-                accent_name = self.settings.get("accent", "🇺🇸 US English")
-                tld = self.accents_map.get(accent_name, "com")
-                
-                self.current_tts_process = speak(bot_text, tld=tld)
-                
-                self._update_status("Ready (Listening for interruption...)", "gray")
-                
+            except asyncio.CancelledError:
+                raise
             except Exception as e:
-                logger.error(f"Error in loop: {e}")
+                logger.error(f"Error in listen stage: {e}")
                 traceback.print_exc()
+                if work is not None:
+                    self._drop(work, "error")
                 self._update_status(f"Error: {e}", "red")
-                time.sleep(1)
+                await asyncio.sleep(1)
+
+    async def _transcribe_stage(self, inbox: asyncio.Queue, out: asyncio.Queue):
+        while True:
+            work = await inbox.get()
+            if work.token.cancelled:
+                self._drop(work, "interrupted")
+                continue
+            try:
+                work.text = await self._run_cancellable(work, self._transcribe(work))
+            except asyncio.CancelledError:
+                if self._stop.cancelled or not work.token.cancelled:
+                    raise
+                self._drop(work, "interrupted")
+                continue
+            except Exception as e:
+                self._fail(work, e)
+                continue
+
+            if not work.text:
+                self._update_status("🤷 No speech detected", "gray")
+                self.conversation_active = False
+                self._drop(work, "no_speech")
+                continue
+
+            self._append_chat("You", work.text)
+            logger.info(f"User: {work.text}")
+            await out.put(work)
+
+    async def _transcribe(self, work: _TurnWork):
+        # Streaming mode only has the unconfirmed tail left
+        self._update_status("📝 Transcribing...", "orange")
+        if work.streamer:
+            return await self._in_thread(work.streamer.finish)
+        return await self._in_thread(transcribe_array, work.audio, manager=self.session.resources.models,
+                                     tuning=work.tuning)
+
+    async def _respond_stage(self, inbox: asyncio.Queue):
+        while True:
+            work = await inbox.get()
+            try:
+                if work.token.cancelled:
+                    work.turn.finish("interrupted")
+                    continue
+                await self._run_cancellable(work, self._respond(work))
+            except asyncio.CancelledError:
+                if self._stop.cancelled or not work.token.cancelled:
+                    raise
+                work.turn.finish("interrupted")
+            except Exception as e:
+                self._fail(work, e)
+            finally:
+                with self._in_flight_lock:
+                    self._in_flight.discard(work)
+
+    async def _respond(self, work: _TurnWork):
+        """LLM, streamed sentence by sentence into TTS. The TTSPipeline finishes the turn."""
+        session = self.session
+        resources = session.resources
+        self._update_status("🤖 Thinking...", "purple")
+
+        speech = TTSPipeline(voice=session.voice, backend=session.tts_backend, engine=resources.playback)
+        self.current_speech = speech
+
+        sentences = []
+        try:
+            local_reply = work.reply or intent_router.route(work.text)
+            if not work.reply:
+                work.turn.set("answered_by", "router" if local_reply else "llm")
+            if work.reply:
+                self._update_status("🗣️ Speaking...", "green")
+                sentences.append(work.reply)
+                speech.put(work.reply)
+            elif local_reply:
+                # Tool-only request answered locally, no LLM round trip
+                self._update_status("🗣️ Speaking...", "green")
+                sentences.append(local_reply)
+                speech.put(local_reply)
+                stats = intent_router.stats()
+                logger.info(f"⚡ Local answer (hit rate {stats['hit_rate']:.0%}, "
+                            f"~{stats['saved_seconds']:.1f}s saved so far)")
+            else:
+                llm_started = time.monotonic()
+                async for sentence in self._llm_sentences(work):
+                    if not sentences:
+                        self._update_status("🗣️ Speaking...", "green")
+                    sentences.append(sentence)
+                    speech.put(sentence)
+                    if self.current_speech is not speech:
+                        break
+                intent_router.record_llm_latency(time.monotonic() - llm_started)
+        except asyncio.CancelledError:
+            speech.stop()
+            raise
+        finally:
+            speech.close()
+        bot_text = " ".join(sentences)
+
+        if not bot_text:
+            self._update_status("🤖 Empty reply", "gray")
+            return
+
+        if not work.reply:
+            session.remember(work.text, bot_text)
+        self._append_chat("Assistant", bot_text)
+        logger.info(f"Assistant: {bot_text}")
+        self._update_status("Ready (Listening for interruption...)", "gray")
+
+    async def _llm_sentences(self, work: _TurnWork):
+        """Yields reply sentences, running the blocking LLM stream on a worker thread."""
+        queue = asyncio.Queue()
+        history = list(self.session.history)
+        client = self.session.resources.llm
+        closed = threading.Event()   # the consumer stopped early
+
+        def produce():
+            stream = chat_reply_stream(work.text, history=history, client=client, tuning=work.tuning)
+            try:
+                for sentence in stream:
+                    if work.token.cancelled or closed.is_set():
+                        break
+                    self._call_soon(queue.put_nowait, sentence)
+            finally:
+                stream.close()
+                self._call_soon(queue.put_nowait, None)
+
+        self._in_thread(produce)
+        try:
+            while True:
+                sentence = await queue.get()
+                if sentence is None:
+                    return
+                yield sentence
+        finally:
+            closed.set()
 
-        # Cleanup
-        if self.wake_word_listener:
-            self.wake_word_listener.cleanup()
+    def _fail(self, work: _TurnWork, error: Exception):
+        logger.error(f"Error in loop: {error}")
+        traceback.print_exc()
+        self._update_status(f"Error: {error}", "red")
+        self._drop(work, "error")
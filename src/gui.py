@@ -4,9 +4,10 @@ import traceback
 from .logger import logger
 from .settings import SettingsManager
 from .controller import AssistantController
+from .tts_backends import BACKENDS
 
 class VoiceAssistantGUI:
-    def __init__(self, root, settings_manager: SettingsManager):
+    def __init__(self, root, settings_manager: SettingsManager, defer_init: bool = False):
         self.root = root
         self.settings = settings_manager
         self.root.title("🎙️ Voice Assistant (MVC)")
@@ -27,7 +28,7 @@ class VoiceAssistantGUI:
         root.focus_force()
 
         # Initialize Controller
-        self.controller = AssistantController(self.settings, self.update_status)
+        self.controller = AssistantController(self.settings, self.update_status, defer_init=defer_init)
         self.controller.set_chat_callback(self.append_chat)
 
         # --- UI Elements ---
@@ -50,6 +51,14 @@ class VoiceAssistantGUI:
         self.accent_combo.pack(side=tk.LEFT, padx=10)
         self.accent_combo.bind("<<ComboboxSelected>>", self.on_accent_change)
 
+        tk.Label(settings_frame, text="Engine:", font=("Arial", 10)).pack(side=tk.LEFT)
+
+        self.backend_var = tk.StringVar(value=self.settings.get("tts_backend", "gtts"))
+        self.backend_combo = ttk.Combobox(settings_frame, textvariable=self.backend_var,
+                                          values=list(BACKENDS.keys()), state="readonly", width=8)
+        self.backend_combo.pack(side=tk.LEFT, padx=10)
+        self.backend_combo.bind("<<ComboboxSelected>>", self.on_backend_change)
+
         # Status Label
         self.status_label = tk.Label(root, text="Ready", font=("Arial", 10, "italic"), fg="gray")
         self.status_label.pack(pady=5)
@@ -59,14 +68,27 @@ class VoiceAssistantGUI:
                                       font=("Arial", 14, "bold"), bg="#4CAF50", fg="white", height=2)
         self.start_button.pack(padx=10, pady=10, fill=tk.X)
 
+        # Keep the combos in sync when settings.json is edited while running
+        self._unsubscribe = self.settings.subscribe(self.on_setting_changed, keys=("accent", "tts_backend"))
+
         # Handle window close
         self.root.protocol("WM_DELETE_WINDOW", self.on_close)
 
+    def on_setting_changed(self, key, value):
+        # May be called from the settings watcher thread
+        var = self.accent_var if key == "accent" else self.backend_var
+        self.root.after(0, var.set, value)
+
     def on_accent_change(self, event):
         new_accent = self.accent_var.get()
         self.settings.set("accent", new_accent)
         logger.info(f"Accent changed to: {new_accent}")
 
+    def on_backend_change(self, event):
+        new_backend = self.backend_var.get()
+        self.settings.set("tts_backend", new_backend)
+        logger.info(f"TTS engine changed to: {new_backend}")
+
     def toggle_listening(self):
         if not self.controller.is_running:
             # Start
@@ -109,5 +131,7 @@ class VoiceAssistantGUI:
         self.chat_area.config(state=tk.DISABLED)
 
     def on_close(self):
+        self._unsubscribe()
         self.controller.stop_listening()
+        self.settings.flush()
         self.root.destroy()
@@ -0,0 +1,158 @@
+# src/http_client.py
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+from .logger import logger
+from .config import (
+    GROQ_API_KEY, GROQ_API_URL, LLM_CONNECT_TIMEOUT, LLM_READ_TIMEOUT, LLM_MAX_RETRIES,
+    LLM_RETRY_BACKOFF, LLM_TURN_BUDGET, LLM_POOL_SIZE
+)
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class BudgetExceeded(Exception):
+    """Raised when a turn's LLM latency budget runs out before a response arrived."""
+
+
+class TurnBudget:
+    """Wall-clock allowance shared by every LLM request made for one turn."""
+
+    def __init__(self, seconds: float = LLM_TURN_BUDGET):
+        self.seconds = seconds
+        self.deadline = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        return self.deadline - time.monotonic()
+
+    def check(self):
+        if self.remaining() <= 0:
+            raise BudgetExceeded(f"LLM budget of {self.seconds:.1f}s exhausted")
+
+
+class LLMClient:
+    """
+    Shared HTTP client for the chat completions backend.
+
+    One pooled keep-alive requests.Session is reused for every call, so only
+    the first request pays the TCP+TLS handshake (and warmup() can pay it at
+    startup). Every request has separate connect/read timeouts, 429/5xx and
+    connection errors are retried a bounded number of times with jittered
+    exponential backoff, and all of it is capped by an optional TurnBudget.
+    """
+
+    def __init__(self, url: str = GROQ_API_URL, api_key: str = GROQ_API_KEY,
+                 connect_timeout: float = LLM_CONNECT_TIMEOUT, read_timeout: float = LLM_READ_TIMEOUT,
+                 max_retries: int = LLM_MAX_RETRIES, backoff: float = LLM_RETRY_BACKOFF,
+                 pool_size: int = LLM_POOL_SIZE):
+        self.url = url
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+
+        # requests is imported on first use: it is most of this module's import time
+        import requests
+        from requests.adapters import HTTPAdapter
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json",
+        })
+
+    def post(self, payload: dict, stream: bool = False, budget: TurnBudget = None) -> "requests.Response":
+        """
+        POSTs payload as JSON to the completions URL. Returns the last response
+        (which may still be an error status once retries are used up).
+        """
+        import requests
+        attempt = 0
+        while True:
+            timeout = self._timeout(budget)
+            try:
+                response = self.session.post(self.url, json=payload, stream=stream, timeout=timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if budget is not None and budget.remaining() <= 0:
+                    raise BudgetExceeded(f"LLM budget of {budget.seconds:.1f}s exhausted") from e
+                if not self._should_retry(attempt, budget):
+                    raise
+                logger.warning(f"[HTTP] {type(e).__name__} talking to LLM, retrying ({attempt + 1}/{self.max_retries})...")
+                self._sleep(attempt, budget)
+                attempt += 1
+                continue
+
+            if response.status_code not in RETRY_STATUSES or not self._should_retry(attempt, budget):
+                return response
+
+            logger.warning(f"[HTTP] LLM returned {response.status_code}, retrying ({attempt + 1}/{self.max_retries})...")
+            retry_after = self._retry_after(response)
+            response.close()
+            self._sleep(attempt, budget, retry_after)
+            attempt += 1
+
+    def warmup(self, background: bool = True):
+        """Opens a pooled connection to the backend ahead of the first real request."""
+        parts = urlsplit(self.url)
+        origin = f"{parts.scheme}://{parts.netloc}/"
+
+        def _run():
+            import requests
+            started = time.monotonic()
+            try:
+                self.session.head(origin, timeout=(self.connect_timeout, self.connect_timeout)).close()
+                logger.info(f"[HTTP] Connection to {parts.netloc} pre-warmed in {time.monotonic() - started:.2f}s.")
+            except requests.RequestException as e:
+                logger.warning(f"[HTTP] Pre-warming {parts.netloc} failed: {e}")
+
+        if background:
+            threading.Thread(target=_run, name="llm-warmup", daemon=True).start()
+        else:
+            _run()
+
+    def close(self):
+        self.session.close()
+
+    def _timeout(self, budget: TurnBudget):
+        if budget is None:
+            return (self.connect_timeout, self.read_timeout)
+        budget.check()
+        remaining = budget.remaining()
+        return (min(self.connect_timeout, remaining), min(self.read_timeout, remaining))
+
+    def _should_retry(self, attempt: int, budget: TurnBudget) -> bool:
+        if attempt >= self.max_retries:
+            return False
+        # Not worth retrying if even the shortest backoff would blow the budget
+        return budget is None or budget.remaining() > self.backoff
+
+    def _sleep(self, attempt: int, budget: TurnBudget, retry_after: float = None):
+        # Full jitter: uniform in [0, backoff * 2^attempt], at least Retry-After if given
+        delay = random.uniform(0, self.backoff * (2 ** attempt))
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        if budget is not None:
+            delay = min(delay, max(0.0, budget.remaining()))
+        time.sleep(delay)
+
+    @staticmethod
+    def _retry_after(response: "requests.Response"):
+        try:
+            return float(response.headers.get("Retry-After"))
+        except (TypeError, ValueError):
+            return None
+
+
+_client = None
+_client_lock = threading.Lock()
+
+def get_llm_client() -> LLMClient:
+    """Returns the shared LLM client (one connection pool per process)."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = LLMClient()
+    return _client
@@ -0,0 +1,169 @@
+# src/intent_router.py
+import re
+import threading
+import time
+from .logger import logger
+from .tools import AVAILABLE_TOOLS
+
+# Spoken arithmetic -> Python operators
+_SPOKEN_OPERATORS = [
+    (re.compile(r"\bdivided by\b|÷"), "/"),
+    (re.compile(r"\bmultiplied by\b|\btimes\b|×|(?<=\d)\s*x\s*(?=\d)"), "*"),
+    (re.compile(r"\bplus\b"), "+"),
+    (re.compile(r"\bminus\b"), "-"),
+    (re.compile(r"\bto the power of\b|\^"), "**"),
+]
+_EXPRESSION = re.compile(r"^[\d\s.+\-*/()]+$")
+_HAS_OPERATOR = re.compile(r"\d\s*(?:\*\*|[+\-*/])\s*\(?\s*[\d.]")
+
+
+def _normalize(text: str) -> str:
+    text = text.lower().strip()
+    text = re.sub(r"^(?:hey |ok |okay )?(?:jarvis|assistant)[,!.]?\s+", "", text)
+    text = re.sub(r"^(?:please|can you|could you)\s+", "", text)
+    text = re.sub(r"[\s,]*\bplease\b", "", text)
+    return re.sub(r"\s+", " ", text).strip(" ?!.")
+
+
+def _answer_time(match):
+    return f"It's {AVAILABLE_TOOLS['get_current_time']()}."
+
+def _answer_date(match):
+    return f"Today is {AVAILABLE_TOOLS['get_current_date']()}."
+
+def _answer_calculation(match):
+    spoken = match.group("expr").strip()
+    expression = spoken
+    for pattern, operator in _SPOKEN_OPERATORS:
+        expression = pattern.sub(f" {operator} ", expression)
+    expression = re.sub(r"\s+", " ", expression).strip()
+    if not _EXPRESSION.match(expression) or not _HAS_OPERATOR.search(expression):
+        return None
+    result = AVAILABLE_TOOLS["calculate"](expression)
+    if result.startswith("Error"):
+        return None
+    return f"{spoken} is {result}."
+
+# Sites opened by name alone; anything else needs an explicit domain ("open example.com",
+# "open example dot com"), so "open calculator" or "open settings" goes to the LLM instead
+KNOWN_SITES = {
+    "google": "google.com",
+    "youtube": "youtube.com",
+    "gmail": "mail.google.com",
+    "github": "github.com",
+    "wikipedia": "wikipedia.org",
+    "reddit": "reddit.com",
+    "amazon": "amazon.com",
+    "netflix": "netflix.com",
+}
+
+def _answer_open(match):
+    site = match.group("site")
+    if match.group("dot_com") and "." not in site:
+        site += ".com"
+    elif "." not in site:
+        site = KNOWN_SITES.get(site)
+        if not site:
+            return None
+    AVAILABLE_TOOLS["open_website"](site)
+    return f"Opening {site}."
+
+
+# (intent, compiled pattern, handler). Patterns are anchored on the whole
+# normalized utterance so only unambiguous requests are answered locally.
+INTENTS = [
+    ("time", re.compile(
+        r"^(?:what(?:'s| is)? the time(?: now| right now)?|what time is it(?: now| right now)?|"
+        r"tell me the time|(?:the )?time|current time)$"), _answer_time),
+    ("date", re.compile(
+        r"^(?:what(?:'s| is)? (?:the |today's )?date(?: today)?|what day is (?:it|today)(?: today)?|"
+        r"tell me the date|today's date|(?:the )?date|what is today)$"), _answer_date),
+    ("calculate", re.compile(
+        r"^(?:what(?:'s| is)|calculate|compute|how much is)\s+(?P<expr>[\d\s.+\-*/()x×÷^a-z]+?)$"), _answer_calculation),
+    ("open_website", re.compile(
+        r"^open (?:up )?(?P<site>[a-z0-9-]+(?:\.[a-z0-9-]+)*)(?P<dot_com> dot com)?(?: website| site)?$"),
+     _answer_open),
+]
+
+
+class IntentRouter:
+    """
+    Answers tool-only requests (time, date, arithmetic, "open X") locally from
+    templates, skipping both LLM round trips. Anything it is not sure about
+    returns None and goes to the LLM as before.
+
+    Keeps hit/miss counts and, from the LLM latency observed on misses
+    (record_llm_latency), an estimate of the time saved by local answers.
+    """
+
+    def __init__(self, intents=INTENTS):
+        self.intents = intents
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.hits_by_intent = {name: 0 for name, _, _ in intents}
+        self.route_seconds = 0.0
+        self._llm_seconds = 0.0
+        self._llm_turns = 0
+
+    def route(self, user_text: str):
+        """Returns a locally generated reply, or None if the LLM should answer."""
+        started = time.perf_counter()
+        reply, intent = None, None
+        text = _normalize(user_text or "")
+        for name, pattern, handler in self.intents:
+            match = pattern.match(text)
+            if not match:
+                continue
+            try:
+                reply = handler(match)
+            except Exception as e:
+                logger.warning(f"[Router] {name} handler failed: {e}")
+                reply = None
+            if reply:
+                intent = name
+                break
+        elapsed = time.perf_counter() - started
+
+        with self._lock:
+            self.route_seconds += elapsed
+            if reply:
+                self.hits += 1
+                self.hits_by_intent[intent] += 1
+            else:
+                self.misses += 1
+        if reply:
+            logger.info(f"[Router] Answered '{intent}' locally in {elapsed * 1e6:.0f}µs.")
+        return reply
+
+    def record_llm_latency(self, seconds: float):
+        """Feeds the latency of an LLM-answered turn into the savings estimate."""
+        with self._lock:
+            self._llm_seconds += seconds
+            self._llm_turns += 1
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self) -> dict:
+        with self._lock:
+            avg_llm = self._llm_seconds / self._llm_turns if self._llm_turns else 0.0
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hit_rate,
+                "hits_by_intent": dict(self.hits_by_intent),
+                "avg_route_us": self.route_seconds / max(1, self.hits + self.misses) * 1e6,
+                "avg_llm_seconds": avg_llm,
+                "saved_seconds": self.hits * avg_llm,
+            }
+
+
+intent_router = IntentRouter()
+
+# For server sessions: the requests come from remote clients, so nothing that
+# acts on the host (opening a browser) is answered locally
+REMOTE_INTENTS = [intent for intent in INTENTS if intent[0] != "open_website"]
+remote_intent_router = IntentRouter(REMOTE_INTENTS)
@@ -1,41 +1,196 @@
+import atexit
+import copy
+import json
 import logging
+import logging.handlers
+import queue
 import sys
-import os
+from .config import (
+    LOG_FILE, LOG_LEVEL, LOG_LEVELS, LOG_FORMAT, LOG_ROTATE, LOG_MAX_BYTES, LOG_ROTATE_WHEN, LOG_BACKUPS
+)
 
-def setup_logger(name: str = "VoiceAssistant", log_file: str = "app.log", level=logging.INFO) -> logging.Logger:
+_listener = None
+
+
+def parse_level(value):
+    """"INFO", "info", "20" or 20 -> 20; None if it is not a level."""
+    if isinstance(value, int):
+        return value
+    value = str(value).strip()
+    if value.isdigit():
+        return int(value)
+    level = logging.getLevelName(value.upper())
+    return level if isinstance(level, int) else None
+
+
+def parse_levels(spec: str, invalid: list = None) -> dict:
+    """
+    "capture=WARNING,barge_in=DEBUG" -> {"capture": 30, "barge_in": 10} (module = source file name).
+    Entries with an unknown level are skipped (and appended to `invalid`, if given).
+    """
+    levels = {}
+    for entry in spec.split(","):
+        module, _, level = entry.partition("=")
+        if not (module.strip() and level.strip()):
+            continue
+        value = parse_level(level)
+        if value is None:
+            if invalid is not None:
+                invalid.append(entry.strip())
+            continue
+        levels[module.strip()] = value
+    return levels
+
+
+def _current_turn_id():
+    try:
+        from .metrics import current_turn
+    except ImportError:     # metrics itself still importing
+        return None
+    turn = current_turn()
+    return turn.id if turn else None
+
+
+class ContextFilter(logging.Filter):
+    """
+    Runs on the calling thread, before the record is queued: applies the
+    per-module levels and stamps the current turn id (a contextvar, so it
+    can only be read here, not on the listener thread).
+    """
+
+    def __init__(self, level: int, module_levels: dict):
+        super().__init__()
+        self.level = level
+        self.module_levels = module_levels
+
+    def filter(self, record):
+        if record.levelno < self.module_levels.get(record.module, self.level):
+            return False
+        if not hasattr(record, "turn_id"):
+            record.turn_id = _current_turn_id()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, module, thread, message, turn id and structured extras."""
+
+    EXTRAS = ("stages", "attributes")
+
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "module": record.module,
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        if getattr(record, "turn_id", None) is not None:
+            entry["turn"] = record.turn_id
+        for key in self.EXTRAS:
+            if hasattr(record, key):
+                entry[key] = getattr(record, key)
+        if record.exc_text:     # traceback, formatted by _QueueHandler.prepare
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """
+    The stock prepare() folds the traceback into the message; this one keeps
+    it in exc_text, which text formatters still append and JsonFormatter
+    writes as its own "exc" field.
+    """
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = record.exc_text or _EXC_FORMATTER.formatException(record.exc_info)
+        record.exc_info = None
+        return record
+
+
+_EXC_FORMATTER = logging.Formatter()
+
+
+def _file_handler(log_file: str) -> logging.Handler:
+    if LOG_ROTATE == "size":
+        return logging.handlers.RotatingFileHandler(log_file, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUPS,
+                                                    encoding='utf-8')
+    if LOG_ROTATE == "time":
+        return logging.handlers.TimedRotatingFileHandler(log_file, when=LOG_ROTATE_WHEN, backupCount=LOG_BACKUPS,
+                                                         encoding='utf-8')
+    return logging.FileHandler(log_file, mode='a', encoding='utf-8')
+
+
+def setup_logger(name: str = "VoiceAssistant", log_file: str = LOG_FILE, level=LOG_LEVEL,
+                 module_levels: str = LOG_LEVELS, fmt: str = LOG_FORMAT) -> logging.Logger:
     """
     Configures and returns a logger with console and file handlers.
+
+    The logger itself only has a QueueHandler: logging from the audio, TTS or
+    controller threads is a non-blocking queue put, and a listener thread does
+    the console and (rotating) file I/O.
     """
+    global _listener
     # Create logger
     logger = logging.getLogger(name)
-    logger.setLevel(level)
 
     # Avoid adding handlers multiple times if setup_logger is called repeatedly
     if logger.hasHandlers():
         return logger
 
+    invalid = []
+    parsed = parse_level(level)
+    if parsed is None:
+        invalid.append(f"LOG_LEVEL={level}")
+    level = logging.INFO if parsed is None else parsed
+    overrides = parse_levels(module_levels, invalid)
+    logger.setLevel(min([level, *overrides.values()]))
+    logger.propagate = False
+
     # Formatters
-    # Console: simpler format
-    console_formatter = logging.Formatter('%(asctime)s [%(levelname)s] %(message)s', datefmt='%H:%M:%S')
-    # File: detailed format
-    file_formatter = logging.Formatter('%(asctime)s [%(levelname)s] [%(name)s] %(message)s')
+    if fmt == "json":
+        console_formatter = file_formatter = JsonFormatter()
+    else:
+        # Console: simpler format
+        console_formatter = logging.Formatter('%(asctime)s [%(levelname)s] %(message)s', datefmt='%H:%M:%S')
+        # File: detailed format
+        file_formatter = logging.Formatter('%(asctime)s [%(levelname)s] [%(module)s] %(message)s')
 
     # Console Handler
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setFormatter(console_formatter)
-    console_handler.setLevel(level)
-    logger.addHandler(console_handler)
+    handlers = [console_handler]
 
     # File Handler
-    try:
-        file_handler = logging.FileHandler(log_file, mode='a', encoding='utf-8')
-        file_handler.setFormatter(file_formatter)
-        file_handler.setLevel(level)
-        logger.addHandler(file_handler)
-    except Exception as e:
-        print(f"Failed to set up file logging: {e}")
+    if log_file:
+        try:
+            file_handler = _file_handler(log_file)
+            file_handler.setFormatter(file_formatter)
+            handlers.append(file_handler)
+        except Exception as e:
+            print(f"Failed to set up file logging: {e}")
+
+    queue_handler = _QueueHandler(queue.SimpleQueue())
+    queue_handler.addFilter(ContextFilter(level, overrides))
+    logger.addHandler(queue_handler)
 
+    _listener = logging.handlers.QueueListener(queue_handler.queue, *handlers)
+    _listener.start()
+    atexit.register(stop_logging)
+    if invalid:
+        logger.warning(f"⚠️ Ignoring invalid log level(s): {', '.join(invalid)}")
     return logger
 
+
+def stop_logging():
+    """Flushes the queue and stops the listener thread (registered with atexit)."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
 # Create a default logger instance for easy import
 logger = setup_logger()
@@ -0,0 +1,233 @@
+# src/metrics.py
+import contextvars
+import itertools
+import json
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+import numpy as np
+from .logger import logger
+from .config import TRACE_FILE, METRICS_WINDOW
+
+# Derived stages: (name, from mark, to mark), computed when a turn finishes
+DERIVED = [
+    ("time_to_first_audio", "speech_end", "first_audio"),
+    ("turn_total", "speech_end", "playback_end"),
+]
+
+
+class RollingHistogram:
+    """Latency samples over the last `window` observations, plus all-time count and sum."""
+
+    def __init__(self, window: int = METRICS_WINDOW):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+            self.count += 1
+            self.total += seconds
+
+    def percentiles(self, qs=(50, 95, 99)) -> dict:
+        with self._lock:
+            samples = np.fromiter(self._samples, dtype=np.float64)
+        if not len(samples):
+            return {}
+        return dict(zip(qs, np.percentile(samples, qs).tolist()))
+
+
+class Turn:
+    """
+    Timing record of one conversational turn (wake/record -> reply played).
+
+    Stages are either measured (span()/record(), durations) or marked
+    (mark(), monotonic offsets from the start of the turn). The turn is
+    written as one JSONL line by finish(), which is idempotent.
+    """
+
+    def __init__(self, tracer, turn_id: int):
+        self.tracer = tracer
+        self.id = turn_id
+        self.started = time.monotonic()
+        self.wall_started = time.time()
+        self.stages = {}          # name -> seconds (summed if recorded more than once)
+        self.marks = {}           # name -> seconds since start (first occurrence wins)
+        self.attributes = {}
+        self.finished = False
+        self._lock = threading.Lock()
+
+    def record(self, name: str, seconds: float):
+        with self._lock:
+            self.stages[name] = self.stages.get(name, 0.0) + seconds
+        self.tracer.observe(name, seconds)
+
+    def mark(self, name: str):
+        with self._lock:
+            self.marks.setdefault(name, time.monotonic() - self.started)
+
+    @contextmanager
+    def span(self, name: str):
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.record(name, time.monotonic() - started)
+
+    def set(self, key: str, value):
+        self.attributes[key] = value
+
+    def finish(self, outcome: str = None):
+        with self._lock:
+            if self.finished:
+                return
+            self.finished = True
+            if outcome:
+                self.attributes.setdefault("outcome", outcome)
+            for name, start, end in DERIVED:
+                if start in self.marks and end in self.marks:
+                    self.stages[name] = self.marks[end] - self.marks[start]
+                    self.tracer.observe(name, self.stages[name])
+        self.tracer._write(self)
+
+    def to_dict(self) -> dict:
+        return {
+            "turn": self.id,
+            "ts": self.wall_started,
+            "stages": {k: round(v, 4) for k, v in self.stages.items()},
+            "marks": {k: round(v, 4) for k, v in self.marks.items()},
+            **self.attributes,
+        }
+
+
+class Tracer:
+    """
+    Per-turn latency tracing with rolling histograms.
+
+    The controller opens a turn with start_turn(); code anywhere below it
+    (audio_io, STT, NLP, TTS) reports into the current turn through the
+    module-level span()/record()/mark() helpers. The current turn lives in a
+    ContextVar, so concurrent sessions each see their own; work handed to
+    other threads must carry the context along (see TTSPipeline).
+    """
+
+    def __init__(self, trace_file: str = TRACE_FILE, window: int = METRICS_WINDOW):
+        self.trace_file = trace_file
+        self.window = window
+        self.histograms = {}
+        self.outcomes = Counter()   # finished turns by outcome
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._server = None
+
+    def start_turn(self) -> Turn:
+        turn = Turn(self, next(self._ids))
+        _current_turn.set(turn)
+        return turn
+
+    def observe(self, name: str, seconds: float):
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            with self._lock:
+                histogram = self.histograms.setdefault(name, RollingHistogram(self.window))
+        histogram.observe(seconds)
+
+    def summary(self) -> dict:
+        """{stage: {"count", "p50", "p95", "p99"}} over the rolling window."""
+        result = {}
+        for name, histogram in sorted(self.histograms.items()):
+            stats = {"count": histogram.count}
+            stats.update({f"p{q}": v for q, v in histogram.percentiles().items()})
+            result[name] = stats
+        return result
+
+    def prometheus_text(self) -> str:
+        """Histograms in the Prometheus text exposition format (as summaries)."""
+        lines = [
+            "# HELP voice_stage_seconds Latency of each voice pipeline stage.",
+            "# TYPE voice_stage_seconds summary",
+        ]
+        for name, histogram in sorted(self.histograms.items()):
+            for q, value in histogram.percentiles().items():
+                lines.append(f'voice_stage_seconds{{stage="{name}",quantile="{q / 100:g}"}} {value:.6f}')
+            lines.append(f'voice_stage_seconds_sum{{stage="{name}"}} {histogram.total:.6f}')
+            lines.append(f'voice_stage_seconds_count{{stage="{name}"}} {histogram.count}')
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port: int, host: str = "127.0.0.1"):
+        """Serves prometheus_text() at http://host:port/metrics from a daemon thread."""
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        tracer = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.rstrip("/") != "/metrics":
+                    self.send_error(404)
+                    return
+                body = tracer.prometheus_text().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=self._server.serve_forever, name="metrics", daemon=True).start()
+        logger.info(f"📈 Metrics at http://{host}:{self._server.server_port}/metrics")
+        return self._server
+
+    @property
+    def turns_finished(self) -> int:
+        return sum(self.outcomes.values())
+
+    def _write(self, turn: Turn):
+        with self._lock:
+            self.outcomes[turn.attributes.get("outcome", "ok")] += 1
+        record = turn.to_dict()
+        stages = " | ".join(f"{k} {v * 1000:.0f}ms" for k, v in turn.stages.items())
+        logger.info(f"⏱️ Turn {turn.id}: {stages or 'no stages'}",
+                    extra={"turn_id": turn.id, "stages": record["stages"], "attributes": turn.attributes})
+        if not self.trace_file:
+            return
+        line = json.dumps(record, ensure_ascii=False)
+        try:
+            with self._lock, open(self.trace_file, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+        except OSError as e:
+            logger.warning(f"[Metrics] Could not write trace: {e}")
+
+
+_current_turn = contextvars.ContextVar("current_turn", default=None)
+
+tracer = Tracer()
+
+
+def current_turn():
+    return _current_turn.get()
+
+def record(name: str, seconds: float):
+    """Adds a measured duration to the current turn (or just the histogram outside a turn)."""
+    turn = _current_turn.get()
+    if turn is not None:
+        turn.record(name, seconds)
+    else:
+        tracer.observe(name, seconds)
+
+def mark(name: str):
+    turn = _current_turn.get()
+    if turn is not None:
+        turn.mark(name)
+
+@contextmanager
+def span(name: str):
+    started = time.monotonic()
+    try:
+        yield
+    finally:
+        record(name, time.monotonic() - started)
@@ -1,104 +1,205 @@
 import os
-import requests
 import json
+import time
 from dotenv import load_dotenv
 from .logger import logger
-from .config import GROQ_API_KEY, SYSTEM_PROMPT
-from .tools import TOOLS_SCHEMA, AVAILABLE_TOOLS
+from . import metrics
+from .config import SYSTEM_PROMPT, LLM_MAX_TOOL_ROUNDS
+from .http_client import get_llm_client, TurnBudget, BudgetExceeded
+from .tools import tools_schema, execute_tool_calls
+from .text_utils import split_sentences
+from .settings import Tuning, DEFAULT_TUNING
 
 load_dotenv()
 
+def _build_messages(user_text: str, history: list = None) -> list:
+    """System prompt, then the earlier exchanges of the conversation (if any), then the new request."""
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        *(history or []),
+        {"role": "user", "content": user_text}
+    ]
+
 
-def chat_reply(user_text: str) -> str:
+def _build_payload(messages: list, with_tools: bool = True, stream: bool = False,
+                   tuning: Tuning = DEFAULT_TUNING, tools=None) -> dict:
+    payload = {
+        "model": tuning.llm_model,
+        "messages": messages,
+        "temperature": tuning.llm_temperature,
+        "max_tokens": tuning.llm_max_tokens
+    }
+    schema = tools_schema(tools) if with_tools else None
+    if schema:
+        payload["tools"] = schema
+        payload["tool_choice"] = "auto"
+    if stream:
+        payload["stream"] = True
+    return payload
+
+
+def _run_tool_calls(tool_calls: list, messages: list, tools=None):
+    """Executes the requested tools concurrently and appends their results to messages."""
+    with metrics.span("tools"):
+        results = execute_tool_calls(tool_calls, allowed=tools)
+    for tool_call, function_response in zip(tool_calls, results):
+        # Append tool result to history
+        messages.append({
+            "tool_call_id": tool_call['id'],
+            "role": "tool",
+            "name": tool_call['function']['name'],
+            "content": function_response,
+        })
+
+
+def chat_reply(user_text: str, budget: TurnBudget = None, history: list = None, client=None,
+               tuning: Tuning = None, tools=None) -> str:
     """
     Sends user text to Groq (Llama 3) and returns the response.
-    Handles function calling if the model requests it.
+    Handles function calling (up to LLM_MAX_TOOL_ROUNDS rounds) if the model requests it.
+    All requests of the turn share one latency budget.
+    history: earlier messages of this session (see SessionContext); client defaults to the shared LLM client.
+    tuning: model, sampling and budget of this turn (default: the env values).
+    tools: names of the tools the model may call (default: all of them).
     """
     if not user_text:
         return ""
 
-    url = "https://api.groq.com/openai/v1/chat/completions"
-    headers = {
-        "Authorization": f"Bearer {GROQ_API_KEY}",
-        "Content-Type": "application/json"
-    }
+    client = client or get_llm_client()
+    tuning = tuning or DEFAULT_TUNING
+    budget = budget or TurnBudget(tuning.llm_turn_budget)
+    messages = _build_messages(user_text, history)
+    started = time.monotonic()
 
-    messages = [
-        {"role": "system", "content": SYSTEM_PROMPT},
-        {"role": "user", "content": user_text}
-    ]
+    try:
+        for round_no in range(LLM_MAX_TOOL_ROUNDS + 1):
+            # Tools are left out of the last call to force a text response
+            payload = _build_payload(messages, with_tools=round_no < LLM_MAX_TOOL_ROUNDS, tuning=tuning,
+                                     tools=tools)
+            response = client.post(payload, budget=budget)
 
-    payload = {
-        "model": "llama-3.3-70b-versatile",
-        "messages": messages,
-        "tools": TOOLS_SCHEMA,
-        "tool_choice": "auto",
-        "temperature": 0.7,
-        "max_tokens": 1024
-    }
+            if response.status_code != 200:
+                logger.error(f"[NLP] Groq API Error: {response.status_code} - {response.text}")
+                if round_no:
+                    return "Sorry, I encountered an error processing the tool result."
+                return f"Sorry, I encountered an error: {response.text}"
+
+            message = response.json()['choices'][0]['message']
+
+            if not message.get('tool_calls'):
+                # Normal text response
+                return (message.get('content') or "").strip()
 
-    try:
-        # 1. First API Call
-        response = requests.post(url, headers=headers, json=payload)
-        
-        if response.status_code != 200:
-            logger.error(f"[NLP] Groq API Error: {response.status_code} - {response.text}")
-            return f"Sorry, I encountered an error: {response.text}"
-
-        data = response.json()
-        
-        message = data['choices'][0]['message']
-        
-        # 2. Check for tool calls
-        if message.get('tool_calls'):
             tool_calls = message['tool_calls']
-            logger.info(f"[NLP] Tool calls detected: {len(tool_calls)}")
-            
-            # Append assistant's tool request to history
-            messages.append(message)
+            logger.info(f"[NLP] Tool calls detected: {len(tool_calls)} (round {round_no + 1})")
 
-            for tool_call in tool_calls:
-                function_name = tool_call['function']['name']
-                function_args = json.loads(tool_call['function']['arguments'])
-                
-                logger.info(f"[NLP] Executing tool: {function_name} with {function_args}")
-                
-                function_to_call = AVAILABLE_TOOLS.get(function_name)
-                if function_to_call:
-                    try:
-                        function_response = function_to_call(**function_args)
-                    except Exception as e:
-                        function_response = f"Error executing {function_name}: {e}"
-                else:
-                    function_response = f"Error: Tool {function_name} not found."
-                
-                # Append tool result to history
-                messages.append({
-                    "tool_call_id": tool_call['id'],
-                    "role": "tool",
-                    "name": function_name,
-                    "content": str(function_response),
-                })
+            # Append assistant's tool request to history, then the results
+            messages.append(message)
+            _run_tool_calls(tool_calls, messages, tools)
 
-            # 3. Second API Call (Get final answer)
-            payload['messages'] = messages
-            # Remove tools from second call to force a text response (optional, but cleaner)
-            del payload['tools']
-            del payload['tool_choice']
-            
-            second_response = requests.post(url, headers=headers, json=payload)
-            if second_response.status_code != 200:
-                 logger.error(f"[NLP] Groq API Error (2nd call): {second_response.status_code} - {second_response.text}")
-                 return "Sorry, I encountered an error processing the tool result."
-            
-            second_data = second_response.json()
-            
-            return second_data['choices'][0]['message']['content'].strip()
-
-        else:
-            # Normal text response
-            return message['content'].strip()
+        return ""
 
+    except BudgetExceeded as e:
+        logger.error(f"[NLP] {e}")
+        return "Sorry, that took too long. Please try again."
     except Exception as e:
         logger.error(f"[NLP] Groq error: {e}")
         return "Sorry, I couldn’t reach Groq right now."
+    finally:
+        metrics.record("llm_total", time.monotonic() - started)
+
+
+def _stream_completion(payload: dict, budget: TurnBudget, client):
+    """
+    Posts a streaming request and yields ("text", str) for content deltas,
+    then ("tool_calls", list) once if the model asked for tools.
+    """
+    response = client.post(payload, stream=True, budget=budget)
+    if response.status_code != 200:
+        raise RuntimeError(f"Groq API Error: {response.status_code} - {response.text}")
+
+    tool_calls = {}  # index -> accumulated tool call
+    try:
+        for line in response.iter_lines(decode_unicode=True):
+            if not line or not line.startswith("data:"):
+                continue
+            data = line[len("data:"):].strip()
+            if data == "[DONE]":
+                break
+            budget.check()
+            choice = json.loads(data)["choices"][0]
+            delta = choice.get("delta", {})
+
+            if delta.get("content"):
+                yield "text", delta["content"]
+
+            # Tool calls arrive in pieces: id/name first, then argument fragments
+            for part in delta.get("tool_calls") or []:
+                call = tool_calls.setdefault(part.get("index", 0), {
+                    "id": None, "type": "function", "function": {"name": "", "arguments": ""}
+                })
+                if part.get("id"):
+                    call["id"] = part["id"]
+                function = part.get("function") or {}
+                call["function"]["name"] += function.get("name") or ""
+                call["function"]["arguments"] += function.get("arguments") or ""
+    finally:
+        response.close()
+
+    if tool_calls:
+        yield "tool_calls", [tool_calls[i] for i in sorted(tool_calls)]
+
+
+def chat_reply_stream(user_text: str, budget: TurnBudget = None, history: list = None, client=None,
+                      tuning: Tuning = None, tools=None):
+    """
+    Streaming version of chat_reply: yields the reply one complete sentence
+    at a time, as soon as each sentence has been generated, so speech can
+    start before the rest of the answer exists.
+    """
+    if not user_text:
+        return
+
+    client = client or get_llm_client()
+    tuning = tuning or DEFAULT_TUNING
+    budget = budget or TurnBudget(tuning.llm_turn_budget)
+    messages = _build_messages(user_text, history)
+    started = time.monotonic()
+    first_token = True
+
+    try:
+        for round_no in range(LLM_MAX_TOOL_ROUNDS + 1):
+            # Tools are left out of the last call to force a text response
+            payload = _build_payload(messages, with_tools=round_no < LLM_MAX_TOOL_ROUNDS, stream=True,
+                                     tuning=tuning, tools=tools)
+            buffer = ""
+            tool_calls = None
+            for kind, value in _stream_completion(payload, budget, client):
+                if first_token:
+                    metrics.record("llm_first_token", time.monotonic() - started)
+                    first_token = False
+                if kind == "tool_calls":
+                    tool_calls = value
+                    continue
+                buffer += value
+                sentences, buffer = split_sentences(buffer)
+                yield from sentences
+
+            if buffer.strip():
+                yield buffer.strip()
+
+            if not tool_calls:
+                return
+
+            logger.info(f"[NLP] Tool calls detected: {len(tool_calls)} (round {round_no + 1})")
+            messages.append({"role": "assistant", "content": None, "tool_calls": tool_calls})
+            _run_tool_calls(tool_calls, messages, tools)
+
+    except BudgetExceeded as e:
+        logger.error(f"[NLP] {e}")
+        yield "Sorry, that took too long. Please try again."
+    except Exception as e:
+        logger.error(f"[NLP] Groq streaming error: {e}")
+        yield "Sorry, I couldn’t reach Groq right now."
+    finally:
+        metrics.record("llm_total", time.monotonic() - started)
@@ -0,0 +1,293 @@
+# src/playback.py
+import io
+import queue
+import threading
+import time
+import wave
+import numpy as np
+import soundfile as sf
+from .logger import logger
+from .config import PLAYBACK_SINK, PLAYBACK_BLOCK_MS
+
+
+def decode_audio(source) -> tuple:
+    """
+    Decodes an audio file (path or bytes: MP3, WAV, FLAC, OGG) to mono int16 PCM in memory.
+    Returns (pcm, sample_rate).
+    """
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    pcm, sample_rate = sf.read(source, dtype="int16", always_2d=True)
+    if pcm.shape[1] > 1:
+        pcm = pcm.mean(axis=1).astype(np.int16)
+    else:
+        pcm = pcm[:, 0]
+    return np.ascontiguousarray(pcm), sample_rate
+
+
+# --- Sinks: where PCM blocks end up ---
+
+class PyAudioSink:
+    """Persistent PyAudio output stream, reopened only when the sample rate changes."""
+
+    def __init__(self, frames_per_buffer: int = 256):
+        self.frames_per_buffer = frames_per_buffer
+        self._pa = None
+        self._stream = None
+        self._rate = None
+
+    def open(self, sample_rate: int):
+        if self._stream is not None and self._rate == sample_rate:
+            return
+        import pyaudio
+        self.close()
+        self._pa = self._pa or pyaudio.PyAudio()
+        self._stream = self._pa.open(format=pyaudio.paInt16, channels=1, rate=sample_rate,
+                                     output=True, frames_per_buffer=self.frames_per_buffer)
+        self._rate = sample_rate
+
+    def write(self, block: np.ndarray):
+        self._stream.write(block.tobytes())
+
+    def close(self):
+        if self._stream is not None:
+            self._stream.stop_stream()
+            self._stream.close()
+            self._stream = None
+            self._rate = None
+
+    def terminate(self):
+        self.close()
+        if self._pa is not None:
+            self._pa.terminate()
+            self._pa = None
+
+
+class NullSink:
+    """Discards audio. With realtime=True it still takes as long as the audio would to play."""
+
+    def __init__(self, realtime: bool = False):
+        self.realtime = realtime
+        self.samples_written = 0
+        self._rate = None
+
+    def open(self, sample_rate: int):
+        self._rate = sample_rate
+
+    def write(self, block: np.ndarray):
+        self.samples_written += len(block)
+        if self.realtime:
+            time.sleep(len(block) / self._rate)
+
+    def close(self):
+        pass
+
+    def terminate(self):
+        pass
+
+
+class FileSink(NullSink):
+    """Appends everything played to a WAV file (for tests and debugging)."""
+
+    def __init__(self, path: str, realtime: bool = False):
+        super().__init__(realtime)
+        self.path = path
+        self._wav = None
+
+    def open(self, sample_rate: int):
+        if self._wav is not None and self._rate == sample_rate:
+            return
+        self.close()
+        super().open(sample_rate)
+        self._wav = wave.open(self.path, "wb")
+        self._wav.setnchannels(1)
+        self._wav.setsampwidth(2)
+        self._wav.setframerate(sample_rate)
+
+    def write(self, block: np.ndarray):
+        self._wav.writeframes(block.tobytes())
+        super().write(block)
+
+    def close(self):
+        if self._wav is not None:
+            self._wav.close()
+            self._wav = None
+
+    def terminate(self):
+        self.close()
+
+
+def make_sink(spec: str = PLAYBACK_SINK):
+    """'pyaudio' (default), 'null', 'null-realtime' or 'file:/path/to/out.wav'."""
+    if spec == "null":
+        return NullSink()
+    if spec == "null-realtime":
+        return NullSink(realtime=True)
+    if spec.startswith("file:"):
+        return FileSink(spec[len("file:"):])
+    return PyAudioSink()
+
+
+# --- Engine ---
+
+class PlaybackHandle:
+    """
+    One queued clip. Mirrors the bits of subprocess.Popen the callers use
+    (poll/terminate/wait), so it can stand in for the old afplay process.
+    """
+
+    def __init__(self, pcm: np.ndarray, sample_rate: int):
+        self.pcm = pcm
+        self.sample_rate = sample_rate
+        self.samples_played = 0
+        self.returncode = None          # None while queued/playing, 0 when done, -15 if stopped
+        self._stop = threading.Event()
+        self._done = threading.Event()
+
+    @property
+    def position(self) -> float:
+        """Seconds of this clip handed to the sink so far."""
+        return self.samples_played / self.sample_rate
+
+    @property
+    def duration(self) -> float:
+        return len(self.pcm) / self.sample_rate
+
+    def poll(self):
+        return self.returncode
+
+    def terminate(self):
+        self._stop.set()
+
+    kill = terminate
+
+    def wait(self, timeout: float = None):
+        self._done.wait(timeout)
+        return self.returncode
+
+    def _finish(self, returncode: int):
+        self.returncode = returncode
+        self._done.set()
+
+
+class PlaybackEngine:
+    """
+    In-process audio output: one long-lived thread and sink play queued
+    clips in small blocks (PLAYBACK_BLOCK_MS), checking for a stop request
+    between blocks, so an interruption takes effect within one block
+    instead of the ~0.5 s of killing an afplay process.
+    """
+
+    def __init__(self, sink=None, block_ms: int = PLAYBACK_BLOCK_MS):
+        self.sink = sink or make_sink()
+        self.block_ms = block_ms
+        self._queue = queue.Queue()
+        self.current = None
+        self._taps = []                 # called with every block written to the sink
+        self.muted = False              # play silence instead (clips keep their timing)
+        self._thread = threading.Thread(target=self._run, name="playback", daemon=True)
+        self._thread.start()
+
+    def play(self, pcm: np.ndarray, sample_rate: int) -> PlaybackHandle:
+        """Queues int16 mono PCM. Returns immediately with a handle."""
+        handle = PlaybackHandle(pcm, sample_rate)
+        self._queue.put(handle)
+        return handle
+
+    def play_file(self, source) -> PlaybackHandle:
+        """Decodes an audio file (path or bytes) in memory and queues it."""
+        pcm, sample_rate = decode_audio(source)
+        return self.play(pcm, sample_rate)
+
+    def stop_all(self):
+        """Stops the current clip and everything queued behind it."""
+        while True:
+            try:
+                handle = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if handle is None:          # shutdown sentinel: leave it for _run
+                self._queue.put(None)
+                break
+            # _run never sees these, so finish them here or wait() would block forever
+            handle.terminate()
+            handle._finish(-15)
+        current = self.current
+        if current:
+            current.terminate()
+
+    @property
+    def position(self) -> float:
+        current = self.current
+        return current.position if current else 0.0
+
+    @property
+    def is_playing(self) -> bool:
+        return self.current is not None
+
+    def add_tap(self, callback):
+        """Calls callback(block, sample_rate) from the playback thread for every block played (e.g. echo reference)."""
+        self._taps = self._taps + [callback]
+
+    def remove_tap(self, callback):
+        self._taps = [tap for tap in self._taps if tap is not callback]
+
+    def _run(self):
+        while True:
+            handle = self._queue.get()
+            if handle is None:
+                break
+            if handle._stop.is_set():
+                handle._finish(-15)
+                continue
+            self.current = handle
+            try:
+                self._play_blocks(handle)
+            except Exception as e:
+                logger.error(f"[Playback] Error: {e}")
+                handle._finish(1)
+            finally:
+                self.current = None
+
+    def _play_blocks(self, handle: PlaybackHandle):
+        self.sink.open(handle.sample_rate)
+        block = max(1, int(handle.sample_rate * self.block_ms / 1000))
+        pcm = handle.pcm
+        for start in range(0, len(pcm), block):
+            if handle._stop.is_set():
+                handle._finish(-15)
+                return
+            data = pcm[start:start + block]
+            if self.muted:
+                data = np.zeros_like(data)
+            self.sink.write(data)
+            handle.samples_played = min(len(pcm), start + block)
+            for tap in self._taps:
+                tap(data, handle.sample_rate)
+        handle._finish(0)
+
+    def shutdown(self):
+        self.stop_all()
+        self._queue.put(None)
+        self._thread.join(timeout=1.0)
+        self.sink.terminate()
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+def get_playback_engine() -> PlaybackEngine:
+    """Returns the shared playback engine (one output stream per process)."""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = PlaybackEngine()
+    return _engine
+
+def stop_playback_engine():
+    """Stops any playback and closes the output stream if the engine was ever started."""
+    global _engine
+    with _engine_lock:
+        if _engine is not None:
+            _engine.shutdown()
+            _engine = None
@@ -0,0 +1,402 @@
+# src/server.py
+"""
+Headless voice assistant server: streamed PCM in, transcripts, reply text
+and synthesized audio out, over WebSocket (pip install websockets).
+
+    python -m src.server [--host 127.0.0.1] [--port 8765]
+
+Protocol (one WebSocket per session):
+  client -> server
+    binary                16 kHz mono int16 little-endian PCM, any chunk size
+    {"type": "config", "voice": "co.uk", "tts_backend": "piper"}   (optional; also
+                          "whisper_beam_size" and "llm_temperature", from the next utterance)
+    {"type": "end"}       end of utterance now (push-to-talk), instead of waiting for the VAD
+    {"type": "stop"}      cancel the reply in progress
+  server -> client
+    {"type": "ready", "sample_rate": 16000}
+    {"type": "speech_start"} / {"type": "speech_end"}
+    {"type": "partial", "text": ...}       (streaming STT; dropped under backpressure)
+    {"type": "transcript", "text": ...}
+    {"type": "reply", "text": ...}         one per sentence, followed by its audio:
+    {"type": "audio", "sample_rate": 24000, "bytes": n} then n bytes of int16 PCM in binary frames
+    {"type": "done"} / {"type": "interrupted"} / {"type": "error", "message": ...}
+
+All sessions share one Whisper model manager, one pooled LLM client and one
+TTS backend per name (SharedResources); everything else, including the
+conversation history, is per session (SessionContext). STT decodes are
+bounded by SERVER_STT_CONCURRENCY. Nothing a client says acts on the host:
+sessions get the router and LLM tools without open_website (REMOTE_TOOLS).
+Each session reads audio through a bounded queue (a slow session stops
+reading its socket, so TCP pushes back on the client) and sends through a
+bounded queue that blocks synthesis when the client does not keep up.
+"""
+import argparse
+import asyncio
+import contextvars
+import functools
+import json
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from .logger import logger
+from .config import (
+    SAMPLE_RATE, PRE_ROLL_SECONDS, STREAMING_STT, WHISPER_PRELOAD, LLM_PREWARM,
+    SERVER_HOST, SERVER_PORT, SERVER_MAX_SESSIONS, SERVER_STT_CONCURRENCY,
+    SERVER_RECV_QUEUE, SERVER_SEND_QUEUE, SERVER_WORKERS, require_keys
+)
+from .vad import VoiceActivityDetector, SPEECH_START, SPEECH_END
+from .stt_faster_whisper import transcribe_array
+from .stt_streaming import StreamingTranscriber
+from .audio_io import pcm16_to_float32
+from .nlp_groq import chat_reply_stream
+from .intent_router import remote_intent_router
+from .session import SessionContext, SharedResources
+from .tools import REMOTE_TOOLS
+from .text_utils import split_chunks
+from .metrics import tracer
+from . import metrics
+
+AUDIO_FRAME_BYTES = 16384   # outbound PCM is sent in binary frames of at most this size
+
+
+# What a client may change with a "config" message: only settings that affect its own
+# session (no model loads in the shared WhisperModelManager, no LLM model or token limits)
+CLIENT_SETTINGS = ("voice", "tts_backend", "whisper_beam_size", "llm_temperature")
+
+
+class Session:
+    """One client connection: its own VAD, utterance buffer, reply task and queues."""
+
+    def __init__(self, server, websocket):
+        self.server = server
+        self.ws = websocket
+        self.context = SessionContext(resources=server.resources)
+        self.id = self.context.id
+        self._tuning = self.context.tuning()    # snapshot for the utterance in progress
+        self.vad = None
+        self._retune_vad(self._tuning)
+        self.recv_queue = asyncio.Queue(maxsize=SERVER_RECV_QUEUE)
+        self.send_queue = asyncio.Queue(maxsize=SERVER_SEND_QUEUE)
+        self.reply_task = None
+
+        self._utterance = np.empty(int(self._tuning.max_record_seconds * SAMPLE_RATE), dtype=np.int16)
+        self._n = 0
+        self._pre_roll = np.zeros(int(PRE_ROLL_SECONDS * SAMPLE_RATE), dtype=np.int16)
+        self._in_speech = False
+        self._streamer = None
+
+    async def run(self):
+        await self.send_json({"type": "ready", "sample_rate": SAMPLE_RATE})
+        tasks = [asyncio.ensure_future(self._receive()), asyncio.ensure_future(self._process()),
+                 asyncio.ensure_future(self._send())]
+        try:
+            # The receiver finishes when the client disconnects; the others only on errors
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                task.result()
+        finally:
+            for task in tasks + [self.reply_task]:
+                if task:
+                    task.cancel()
+            if self._streamer:
+                self._streamer.cancel()
+
+    # --- inbound ---
+
+    async def _receive(self):
+        async for message in self.ws:
+            # Blocks when the processor is behind: backpressure onto the socket
+            await self.recv_queue.put(message)
+
+    async def _process(self):
+        while True:
+            message = await self.recv_queue.get()
+            if isinstance(message, (bytes, bytearray)):
+                await self._on_audio(np.frombuffer(message[:len(message) // 2 * 2], dtype=np.int16))
+            else:
+                try:
+                    await self._on_control(json.loads(message))
+                except (ValueError, AttributeError):
+                    await self.send_json({"type": "error", "message": "control messages must be JSON objects"})
+
+    async def _on_control(self, message: dict):
+        kind = message.get("type")
+        if kind == "config":
+            try:
+                self.context.settings.update(
+                    {key: message[key] for key in CLIENT_SETTINGS if key in message})
+            except ValueError as e:
+                await self.send_json({"type": "error", "message": str(e)})
+        elif kind == "end" and self._in_speech:
+            await self._end_utterance()
+        elif kind == "stop":
+            await self._interrupt()
+
+    async def _on_audio(self, pcm: np.ndarray):
+        events = self.vad.process(pcm)
+        if SPEECH_START in events and not self._in_speech:
+            await self._interrupt()   # barge-in
+            self._start_utterance()
+            await self.send_json({"type": "speech_start"})
+
+        if self._in_speech:
+            n = min(len(pcm), len(self._utterance) - self._n)
+            self._utterance[self._n:self._n + n] = pcm[:n]
+            self._n += n
+            if self._streamer:
+                self._streamer.feed(pcm[:n])
+            if SPEECH_END in events or self._n >= len(self._utterance):
+                await self._end_utterance()
+        else:
+            self._keep_pre_roll(pcm)
+
+    def _keep_pre_roll(self, pcm: np.ndarray):
+        keep = len(self._pre_roll)
+        if len(pcm) >= keep:
+            self._pre_roll[:] = pcm[-keep:]
+        else:
+            self._pre_roll[:-len(pcm)] = self._pre_roll[len(pcm):]
+            self._pre_roll[-len(pcm):] = pcm
+
+    def _retune_vad(self, tuning):
+        """(Re)builds the VAD from the session's tuning, as the local recorder does, keeping the learned floor."""
+        settings = (tuning.silence_duration, tuning.vad_onset_db, tuning.vad_offset_db, tuning.vad_min_rms)
+        if self.vad is not None and settings == self._vad_settings:
+            return
+        floor = self.vad.noise_floor_rms if self.vad is not None else None
+        self.vad = VoiceActivityDetector(sample_rate=SAMPLE_RATE, hangover_s=tuning.silence_duration,
+                                         onset_db=tuning.vad_onset_db, offset_db=tuning.vad_offset_db,
+                                         min_rms=tuning.vad_min_rms, initial_floor_rms=floor,
+                                         calibration_ms=200 if floor is None else 0)
+        self._vad_settings = settings
+
+    def _start_utterance(self):
+        self._in_speech = True
+        self._tuning = self.context.tuning()
+        max_samples = int(self._tuning.max_record_seconds * SAMPLE_RATE)
+        if len(self._utterance) != max_samples:
+            self._utterance = np.empty(max_samples, dtype=np.int16)
+        self._n = len(self._pre_roll)
+        self._utterance[:self._n] = self._pre_roll
+        if STREAMING_STT:
+            self._streamer = StreamingTranscriber(on_partial=self._on_partial,
+                                                  manager=self.server.resources.models, tuning=self._tuning)
+            self._streamer.feed(self._pre_roll)
+
+    async def _end_utterance(self):
+        self._in_speech = False
+        self.vad.reset()
+        self._retune_vad(self.context.tuning())     # tuning changes apply from the next utterance
+        await self.send_json({"type": "speech_end"})
+        audio = pcm16_to_float32(self._utterance[:self._n])
+        streamer, self._streamer = self._streamer, None
+        self.reply_task = asyncio.ensure_future(self._respond(audio, streamer, self._tuning))
+
+    def _on_partial(self, text: str):
+        # Called from the streaming STT thread; partials are droppable
+        self.server.loop.call_soon_threadsafe(self._offer, ("json", {"type": "partial", "text": text}))
+
+    async def _interrupt(self):
+        task, self.reply_task = self.reply_task, None
+        if task and not task.done():
+            task.cancel()
+            await self.send_json({"type": "interrupted"})
+
+    # --- one turn ---
+
+    async def _respond(self, audio: np.ndarray, streamer, tuning):
+        turn = tracer.start_turn()
+        turn.set("session", self.id)
+        metrics.mark("speech_end")
+        cancelled = [False]
+        speaker = synth = None
+        try:
+            async with self.server.stt_slots:
+                if streamer:
+                    text = await self.server.in_thread(streamer.finish)
+                else:
+                    text = await self.server.in_thread(
+                        functools.partial(transcribe_array, audio, manager=self.server.resources.models,
+                                          tuning=tuning))
+            await self.send_json({"type": "transcript", "text": text})
+            if not text:
+                await self.send_json({"type": "done"})
+                turn.finish("no_speech")
+                return
+
+            backend, voice = self.context.tts_backend, self.context.voice
+            synth = asyncio.Queue()     # synthesis futures in playback order
+            speaker = asyncio.ensure_future(self._speak(synth))
+
+            local_reply = await self.server.in_thread(remote_intent_router.route, text)
+            turn.set("answered_by", "router" if local_reply else "llm")
+            replies = []
+            async for sentence in self._sentences(text, local_reply, cancelled, tuning):
+                replies.append(sentence)
+                await self.send_json({"type": "reply", "text": sentence})
+                for chunk in split_chunks(sentence):
+                    synth.put_nowait((chunk, self.server.in_thread(backend.synthesize, chunk, voice)))
+            synth.put_nowait(None)
+            await speaker
+            self.context.remember(text, " ".join(replies))
+            metrics.mark("playback_end")
+            await self.send_json({"type": "done"})
+            turn.finish("ok")
+        except asyncio.CancelledError:
+            cancelled[0] = True
+            if speaker:
+                speaker.cancel()
+            if synth:
+                # Synthesis not started yet is dropped; running ones finish on their own
+                while not synth.empty():
+                    item = synth.get_nowait()
+                    if item:
+                        item[1].cancel()
+            turn.finish("interrupted")
+            raise
+        except Exception as e:
+            logger.error(f"[Server] Session {self.id} turn failed: {e}")
+            turn.finish("error")
+            await self.send_json({"type": "error", "message": str(e)})
+
+    async def _sentences(self, text: str, local_reply: str, cancelled: list, tuning):
+        """Yields reply sentences, running the blocking LLM stream on a worker thread."""
+        if local_reply:
+            yield local_reply
+            return
+        queue = asyncio.Queue()
+        loop = self.server.loop
+
+        history = list(self.context.history)
+
+        def produce():
+            stream = chat_reply_stream(text, history=history, client=self.server.resources.llm, tuning=tuning,
+                                       tools=REMOTE_TOOLS)
+            try:
+                for sentence in stream:
+                    if cancelled[0]:
+                        break
+                    loop.call_soon_threadsafe(queue.put_nowait, sentence)
+            finally:
+                stream.close()
+                loop.call_soon_threadsafe(queue.put_nowait, None)
+
+        producer = self.server.in_thread(produce)
+        try:
+            while True:
+                sentence = await queue.get()
+                if sentence is None:
+                    break
+                yield sentence
+        finally:
+            cancelled[0] = True  # stops the producer if we were closed early
+
+    async def _speak(self, synth: asyncio.Queue):
+        """Sends synthesized chunks in order as they become ready."""
+        first = True
+        while True:
+            item = await synth.get()
+            if item is None:
+                return
+            chunk, future = item
+            try:
+                pcm, sample_rate = await future
+            except Exception as e:
+                logger.error(f"[Server] Synthesis failed for '{chunk[:40]}': {e}")
+                continue
+            data = pcm.astype(np.int16, copy=False).tobytes()
+            await self.send_json({"type": "audio", "sample_rate": sample_rate, "bytes": len(data)})
+            for start in range(0, len(data), AUDIO_FRAME_BYTES):
+                await self.send_queue.put(("bytes", data[start:start + AUDIO_FRAME_BYTES]))
+            if first:
+                metrics.mark("first_audio")
+                first = False
+
+    # --- outbound ---
+
+    async def send_json(self, message: dict):
+        await self.send_queue.put(("json", message))
+
+    def _offer(self, item):
+        try:
+            self.send_queue.put_nowait(item)
+        except asyncio.QueueFull:
+            pass
+
+    async def _send(self):
+        while True:
+            kind, payload = await self.send_queue.get()
+            await self.ws.send(json.dumps(payload) if kind == "json" else payload)
+
+
+class AssistantServer:
+    """Accepts sessions and owns the resources they share."""
+
+    def __init__(self, host: str = SERVER_HOST, port: int = SERVER_PORT,
+                 max_sessions: int = SERVER_MAX_SESSIONS):
+        self.host = host
+        self.port = port
+        self.max_sessions = max_sessions
+        self.sessions = {}
+        self.loop = None
+        self.stt_slots = None
+        self.resources = SharedResources()
+        self._executor = ThreadPoolExecutor(max_workers=SERVER_WORKERS, thread_name_prefix="server")
+
+    def in_thread(self, fn, *args):
+        """Runs fn on the worker pool, carrying the caller's context (current metrics turn) along."""
+        call = functools.partial(contextvars.copy_context().run, fn, *args)
+        return self.loop.run_in_executor(self._executor, call)
+
+    async def handle(self, websocket, path=None):
+        if len(self.sessions) >= self.max_sessions:
+            await websocket.close(code=1013, reason="server busy")
+            return
+        session = Session(self, websocket)
+        self.sessions[session.id] = session
+        logger.info(f"🔌 [Server] Session {session.id} connected ({len(self.sessions)} active).")
+        try:
+            await session.run()
+        except Exception as e:
+            logger.warning(f"[Server] Session {session.id} ended: {e}")
+        finally:
+            del self.sessions[session.id]
+            logger.info(f"🔌 [Server] Session {session.id} closed ({len(self.sessions)} active).")
+
+    async def serve(self, ready: asyncio.Event = None):
+        try:
+            import websockets
+        except ImportError as e:
+            raise RuntimeError("Server mode needs `pip install websockets`") from e
+
+        self.loop = asyncio.get_running_loop()
+        self.stt_slots = asyncio.Semaphore(SERVER_STT_CONCURRENCY)
+        async with websockets.serve(self.handle, self.host, self.port, max_size=2 ** 20) as ws_server:
+            self.port = next(iter(ws_server.sockets)).getsockname()[1]
+            logger.info(f"🚀 Voice assistant server on ws://{self.host}:{self.port}")
+            if ready:
+                ready.set()
+            await asyncio.Future()  # until cancelled
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless voice assistant server (WebSocket).")
+    parser.add_argument("--host", default=SERVER_HOST)
+    parser.add_argument("--port", type=int, default=SERVER_PORT)
+    parser.add_argument("--max-sessions", type=int, default=SERVER_MAX_SESSIONS)
+    args = parser.parse_args()
+    require_keys(("GROQ_API_KEY",))   # no wake word on the server
+
+    server = AssistantServer(args.host, args.port, args.max_sessions)
+    if WHISPER_PRELOAD:
+        server.resources.models.preload()
+    if LLM_PREWARM:
+        server.resources.llm.warmup()
+
+    try:
+        asyncio.run(server.serve())
+    except KeyboardInterrupt:
+        logger.info("👋 Bye!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+# src/session.py
+import itertools
+import threading
+from .config import DEBUG_WAV_PATH, CONVERSATION_HISTORY_TURNS
+from .settings import SettingsManager, Tuning
+
+
+class SharedResources:
+    """
+    The thread-safe, process-wide objects a session uses: capture engine,
+    Whisper model manager, LLM client, playback engine and TTS backends.
+
+    Anything not passed in is the usual shared default, resolved on first use
+    (so creating resources never opens the microphone or the audio device).
+    Tests and harnesses inject their own instead of patching modules.
+    """
+
+    def __init__(self, capture=None, models=None, llm=None, playback=None, tts_backends=None):
+        self._capture = capture
+        self._models = models
+        self._llm = llm
+        self._playback = playback
+        self._tts_backends = tts_backends   # name -> TTSBackend overrides
+
+    @property
+    def capture(self):
+        if self._capture is None:
+            from .capture import get_capture_engine
+            return get_capture_engine()
+        return self._capture
+
+    @property
+    def models(self):
+        if self._models is None:
+            from .stt_faster_whisper import model_manager
+            self._models = model_manager
+        return self._models
+
+    @property
+    def llm(self):
+        if self._llm is None:
+            from .http_client import get_llm_client
+            self._llm = get_llm_client()
+        return self._llm
+
+    @property
+    def playback(self):
+        if self._playback is None:
+            from .playback import get_playback_engine
+            self._playback = get_playback_engine()
+        return self._playback
+
+    def tts_backend(self, name: str = None):
+        if self._tts_backends and name in self._tts_backends:
+            return self._tts_backends[name]
+        from .tts_backends import get_tts_backend
+        return get_tts_backend(name)
+
+
+_session_ids = itertools.count(1)
+
+
+class SessionContext:
+    """
+    Everything one assistant conversation owns, carried through
+    record -> STT -> LLM -> TTS: its settings, conversation history, the
+    reply currently speaking and its file paths. Nothing in here is shared
+    with other sessions; shared objects come from `resources`.
+    """
+
+    def __init__(self, settings: SettingsManager = None, resources: SharedResources = None,
+                 accents: dict = None, max_history_turns: int = CONVERSATION_HISTORY_TURNS):
+        self.id = next(_session_ids)
+        self.settings = settings if settings is not None else SettingsManager(path=None)
+        self.resources = resources or SharedResources()
+        self.accents = accents or {}
+        self.max_history_turns = max_history_turns
+        self.history = []            # prior user/assistant messages sent with each LLM request
+        self.current_speech = None   # TTSPipeline of the reply in progress
+        self._lock = threading.Lock()
+
+    @property
+    def voice(self) -> str:
+        """The backend voice for the selected accent (gTTS tld), else the "voice" setting."""
+        return self.accents.get(self.settings.get("accent"), self.settings.get("voice", "com"))
+
+    @property
+    def tts_backend(self):
+        return self.resources.tts_backend(self.settings.get("tts_backend"))
+
+    @property
+    def debug_wav_path(self):
+        """Where to save this session's recordings, if DEBUG_WAV_PATH is set ('{session}' is replaced by the id)."""
+        return DEBUG_WAV_PATH.format(session=self.id) if DEBUG_WAV_PATH else None
+
+    def tuning(self) -> Tuning:
+        """The current tuning parameters; a turn takes one snapshot when it starts and keeps it."""
+        return self.settings.tuning()
+
+    def remember(self, user_text: str, reply: str):
+        """Adds one exchange to the history, keeping the last max_history_turns."""
+        with self._lock:
+            self.history.extend([
+                {"role": "user", "content": user_text},
+                {"role": "assistant", "content": reply},
+            ])
+            del self.history[:-2 * self.max_history_turns or len(self.history)]
+
+    def forget(self):
+        """Ends the conversation: the next request starts without history."""
+        with self._lock:
+            self.history.clear()
@@ -1,42 +1,305 @@
+import atexit
 import json
 import os
+import tempfile
+import threading
+from dataclasses import dataclass, fields, replace
 from .logger import logger
+from .config import (
+    TTS_BACKEND, SETTINGS_FILE, SETTINGS_SAVE_DELAY, SETTINGS_WATCH_INTERVAL,
+    CHUNK, SILENCE_DURATION, MAX_RECORD_SECONDS, VAD_ONSET_DB, VAD_OFFSET_DB, VAD_MIN_RMS,
+    WHISPER_MODEL_SIZE, WHISPER_COMMAND_MODEL, WHISPER_BEAM_SIZE, GROQ_MODEL, LLM_TURN_BUDGET
+)
+from .tts_backends import BACKENDS
 
-SETTINGS_FILE = "settings.json"
+# Accent names shown in the GUI -> gTTS voice (Google Translate tld)
+ACCENTS = {
+    "🇺🇸 US English": "com",
+    "🇬🇧 UK English": "co.uk",
+    "🇮🇳 Indian English": "co.in",
+    "🇦🇺 Australian English": "com.au",
+    "🇨🇦 Canadian English": "ca"
+}
 
 DEFAULT_SETTINGS = {
     "accent": "🇺🇸 US English",
-    "wake_word_enabled": True
+    "wake_word_enabled": True,
+    "tts_backend": TTS_BACKEND
 }
 
+
+@dataclass(frozen=True)
+class Tuning:
+    """
+    Performance knobs that can change while the assistant runs. The
+    controller takes one snapshot per turn (SettingsManager.tuning()), so a
+    change applies from the next turn on and never halfway through one.
+    Defaults come from config.py (env); settings.json overrides them.
+    """
+    chunk: int = CHUNK                          # samples per recorder read
+    silence_duration: float = SILENCE_DURATION  # end-of-speech hangover
+    max_record_seconds: float = MAX_RECORD_SECONDS
+    vad_onset_db: float = VAD_ONSET_DB
+    vad_offset_db: float = VAD_OFFSET_DB
+    vad_min_rms: float = VAD_MIN_RMS
+    whisper_model_size: str = WHISPER_MODEL_SIZE
+    whisper_beam_size: int = WHISPER_BEAM_SIZE
+    llm_model: str = GROQ_MODEL
+    llm_temperature: float = 0.7
+    llm_max_tokens: int = 1024
+    llm_turn_budget: float = LLM_TURN_BUDGET
+
+
+DEFAULT_TUNING = Tuning()
+
+# Type of every known setting; values are coerced to it on set() and load()
+SCHEMA = {
+    "accent": str,
+    "wake_word_enabled": bool,
+    "tts_backend": str,
+    "voice": str,
+    **{field.name: field.type for field in fields(Tuning)},
+}
+
+
+# Faster-whisper model names, plus whatever the env configures (may be local paths)
+WHISPER_MODELS = {
+    "tiny", "tiny.en", "base", "base.en", "small", "small.en", "medium", "medium.en",
+    "large-v1", "large-v2", "large-v3", "large", "large-v3-turbo", "turbo",
+    "distil-small.en", "distil-medium.en", "distil-large-v2", "distil-large-v3",
+    WHISPER_MODEL_SIZE, WHISPER_COMMAND_MODEL,
+} - {None}
+
+# Allowed values: (min, max) for numbers, a set of choices for strings. "voice" ends
+# up in the host name gTTS requests, so it may only be one of the known tlds.
+LIMITS = {
+    "tts_backend": set(BACKENDS),
+    "voice": set(ACCENTS.values()),
+    "chunk": (64, 16384),
+    "silence_duration": (0.1, 10.0),
+    "max_record_seconds": (1.0, 300.0),
+    "vad_onset_db": (0.0, 60.0),
+    "vad_offset_db": (0.0, 60.0),
+    "vad_min_rms": (0.0, 32767.0),
+    "whisper_model_size": WHISPER_MODELS,
+    "whisper_beam_size": (1, 10),
+    "llm_temperature": (0.0, 2.0),
+    "llm_max_tokens": (1, 8192),
+    "llm_turn_budget": (1.0, 300.0),
+}
+
+
+def coerce(key: str, value):
+    """
+    Converts value to the type of `key` and checks it against LIMITS
+    (unknown keys pass through). Raises ValueError if it can't or it is out of range.
+    """
+    value = _convert(key, value)
+    limits = LIMITS.get(key)
+    if isinstance(limits, tuple) and not limits[0] <= value <= limits[1]:
+        raise ValueError(f"setting '{key}' must be between {limits[0]} and {limits[1]}, got {value!r}")
+    if isinstance(limits, set) and value not in limits:
+        raise ValueError(f"setting '{key}' must be one of {', '.join(sorted(limits))}, got {value!r}")
+    return value
+
+
+def _convert(key: str, value):
+    kind = SCHEMA.get(key)
+    if kind is None or isinstance(value, kind) and not (kind is int and isinstance(value, bool)):
+        return value
+    if kind is bool:
+        if isinstance(value, str) and value.lower() in ("true", "false", "1", "0", "yes", "no", "on", "off"):
+            return value.lower() in ("true", "1", "yes", "on")
+        if isinstance(value, (int, float)):
+            return bool(value)
+    elif kind in (int, float) and not isinstance(value, bool):
+        try:
+            number = kind(value)
+        except (TypeError, ValueError):
+            pass
+        else:
+            if kind is float or float(value) == number:
+                return number
+    elif kind is str and isinstance(value, (int, float)):
+        return str(value)
+    raise ValueError(f"setting '{key}' must be {kind.__name__}, got {value!r}")
+
+
 class SettingsManager:
-    def __init__(self):
+    """
+    Settings of one assistant, persisted as JSON at `path`.
+    path=None keeps them in memory only (headless sessions, tests).
+
+    Values are typed (SCHEMA). set() notifies subscribers at once and
+    writes the file SETTINGS_SAVE_DELAY later, so a burst of changes costs
+    one write, done off the caller's thread; writes go to a temp file that
+    is renamed over settings.json, so a crash never leaves it half written.
+    Edits made to the file by hand are picked up within
+    SETTINGS_WATCH_INTERVAL and reported to subscribers like set() calls.
+    """
+
+    def __init__(self, path: str = SETTINGS_FILE, save_delay: float = SETTINGS_SAVE_DELAY,
+                 watch_interval: float = SETTINGS_WATCH_INTERVAL):
+        self.path = path
+        self.save_delay = save_delay
         self.settings = DEFAULT_SETTINGS.copy()
+        self._lock = threading.RLock()
+        self._subscribers = []          # (callback, keys or None)
+        self._save_timer = None
+        self._dirty = False
+        self._mtime = None              # of the file as last loaded or written by us
+        self._watcher_stop = threading.Event()
         self.load()
+        if self.path:
+            atexit.register(self.flush)
+            if watch_interval > 0:
+                threading.Thread(target=self._watch, args=(watch_interval,), name="settings-watch",
+                                 daemon=True).start()
 
     def load(self):
         """Load settings from JSON file."""
-        if os.path.exists(SETTINGS_FILE):
+        data = self._read()
+        if data is not None:
+            self._apply({**DEFAULT_SETTINGS, **data}, replace_all=True)
+            logger.info("✅ Settings loaded.")
+
+    def _read(self):
+        """The typed contents of the file, or None if there is none (or it can't be parsed)."""
+        if not (self.path and os.path.exists(self.path)):
+            return None
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+            with open(self.path, "r", encoding="utf-8") as f:
+                raw = json.load(f)
+        except Exception as e:
+            logger.error(f"❌ Error loading settings: {e}")
+            return None
+        self._mtime = mtime
+        data = {}
+        for key, value in raw.items():
             try:
-                with open(SETTINGS_FILE, "r") as f:
-                    data = json.load(f)
-                    self.settings.update(data)
-                logger.info("✅ Settings loaded.")
-            except Exception as e:
-                logger.error(f"❌ Error loading settings: {e}")
+                data[key] = coerce(key, value)
+            except ValueError as e:
+                logger.warning(f"⚠️ Ignoring {e}")
+        return data
 
     def save(self):
-        """Save current settings to JSON file."""
+        """Save current settings to JSON file (atomically: temp file + rename)."""
+        with self._lock:
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+                self._save_timer = None
+            self._dirty = False
+            data = dict(self.settings)
+        if not self.path:
+            return
+        tmp = None
         try:
-            with open(SETTINGS_FILE, "w") as f:
-                json.dump(self.settings, f, indent=4)
+            fd, tmp = tempfile.mkstemp(prefix=".settings-", suffix=".tmp",
+                                       dir=os.path.dirname(os.path.abspath(self.path)))
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=4, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.path)
+            tmp = None
+            self._mtime = os.stat(self.path).st_mtime_ns
             logger.info("💾 Settings saved.")
         except Exception as e:
             logger.error(f"❌ Error saving settings: {e}")
+        finally:
+            if tmp and os.path.exists(tmp):
+                os.remove(tmp)
+
+    def flush(self):
+        """Writes pending changes now (on exit, or before reading the file elsewhere)."""
+        if self._dirty:
+            self.save()
 
     def get(self, key, default=None):
+        if key not in self.settings and default is None and hasattr(DEFAULT_TUNING, key):
+            return getattr(DEFAULT_TUNING, key)
         return self.settings.get(key, default)
 
     def set(self, key, value):
-        self.settings[key] = value
-        self.save()
+        self.update({key: value})
+
+    def update(self, values: dict):
+        """Sets several values at once (one notification per changed key, one save)."""
+        typed = {key: coerce(key, value) for key, value in values.items()}
+        if self._apply(typed) and self.path:
+            self._schedule_save()
+
+    def tuning(self) -> Tuning:
+        """Snapshot of the tuning parameters (defaults for those not set)."""
+        with self._lock:
+            overrides = {f.name: self.settings[f.name] for f in fields(Tuning) if f.name in self.settings}
+        return replace(DEFAULT_TUNING, **overrides)
+
+    def subscribe(self, callback, keys=None):
+        """
+        Calls callback(key, value) after a setting changes (set/update or a
+        reload from disk), on the thread that changed it. keys limits it to
+        those settings. Returns a function that unsubscribes.
+        """
+        entry = (callback, frozenset(keys) if keys else None)
+        with self._lock:
+            self._subscribers.append(entry)
+
+        def unsubscribe():
+            with self._lock:
+                if entry in self._subscribers:
+                    self._subscribers.remove(entry)
+        return unsubscribe
+
+    def _apply(self, values: dict, replace_all: bool = False) -> list:
+        """Stores values and notifies subscribers. replace_all: keys missing from values are dropped."""
+        with self._lock:
+            changed = [key for key, value in values.items() if self.settings.get(key, _MISSING) != value]
+            if replace_all:
+                changed += [key for key in self.settings if key not in values]
+                self.settings = dict(values)
+            else:
+                self.settings.update(values)
+            subscribers = list(self._subscribers)
+        for key in changed:
+            value = self.get(key)
+            for callback, keys in subscribers:
+                if keys is None or key in keys:
+                    try:
+                        callback(key, value)
+                    except Exception as e:
+                        logger.error(f"❌ Settings subscriber failed on '{key}': {e}")
+        return changed
+
+    def _schedule_save(self):
+        with self._lock:
+            self._dirty = True
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+            self._save_timer = threading.Timer(self.save_delay, self.save)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+
+    def _watch(self, interval: float):
+        while not self._watcher_stop.wait(interval):
+            try:
+                mtime = os.stat(self.path).st_mtime_ns
+            except OSError:
+                continue
+            if mtime == self._mtime or self._dirty:
+                continue        # our own write, or ours is about to overwrite it anyway
+            data = self._read()
+            if data is None:
+                continue
+            changed = self._apply({**DEFAULT_SETTINGS, **data}, replace_all=True)
+            if changed:
+                logger.info(f"🔄 Settings reloaded from {self.path} (changed: {', '.join(changed)}).")
+
+    def close(self):
+        """Stops watching the file and writes pending changes."""
+        self._watcher_stop.set()
+        self.flush()
+
+
+_MISSING = object()
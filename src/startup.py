@@ -0,0 +1,93 @@
+# src/startup.py
+import threading
+import time
+
+# Entry points import this module first, so this is (close to) process start;
+# set before the imports below, which already cost time
+STARTED = time.monotonic()
+
+from .logger import logger
+from .metrics import tracer
+
+
+def since_start() -> float:
+    return time.monotonic() - STARTED
+
+
+class Readiness:
+    """
+    Deferred initialization: the slow components (wake word engine, Whisper
+    model, LLM connection, TTS cache) each load on their own daemon thread
+    while the UI is already up. on_change(text, color) gets a status line
+    ("⏳ Loading ...", then "Ready") every time one of them finishes.
+
+    Timings go to the tracer: startup_<name> per component and
+    time_to_ready (process start -> last component done).
+    """
+
+    def __init__(self, on_change=None):
+        self.on_change = on_change
+        self.durations = {}     # name -> seconds
+        self.errors = {}        # name -> exception
+        self.ready_at = None    # seconds since process start, once everything is done
+        self._events = {}
+        self._lock = threading.Lock()
+
+    def start(self, components: dict):
+        """components: {name: callable}. Registers them all before starting any, then returns at once."""
+        with self._lock:
+            for name in components:
+                self._events[name] = threading.Event()
+        for name, fn in components.items():
+            threading.Thread(target=self._run, args=(name, fn), name=f"init-{name}", daemon=True).start()
+        self._changed()
+
+    def _run(self, name: str, fn):
+        started = time.monotonic()
+        try:
+            fn()
+        except Exception as e:
+            self.errors[name] = e
+            logger.error(f"❌ {name} failed to initialize: {e}")
+        self.durations[name] = time.monotonic() - started
+        tracer.observe(f"startup_{name.replace(' ', '_')}", self.durations[name])
+        self._events[name].set()
+        self._changed()
+
+    @property
+    def pending(self) -> list:
+        with self._lock:
+            return [name for name, event in self._events.items() if not event.is_set()]
+
+    def wait(self, name: str = None, timeout: float = None) -> bool:
+        """Blocks until `name` (default: every component) has finished. Unknown names count as ready."""
+        with self._lock:
+            events = [self._events[name]] if name in self._events else [] if name else list(self._events.values())
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for event in events:
+            if not event.wait(None if deadline is None else max(0.0, deadline - time.monotonic())):
+                return False
+        return True
+
+    def _changed(self):
+        pending = self.pending
+        if pending:
+            self._notify(f"⏳ Loading {', '.join(pending)}...", "blue")
+            return
+        with self._lock:
+            first = self.ready_at is None
+            if first:
+                self.ready_at = since_start()
+        if first:
+            tracer.observe("time_to_ready", self.ready_at)
+            logger.info(f"🚀 Ready {self.ready_at:.2f}s after launch "
+                        f"({', '.join(f'{n} {d:.2f}s' for n, d in self.durations.items())}).")
+        if self.errors:
+            name, error = next(iter(self.errors.items()))
+            self._notify(f"⚠️ {name} unavailable: {error}", "red")
+        else:
+            self._notify("Ready", "gray")
+
+    def _notify(self, text, color):
+        if self.on_change:
+            self.on_change(text, color)
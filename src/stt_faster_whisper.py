@@ -1,34 +1,192 @@
 # src/stt_faster_whisper.py
 import os
-from faster_whisper import WhisperModel
+import threading
+import time
+import numpy as np
 from .logger import logger
-from .config import TMP_WAV_PATH
+from . import metrics
+from .config import (
+    SAMPLE_RATE, WHISPER_MODEL_SIZE, WHISPER_COMMAND_MODEL, WHISPER_COMMAND_MAX_SECONDS,
+    WHISPER_DEVICE, WHISPER_COMPUTE_TYPE, WHISPER_CPU_THREADS, WHISPER_NUM_WORKERS,
+    WHISPER_IDLE_TTL, WHISPER_BEAM_SIZE
+)
+from .settings import Tuning, DEFAULT_TUNING
+
+# faster-whisper expects mono float32 audio at this rate when given an array
+WHISPER_SAMPLE_RATE = 16000
 
-# Global model instance to avoid reloading
 # "base.en" is a good balance of speed/accuracy. "small.en" is better but slower.
 # device="cpu" and compute_type="int8" works well on most machines.
 # On Mac M1/M2, device="cpu" is often faster than "cuda" for small models unless you have specific torch setup.
-MODEL_SIZE = "base.en"
-_model = None
-
-def get_model():
-    global _model
-    if _model is None:
-        logger.info(f"[STT] Loading faster-whisper model '{MODEL_SIZE}'...")
-        # Run on CPU with INT8 quantization for speed
-        _model = WhisperModel(MODEL_SIZE, device="cpu", compute_type="int8")
-    return _model
-
-def transcribe_file(path: str = TMP_WAV_PATH) -> str:
+MODEL_SIZE = WHISPER_MODEL_SIZE
+
+
+class WhisperModelManager:
+    """
+    Owns the loaded faster-whisper models, keyed by size.
+
+    Models can be preloaded (and warmed up with a synthetic decode) on a
+    background thread at startup, several sizes can be held at once, and a
+    model that has not been used for `idle_ttl` seconds is dropped to give
+    the RAM back. get() loads on demand if a model is not resident.
+    """
+
+    def __init__(self, device: str = WHISPER_DEVICE, compute_type: str = WHISPER_COMPUTE_TYPE,
+                 cpu_threads: int = WHISPER_CPU_THREADS, num_workers: int = WHISPER_NUM_WORKERS,
+                 idle_ttl: float = WHISPER_IDLE_TTL):
+        self.device = device
+        self.compute_type = compute_type
+        self.cpu_threads = cpu_threads
+        self.num_workers = num_workers
+        self.idle_ttl = idle_ttl
+        self._models = {}       # size -> WhisperModel
+        self._last_used = {}    # size -> time.monotonic()
+        self._locks = {}        # size -> Lock, so one size is never loaded twice
+        self._lock = threading.Lock()
+        self._janitor = None
+
+    def get(self, size: str = None) -> "WhisperModel":
+        size = size or MODEL_SIZE
+        model = self._models.get(size)
+        if model is None:
+            model = self._load(size)
+        self._last_used[size] = time.monotonic()
+        return model
+
+    def is_loaded(self, size: str = None) -> bool:
+        return (size or MODEL_SIZE) in self._models
+
+    def preload(self, sizes=None, warmup: bool = True, background: bool = True):
+        """Loads (and warms up) the given sizes; defaults to the dictation and command models."""
+        if sizes is None:
+            sizes = [s for s in (MODEL_SIZE, WHISPER_COMMAND_MODEL) if s]
+
+        def _run():
+            for size in sizes:
+                try:
+                    model = self.get(size)
+                    if warmup:
+                        self._warmup(size, model)
+                except Exception as e:
+                    logger.error(f"[STT] Preload of '{size}' failed: {e}")
+
+        if background:
+            thread = threading.Thread(target=_run, name="whisper-preload", daemon=True)
+            thread.start()
+            return thread
+        _run()
+        return None
+
+    def evict_idle(self) -> list:
+        """Unloads models idle for longer than idle_ttl. Returns the evicted sizes."""
+        if not self.idle_ttl:
+            return []
+        now = time.monotonic()
+        evicted = []
+        with self._lock:
+            for size, last in list(self._last_used.items()):
+                if now - last > self.idle_ttl and size in self._models:
+                    del self._models[size]
+                    evicted.append(size)
+        for size in evicted:
+            logger.info(f"[STT] Unloaded idle model '{size}' (unused for {self.idle_ttl:.0f}s).")
+        return evicted
+
+    def _load(self, size: str) -> "WhisperModel":
+        with self._lock:
+            size_lock = self._locks.setdefault(size, threading.Lock())
+        with size_lock:
+            model = self._models.get(size)
+            if model is not None:
+                return model
+            logger.info(f"[STT] Loading faster-whisper model '{size}' "
+                        f"({self.device}/{self.compute_type}, threads={self.cpu_threads or 'auto'})...")
+            started = time.monotonic()
+            # Imported here: faster_whisper pulls in ctranslate2 and av, seconds of startup
+            from faster_whisper import WhisperModel
+            model = WhisperModel(size, device=self.device, compute_type=self.compute_type,
+                                 cpu_threads=self.cpu_threads, num_workers=self.num_workers)
+            logger.info(f"[STT] Model '{size}' loaded in {time.monotonic() - started:.1f}s.")
+            with self._lock:
+                self._models[size] = model
+                self._last_used[size] = time.monotonic()
+            self._start_janitor()
+            return model
+
+    def _warmup(self, size: str, model: "WhisperModel"):
+        """Runs one decode on low-level noise so the first real request is not the slow one."""
+        started = time.monotonic()
+        noise = np.random.default_rng(0).normal(0, 0.001, WHISPER_SAMPLE_RATE).astype(np.float32)
+        segments, _ = model.transcribe(noise, beam_size=1)
+        for _ in segments:
+            pass
+        logger.info(f"[STT] Model '{size}' warmed up in {time.monotonic() - started:.2f}s.")
+
+    def _start_janitor(self):
+        if not self.idle_ttl or self._janitor is not None:
+            return
+
+        def _run():
+            while True:
+                time.sleep(max(1.0, self.idle_ttl / 4))
+                self.evict_idle()
+
+        self._janitor = threading.Thread(target=_run, name="whisper-janitor", daemon=True)
+        self._janitor.start()
+
+
+model_manager = WhisperModelManager()
+
+def get_model(size: str = None):
+    return model_manager.get(size)
+
+def model_for_duration(seconds: float, model_size: str = None) -> str:
+    """Short utterances go to the command model (if configured), the rest to model_size (default MODEL_SIZE)."""
+    if WHISPER_COMMAND_MODEL and seconds <= WHISPER_COMMAND_MAX_SECONDS:
+        return WHISPER_COMMAND_MODEL
+    return model_size or MODEL_SIZE
+
+def transcribe_file(path: str, manager: WhisperModelManager = None) -> str:
     if not os.path.exists(path):
         return ""
 
-    model = get_model()
+    model = (manager or model_manager).get()
     
     logger.info("[STT] Transcribing (faster-whisper)...")
-    segments, info = model.transcribe(path, beam_size=5)
+    segments, info = model.transcribe(path, beam_size=WHISPER_BEAM_SIZE)
     
     # faster-whisper returns a generator, so we must iterate to get text
     text = " ".join([segment.text for segment in segments]).strip()
     
     return text
+
+def transcribe_array(audio: np.ndarray, sample_rate: int = SAMPLE_RATE,
+                     manager: WhisperModelManager = None, tuning: Tuning = None) -> str:
+    """
+    Transcribes mono float32 audio already in memory (see audio_io.record_audio).
+    Skips the WAV write/read/decode round trip of transcribe_file.
+    manager defaults to the process-wide model_manager; tuning (model size,
+    beam size) to the env values.
+    """
+    if audio is None or len(audio) == 0:
+        return ""
+
+    if sample_rate != WHISPER_SAMPLE_RATE:
+        audio = resample_linear(audio, sample_rate, WHISPER_SAMPLE_RATE)
+
+    tuning = tuning or DEFAULT_TUNING
+    size = model_for_duration(len(audio) / WHISPER_SAMPLE_RATE, tuning.whisper_model_size)
+    model = (manager or model_manager).get(size)
+
+    logger.info(f"[STT] Transcribing in-memory audio (faster-whisper '{size}')...")
+    with metrics.span("stt"):
+        segments, info = model.transcribe(audio, beam_size=tuning.whisper_beam_size)
+        text = " ".join([segment.text for segment in segments]).strip()
+
+    return text
+
+def resample_linear(audio: np.ndarray, src_rate: int, dst_rate: int) -> np.ndarray:
+    """Cheap linear-interpolation resampler for speech-band audio."""
+    n_out = int(round(len(audio) * dst_rate / src_rate))
+    positions = np.arange(n_out, dtype=np.float64) * (src_rate / dst_rate)
+    return np.interp(positions, np.arange(len(audio)), audio).astype(np.float32)
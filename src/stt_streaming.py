@@ -0,0 +1,164 @@
+# src/stt_streaming.py
+import threading
+import numpy as np
+from .logger import logger
+from . import metrics
+from .config import SAMPLE_RATE, STREAMING_STT_STEP, STREAMING_STT_MAX_WINDOW
+from .settings import Tuning, DEFAULT_TUNING
+from .stt_faster_whisper import model_manager, resample_linear, WHISPER_SAMPLE_RATE
+
+
+def _norm(word: str) -> str:
+    return word.strip().lower().strip(".,!?;:\"'")
+
+
+class StreamingTranscriber:
+    """
+    Incremental transcription of a growing recording.
+
+    While the user is speaking, a worker thread re-decodes the unconfirmed
+    tail of the buffer every `step` seconds of new audio. Words that two
+    consecutive hypotheses agree on (local agreement) are committed and the
+    decode window is moved past them, so windows overlap only over the
+    unconfirmed part; if nothing agrees for `max_window` seconds the current
+    guess is committed anyway (or, if it has no words, that audio dropped).
+    After end of speech, finish() only has to decode that remaining tail,
+    whatever the length of the utterance.
+
+    on_partial(text) is called from the worker thread with committed text
+    followed by the current unconfirmed guess. `manager` is the Whisper
+    model manager to decode with (the shared one by default); `tuning`
+    gives the model size, final beam size and longest recording.
+    """
+
+    def __init__(self, on_partial=None, sample_rate: int = SAMPLE_RATE,
+                 step: float = STREAMING_STT_STEP, max_window: float = STREAMING_STT_MAX_WINDOW,
+                 partial_beam_size: int = 1, final_beam_size: int = None, manager=None,
+                 tuning: Tuning = None):
+        tuning = tuning or DEFAULT_TUNING
+        self.on_partial = on_partial
+        self.manager = manager or model_manager
+        self.model_size = tuning.whisper_model_size
+        self.sample_rate = sample_rate
+        self.step_samples = int(step * sample_rate)
+        self.max_window_samples = int(max_window * sample_rate)
+        self.partial_beam_size = partial_beam_size
+        self.final_beam_size = final_beam_size or tuning.whisper_beam_size
+
+        self._audio = np.empty(int(tuning.max_record_seconds * sample_rate) + sample_rate, dtype=np.float32)
+        self._n = 0
+        self._window_start = 0        # buffer index where the next decode starts
+        self._committed = []          # confirmed words
+        self._committed_end = 0       # buffer index where the last confirmed word ends
+        self._previous = []           # last hypothesis, as (word, start_idx, end_idx)
+        self._decoded_upto = 0
+
+        self._cond = threading.Condition()
+        self._finished = False
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+
+    # --- producer side (recorder thread) ---
+
+    def feed(self, pcm16: np.ndarray):
+        """Appends a chunk of int16 audio. Never blocks on decoding."""
+        with self._cond:
+            n = min(len(pcm16), len(self._audio) - self._n)
+            np.multiply(pcm16[:n], np.float32(1.0 / 32768.0), out=self._audio[self._n:self._n + n])
+            self._n += n
+            if self._n - self._decoded_upto >= self.step_samples:
+                self._cond.notify()
+
+    def finish(self) -> str:
+        """Stops the partial decodes and decodes the unconfirmed tail. Returns the full text."""
+        self._stop_worker()
+        with metrics.span("stt"):
+            words = self._decode(self._window_start, self._n, self.final_beam_size)
+        tail = [w for w, start, _ in words if start >= self._committed_end]
+        text = " ".join(self._committed + tail).strip()
+        logger.info(f"[STT] Streaming final: {len(self._committed)} words committed early, {len(tail)} in tail.")
+        return text
+
+    def cancel(self):
+        """Discards the recording without a final decode."""
+        self._stop_worker()
+
+    def _stop_worker(self):
+        with self._cond:
+            self._finished = True
+            self._cond.notify()
+        self._worker.join()
+
+    # --- worker thread ---
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(
+                    lambda: self._finished or self._n - self._decoded_upto >= self.step_samples
+                )
+                if self._finished:
+                    return
+                end = self._n
+            try:
+                self._partial_pass(end)
+            except Exception as e:
+                logger.error(f"[STT] Streaming decode error: {e}")
+                with self._cond:
+                    self._decoded_upto = end
+
+    def _partial_pass(self, end: int):
+        words = self._decode(self._window_start, end, self.partial_beam_size)
+        words = [w for w in words if w[1] >= self._committed_end]
+
+        # Commit the longest prefix this hypothesis shares with the previous one
+        agreed = 0
+        for new, old in zip(words, self._previous):
+            if _norm(new[0]) != _norm(old[0]):
+                break
+            agreed += 1
+        # If nothing has agreed for max_window seconds, accept all but the last
+        # guessed word (that one too if it is the only one) so the window (and
+        # the final decode) stays bounded; with no words at all, drop the audio
+        if not agreed and end - self._window_start > self.max_window_samples:
+            if words:
+                agreed = max(1, len(words) - 1)
+            else:
+                self._window_start = self._committed_end = end - self.step_samples
+        if agreed:
+            self._committed.extend(w for w, _, _ in words[:agreed])
+            self._committed_end = words[agreed - 1][2]
+            # Next window starts at the confirmed word boundary
+            self._window_start = self._committed_end
+        self._previous = words[agreed:]
+
+        with self._cond:
+            self._decoded_upto = end
+
+        if self.on_partial:
+            self.on_partial(" ".join(self._committed + [w for w, _, _ in self._previous]).strip())
+
+    def _decode(self, start: int, end: int, beam_size: int) -> list:
+        """Returns [(word, start_idx, end_idx)] with indices into the buffer."""
+        if end - start < self.sample_rate // 10:
+            return []
+        audio = self._audio[start:end]
+        if self.sample_rate != WHISPER_SAMPLE_RATE:
+            audio = resample_linear(audio, self.sample_rate, WHISPER_SAMPLE_RATE)
+
+        segments, _ = self.manager.get(self.model_size).transcribe(
+            audio,
+            beam_size=beam_size,
+            word_timestamps=True,
+            condition_on_previous_text=False,
+            initial_prompt=" ".join(self._committed[-30:]) or None,
+        )
+        words = []
+        for segment in segments:
+            for w in segment.words or []:
+                words.append((
+                    w.word.strip(),
+                    start + int(w.start * self.sample_rate),
+                    start + int(w.end * self.sample_rate),
+                ))
+        return [w for w in words if w[0]]
@@ -0,0 +1,80 @@
+# src/text_utils.py
+import re
+
+# A sentence ends at . ! or ? (optionally followed by quotes/brackets) and whitespace
+_SENTENCE_END = re.compile(r"""[.!?]+["')\]]*\s+""")
+# Words whose trailing period does not end a sentence
+_ABBREVIATIONS = {"e.g.", "i.e.", "etc.", "vs.", "mr.", "mrs.", "ms.", "dr.", "st.", "no."}
+# Clause boundaries used to break up long sentences
+_CLAUSE_SPLIT = re.compile(r"(?<=[,;:–—])\s+")
+
+
+def split_sentences(buffer: str):
+    """
+    Splits complete sentences off the front of buffer.
+    Returns (sentences, rest) where rest is the unfinished tail.
+    """
+    sentences = []
+    start = 0
+    for match in _SENTENCE_END.finditer(buffer):
+        candidate = buffer[start:match.end()].strip()
+        words = candidate.lower().split()
+        last_word = words[-1] if words else ""
+        # Abbreviations and list markers ("Steps: 1. ...") do not end a sentence
+        if last_word in _ABBREVIATIONS:
+            continue
+        if last_word.rstrip(".").isdigit() and (len(words) == 1 or words[-2].endswith(":")):
+            continue
+        if candidate:
+            sentences.append(candidate)
+        start = match.end()
+    return sentences, buffer[start:]
+
+
+def split_clauses(sentence: str, max_chars: int) -> list:
+    """Breaks a sentence longer than max_chars at clause punctuation (or spaces as a last resort)."""
+    if len(sentence) <= max_chars:
+        return [sentence]
+    chunks, current = [], ""
+    for piece in _CLAUSE_SPLIT.split(sentence):
+        if current and len(current) + 1 + len(piece) > max_chars:
+            chunks.append(current)
+            current = piece
+        else:
+            current = f"{current} {piece}".strip()
+    if current:
+        chunks.append(current)
+    # Pieces that are still too long (no punctuation) are split on word boundaries
+    result = []
+    for chunk in chunks:
+        while len(chunk) > max_chars:
+            cut = chunk.rfind(" ", 0, max_chars)
+            if cut <= 0:
+                cut = max_chars
+            result.append(chunk[:cut].strip())
+            chunk = chunk[cut:].strip()
+        if chunk:
+            result.append(chunk)
+    return result
+
+
+def split_chunks(text: str, max_chars: int = 200, first_max_chars: int = None) -> list:
+    """
+    Splits text into speakable chunks: whole sentences, with long sentences
+    broken at clauses. The first chunk can be held shorter so that it is
+    synthesized (and starts playing) sooner.
+    """
+    sentences, rest = split_sentences(text + " ")
+    if rest.strip():
+        sentences.append(rest.strip())
+    chunks = []
+    for sentence in sentences:
+        limit = first_max_chars if (first_max_chars and not chunks) else max_chars
+        pieces = split_clauses(sentence, limit)
+        if len(pieces) > 1 and limit != max_chars:
+            # Only the very first piece needs to be short
+            chunks.append(pieces[0])
+            chunks.extend(split_clauses(" ".join(pieces[1:]), max_chars))
+        else:
+            chunks.extend(pieces)
+    return chunks
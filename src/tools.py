@@ -1,6 +1,13 @@
+import ast
 import datetime
+import time
 import webbrowser
 import json
+import math
+import operator
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from .logger import logger
+from .config import TOOL_TIMEOUT, TOOL_MAX_WORKERS
 
 def get_current_time():
     """Returns the current time in a readable format."""
@@ -19,14 +26,63 @@ def open_website(url: str):
     webbrowser.open(url)
     return f"Opened {url}"
 
+# Largest result calculate() will produce, in decimal digits. The check runs
+# before each power/multiplication: such a computation holds the GIL, so no
+# timeout could stop it once started.
+MAX_RESULT_DIGITS = 1000
+
+_BINARY_OPS = {
+    ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul, ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv, ast.Mod: operator.mod, ast.Pow: operator.pow,
+}
+_UNARY_OPS = {ast.UAdd: operator.pos, ast.USub: operator.neg}
+_FUNCTIONS = {"abs": abs, "round": round, "min": min, "max": max}
+
+
+def _digits(value) -> float:
+    """log10 of the magnitude (0 for values between -1 and 1)."""
+    magnitude = abs(value)
+    return math.log10(magnitude) if magnitude > 1 else 0.0
+
+
+def _check_size(op, left, right):
+    if isinstance(op, ast.Pow):
+        digits = _digits(left) * right if isinstance(right, (int, float)) and right > 0 else 0.0
+    elif isinstance(op, ast.Mult):
+        digits = _digits(left) + _digits(right)
+    else:
+        return
+    if digits > MAX_RESULT_DIGITS:
+        raise ValueError(f"result would have more than {MAX_RESULT_DIGITS} digits")
+
+
+def _evaluate(node):
+    """Evaluates a parsed arithmetic expression: numbers, + - * / // % **, abs/round/min/max."""
+    if isinstance(node, ast.Expression):
+        return _evaluate(node.body)
+    if isinstance(node, ast.Constant):
+        if isinstance(node.value, (int, float)) and not isinstance(node.value, bool):
+            return node.value
+        raise ValueError(f"unsupported constant {node.value!r}")
+    if isinstance(node, ast.BinOp) and type(node.op) in _BINARY_OPS:
+        left, right = _evaluate(node.left), _evaluate(node.right)
+        _check_size(node.op, left, right)
+        return _BINARY_OPS[type(node.op)](left, right)
+    if isinstance(node, ast.UnaryOp) and type(node.op) in _UNARY_OPS:
+        return _UNARY_OPS[type(node.op)](_evaluate(node.operand))
+    if (isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id in _FUNCTIONS
+            and not node.keywords):
+        args = [_evaluate(arg) for arg in node.args]
+        if node.func.id == "round" and len(args) > 1 and abs(args[1]) > MAX_RESULT_DIGITS:
+            raise ValueError("too many digits to round to")
+        return _FUNCTIONS[node.func.id](*args)
+    raise ValueError(f"unsupported expression: {ast.dump(node)[:40]}")
+
+
 def calculate(expression: str):
-    """Evaluates a mathematical expression."""
+    """Evaluates a mathematical expression (arithmetic only, no eval())."""
     try:
-        # Safe evaluation using eval() with limited scope is still risky, 
-        # but acceptable for a local personal assistant. 
-        # For better security, use a parser library, but eval is simple for now.
-        allowed_names = {"abs": abs, "round": round, "min": min, "max": max}
-        result = eval(expression, {"__builtins__": None}, allowed_names)
+        result = _evaluate(ast.parse(expression, mode="eval"))
         return str(result)
     except Exception as e:
         return f"Error calculating: {e}"
@@ -99,3 +155,78 @@ AVAILABLE_TOOLS = {
     "open_website": open_website,
     "calculate": calculate,
 }
+
+# Tools that act on the machine the assistant runs on. Server sessions belong
+# to remote clients, so they only get REMOTE_TOOLS.
+LOCAL_ONLY_TOOLS = frozenset({"open_website"})
+REMOTE_TOOLS = frozenset(AVAILABLE_TOOLS) - LOCAL_ONLY_TOOLS
+
+def tools_schema(allowed=None) -> list:
+    """TOOLS_SCHEMA limited to the `allowed` tool names (all of them if None)."""
+    if allowed is None:
+        return TOOLS_SCHEMA
+    return [tool for tool in TOOLS_SCHEMA if tool["function"]["name"] in allowed]
+
+# Per-tool time limits in seconds (TOOL_TIMEOUT for anything not listed)
+TOOL_TIMEOUTS = {
+    "get_current_time": 1.0,
+    "get_current_date": 1.0,
+    "open_website": 5.0,
+    "calculate": 2.0,
+}
+
+def make_tool_call(name: str, argument: str = None) -> dict:
+    """
+    A tool call in the model's format, for invoking a tool directly
+    (e.g. from a keyword). `argument` fills the tool's first parameter.
+    """
+    arguments = {}
+    if argument:
+        for tool in TOOLS_SCHEMA:
+            if tool["function"]["name"] == name:
+                parameters = list(tool["function"]["parameters"]["properties"])
+                if parameters:
+                    arguments[parameters[0]] = argument
+    return {"id": f"keyword_{name}", "type": "function",
+            "function": {"name": name, "arguments": json.dumps(arguments)}}
+
+# Bounded pool shared by every turn; a hung tool can only ever tie up one worker
+_executor = ThreadPoolExecutor(max_workers=TOOL_MAX_WORKERS, thread_name_prefix="tool")
+
+def _call_tool(name: str, arguments: str, allowed=None):
+    function_to_call = AVAILABLE_TOOLS.get(name)
+    if not function_to_call or allowed is not None and name not in allowed:
+        return f"Error: Tool {name} not found."
+    try:
+        return function_to_call(**json.loads(arguments or "{}"))
+    except Exception as e:
+        return f"Error executing {name}: {e}"
+
+def execute_tool_calls(tool_calls: list, allowed=None) -> list:
+    """
+    Runs the tool calls of one model response concurrently (only the
+    `allowed` tool names, if given; others get a "not found" result).
+    Returns one result string per call, in the same order. A tool that
+    exceeds its timeout gets a structured JSON error result instead, so the
+    whole batch takes as long as the slowest (bounded) tool.
+    """
+    started = time.monotonic()
+    futures = []
+    for tool_call in tool_calls:
+        name = tool_call['function']['name']
+        arguments = tool_call['function']['arguments']
+        logger.info(f"[Tools] Executing tool: {name} with {arguments}")
+        futures.append((name, _executor.submit(_call_tool, name, arguments, allowed)))
+
+    results = []
+    for name, future in futures:
+        # Every tool's clock started at submission, not when we got to it
+        timeout = TOOL_TIMEOUTS.get(name, TOOL_TIMEOUT)
+        try:
+            remaining = max(0.0, started + timeout - time.monotonic())
+            results.append(str(future.result(timeout=remaining)))
+        except FutureTimeoutError:
+            logger.warning(f"[Tools] {name} timed out after {timeout}s")
+            future.cancel()
+            results.append(json.dumps({"error": "timeout", "tool": name, "timeout_seconds": timeout}))
+    return results
@@ -0,0 +1,137 @@
+# src/tts_backends.py
+import threading
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+import numpy as np
+from .logger import logger
+from .config import TTS_BACKEND, PIPER_VOICE
+from .playback import decode_audio
+from . import tts_gtts
+
+
+@dataclass(frozen=True)
+class TTSCapabilities:
+    """What a backend can do, so callers can choose behaviour without isinstance checks."""
+    name: str
+    offline: bool            # Needs no network at synthesis time
+    streaming: bool          # stream() yields audio before the whole text is synthesized
+    accents: bool            # Honours the gTTS-style accent (tld) passed as `voice`
+    sample_rate: int = None  # Fixed output rate, or None if it depends on the voice
+
+
+class TTSBackend(ABC):
+    """
+    Text-to-speech backend interface.
+
+    synthesize(text, voice) -> (int16 mono PCM ndarray, sample_rate)
+    stream(text, voice)     -> iterator of (pcm, sample_rate) pieces
+
+    `voice` is backend-specific (the gTTS accent tld; ignored by backends
+    that do not support accents). The default stream() yields one piece.
+    """
+    capabilities = TTSCapabilities(name="base", offline=True, streaming=False, accents=False)
+
+    @property
+    def name(self) -> str:
+        return self.capabilities.name
+
+    @abstractmethod
+    def synthesize(self, text: str, voice: str = None):
+        """Returns (int16 mono PCM ndarray, sample_rate) for the whole text."""
+
+    def stream(self, text: str, voice: str = None):
+        yield self.synthesize(text, voice)
+
+
+class GTTSBackend(TTSBackend):
+    """Google Translate TTS: online, MP3 cached on disk and decoded in memory."""
+    capabilities = TTSCapabilities(name="gtts", offline=False, streaming=False, accents=True, sample_rate=24000)
+
+    def synthesize(self, text: str, voice: str = None):
+        return decode_audio(tts_gtts.synthesize(text, tld=voice or 'com'))
+
+
+class PiperBackend(TTSBackend):
+    """
+    Piper neural TTS (pip install piper-tts): fully offline and in-process,
+    with an .onnx voice model from PIPER_VOICE. Synthesizes sentence by
+    sentence, so stream() yields audio before the whole text is done.
+    """
+
+    def __init__(self, model_path: str = PIPER_VOICE):
+        try:
+            from piper import PiperVoice
+        except ImportError as e:
+            raise RuntimeError("Piper backend needs `pip install piper-tts`") from e
+        if not model_path:
+            raise RuntimeError("Piper backend needs PIPER_VOICE set to an .onnx voice model")
+        self._voice = PiperVoice.load(model_path)
+        self._lock = threading.Lock()  # one ONNX session, one synthesis at a time
+        self.sample_rate = self._voice.config.sample_rate
+        self.capabilities = TTSCapabilities(name="piper", offline=True, streaming=True, accents=False,
+                                            sample_rate=self.sample_rate)
+        logger.info(f"✅ [TTS] Piper voice loaded: {model_path}")
+
+    def synthesize(self, text: str, voice: str = None):
+        pieces = [pcm for pcm, _ in self.stream(text, voice)]
+        pcm = np.concatenate(pieces) if pieces else np.zeros(0, dtype=np.int16)
+        return pcm, self.sample_rate
+
+    def stream(self, text: str, voice: str = None):
+        with self._lock:
+            if hasattr(self._voice, "synthesize_stream_raw"):
+                # piper-tts < 1.3: raw int16 bytes per sentence
+                for raw in self._voice.synthesize_stream_raw(text):
+                    yield np.frombuffer(raw, dtype=np.int16), self.sample_rate
+            else:
+                # piper-tts >= 1.3: AudioChunk objects per sentence
+                for chunk in self._voice.synthesize(text):
+                    yield chunk.audio_int16_array, chunk.sample_rate
+
+
+class SilentBackend(TTSBackend):
+    """
+    Offline stand-in that returns silence as long as the text would take to
+    say (~15 chars/s). No network, no model: for CI, load tests and
+    headless runs where audio content does not matter.
+    """
+    capabilities = TTSCapabilities(name="silent", offline=True, streaming=False, accents=False, sample_rate=16000)
+    CHARS_PER_SECOND = 15
+
+    def synthesize(self, text: str, voice: str = None):
+        rate = self.capabilities.sample_rate
+        return np.zeros(int(len(text) / self.CHARS_PER_SECOND * rate), dtype=np.int16), rate
+
+
+BACKENDS = {
+    "gtts": GTTSBackend,
+    "piper": PiperBackend,
+    "silent": SilentBackend,
+}
+
+_backends = {}
+_backends_lock = threading.Lock()
+
+def get_tts_backend(name: str = None) -> TTSBackend:
+    """
+    Returns the shared instance of the named backend (TTS_BACKEND by default).
+    An unknown or unavailable backend logs a warning and falls back to gTTS.
+    Only names in BACKENDS are cached, so unknown names cannot grow the cache.
+    """
+    name = name or TTS_BACKEND
+    with _backends_lock:
+        if name not in _backends:
+            if name not in BACKENDS:
+                logger.warning(f"⚠️ [TTS] Unknown backend '{name}', using gtts.")
+                return _gtts_fallback()
+            try:
+                _backends[name] = BACKENDS[name]()
+            except Exception as e:
+                logger.warning(f"⚠️ [TTS] Backend '{name}' unavailable ({e}), using gtts.")
+                _backends[name] = _gtts_fallback()
+        return _backends[name]
+
+def _gtts_fallback() -> TTSBackend:
+    if "gtts" not in _backends:
+        _backends["gtts"] = GTTSBackend()
+    return _backends["gtts"]
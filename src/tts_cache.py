@@ -0,0 +1,147 @@
+# src/tts_cache.py
+import hashlib
+import os
+import re
+import tempfile
+import threading
+from collections import OrderedDict
+from .logger import logger
+from .config import TTS_CACHE_DIR, TTS_CACHE_MAX_MB
+
+
+def normalize_text(text: str) -> str:
+    """Case and whitespace differences do not change the audio enough to matter."""
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+
+def cache_key(text: str, lang: str, tld: str, backend: str) -> str:
+    raw = "\0".join((backend, lang, tld, normalize_text(text)))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class TTSCache:
+    """
+    Content-addressed on-disk cache of synthesized audio.
+
+    Files are named by the hash of (normalized text, lang, tld, backend).
+    The LRU order lives in memory and is persisted through file mtimes
+    (touched on every hit), so the index is rebuilt from a directory scan at
+    startup and never has to be written separately. Entries are written to a
+    temp file and renamed into place, so a crash never leaves a partial file
+    under a valid key.
+    """
+
+    def __init__(self, directory: str = TTS_CACHE_DIR, max_bytes: int = int(TTS_CACHE_MAX_MB * 1024 * 1024),
+                 extension: str = ".mp3"):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.extension = extension
+        self._lock = threading.Lock()
+        self._index = OrderedDict()   # key -> size, least recently used first
+        self._total = 0
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+        self._scan()
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.directory, key + self.extension)
+
+    def get(self, text: str, lang: str = "en", tld: str = "com", backend: str = "gtts"):
+        """Returns the path of the cached audio, or None."""
+        key = cache_key(text, lang, tld, backend)
+        path = self.path_for(key)
+        with self._lock:
+            if key not in self._index or not os.path.exists(path):
+                self._forget(key)
+                self.misses += 1
+                return None
+            self._index.move_to_end(key)
+            self.hits += 1
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return path
+
+    def put(self, text: str, data: bytes, lang: str = "en", tld: str = "com", backend: str = "gtts") -> str:
+        """Stores audio bytes atomically and returns the cached path."""
+        key = cache_key(text, lang, tld, backend)
+        path = self.path_for(key)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        with self._lock:
+            self._forget(key)
+            self._index[key] = len(data)
+            self._total += len(data)
+            self._evict()
+        return path
+
+    def get_or_create(self, text: str, synthesize, lang: str = "en", tld: str = "com", backend: str = "gtts") -> str:
+        """Returns the cached path, calling synthesize() -> bytes on a miss."""
+        path = self.get(text, lang, tld, backend)
+        if path:
+            return path
+        return self.put(text, synthesize(), lang, tld, backend)
+
+    def prewarm(self, phrases, synthesize, lang: str = "en", tld: str = "com", backend: str = "gtts",
+                background: bool = True):
+        """Synthesizes any of `phrases` not yet cached. synthesize(text) -> bytes."""
+        def _run():
+            created = 0
+            for phrase in phrases:
+                try:
+                    if not self.get(phrase, lang, tld, backend):
+                        self.put(phrase, synthesize(phrase), lang, tld, backend)
+                        created += 1
+                except Exception as e:
+                    logger.warning(f"[TTS] Cache prewarm failed for '{phrase}': {e}")
+            logger.info(f"[TTS] Cache prewarmed ({created} new of {len(phrases)} phrases).")
+
+        if background:
+            threading.Thread(target=_run, name="tts-prewarm", daemon=True).start()
+        else:
+            _run()
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total
+
+    def _scan(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name.endswith(".tmp"):
+                # Leftover from an interrupted write
+                os.remove(path)
+                continue
+            if not name.endswith(self.extension):
+                continue
+            stat = os.stat(path)
+            entries.append((stat.st_mtime, name[:-len(self.extension)], stat.st_size))
+        for _, key, size in sorted(entries):
+            self._index[key] = size
+            self._total += size
+        with self._lock:
+            self._evict()
+
+    def _forget(self, key: str):
+        size = self._index.pop(key, None)
+        if size is not None:
+            self._total -= size
+
+    def _evict(self):
+        while self._total > self.max_bytes and len(self._index) > 1:
+            key, size = self._index.popitem(last=False)
+            self._total -= size
+            try:
+                os.remove(self.path_for(key))
+            except OSError:
+                pass
@@ -1,8 +1,31 @@
 # src/tts_gtts.py
-import os
-import subprocess
-from gtts import gTTS
+import io
+import threading
 from .logger import logger
+from . import metrics
+from .tts_cache import TTSCache
+from .playback import get_playback_engine
+
+BACKEND = "gtts"
+
+# Replies that recur often enough to be worth synthesizing ahead of time
+PREWARM_PHRASES = [
+    "Sorry, I couldn’t reach Groq right now.",
+    "Sorry, that took too long. Please try again.",
+    "Sorry, I encountered an error processing the tool result.",
+    "Hello! How can I help?",
+    "You're welcome!",
+]
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_tts_cache() -> TTSCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = TTSCache()
+    return _cache
 
 def preprocess_text(text: str) -> str:
     """Expands common abbreviations for better speech."""
@@ -16,27 +39,42 @@ def preprocess_text(text: str) -> str:
         text = text.replace(abbr, full)
     return text
 
+def synthesize_bytes(text: str, tld: str = 'com') -> bytes:
+    """Generates MP3 bytes for text with gTTS (network round trip)."""
+    from gtts import gTTS
+    fp = io.BytesIO()
+    with metrics.span("tts_fetch"):
+        gTTS(text=preprocess_text(text), lang='en', tld=tld).write_to_fp(fp)
+    return fp.getvalue()
+
+def synthesize(text: str, tld: str = 'com') -> str:
+    """Returns the path of an MP3 for text: cached if seen before, else synthesized and cached."""
+    return get_tts_cache().get_or_create(
+        text, lambda: synthesize_bytes(text, tld), lang='en', tld=tld, backend=BACKEND
+    )
+
+def prewarm_cache(tld: str = 'com', phrases=None, background: bool = True):
+    """Synthesizes common phrases in the background so they play with no network hop."""
+    get_tts_cache().prewarm(phrases or PREWARM_PHRASES, lambda text: synthesize_bytes(text, tld),
+                            lang='en', tld=tld, backend=BACKEND, background=background)
+
+def play(filename: str):
+    """Plays an MP3 through the in-process playback engine. Non-blocking: returns a handle that can be terminated."""
+    return get_playback_engine().play_file(filename)
+
 def speak(text: str, tld: str = 'com'):
     """
-    Converts text to speech using Google Translate TTS and plays it via afplay (macOS).
+    Converts text to speech using Google Translate TTS and plays it.
     tld: Top-Level Domain for accent (e.g., 'com' for US, 'co.uk' for UK, 'co.in' for India).
     """
     try:
-        # 0. Preprocess text
-        text = preprocess_text(text)
-
         # 1. Generate MP3
-        tts = gTTS(text=text, lang='en', tld=tld)
-        filename = "tmp_output.mp3"
-        tts.save(filename)
+        filename = synthesize(text, tld=tld)
 
-        # 2. Play MP3 (macOS specific) - Non-blocking
-        # We use Popen so we can kill it later if needed
-        process = subprocess.Popen(["afplay", filename])
-        return process
+        # 2. Decode and play in-process - Non-blocking
+        # The returned handle can be terminated to stop mid-sentence
+        return play(filename)
 
     except Exception as e:
         logger.error(f"[TTS] gTTS error: {e}")
-        # Fallback to say (blocking for now, or could be Popen too)
-        subprocess.run(["say", text], check=False)
         return None
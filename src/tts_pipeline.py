@@ -0,0 +1,186 @@
+# src/tts_pipeline.py
+import contextvars
+import queue
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, CancelledError
+from .logger import logger
+from . import metrics
+from .config import TTS_WORKERS, TTS_CHUNK_CHARS, TTS_FIRST_CHUNK_CHARS
+from .text_utils import split_chunks
+from .playback import get_playback_engine
+from .tts_backends import get_tts_backend
+
+
+class TTSPipeline:
+    """
+    Speaks text as a pipeline of small chunks.
+
+    Text passed to put() is split into sentence/clause chunks, and every
+    chunk is submitted to a small synthesis pool right away, so later chunks
+    are prefetched while earlier ones play. A player thread plays the
+    results strictly in submission order, starting as soon as chunk 1 is
+    ready. stop() cancels every pending synthesis and the current playback.
+
+    backend is a TTSBackend (the TTS_BACKEND default if None) and voice is
+    passed through to it (the accent tld for gTTS). If the backend can
+    stream (capabilities.streaming, e.g. Piper), each chunk is played piece
+    by piece as backend.stream() yields it instead of after the whole chunk.
+    Audio goes to the shared playback engine unless another one is given.
+
+    The pipeline reports into the metrics turn that was current when it was
+    created (synthesis time, first audio) and finishes that turn when the
+    reply has played out or was stopped.
+    """
+
+    def __init__(self, voice: str = 'com', backend=None, engine=None, workers: int = TTS_WORKERS,
+                 chunk_chars: int = TTS_CHUNK_CHARS, first_chunk_chars: int = TTS_FIRST_CHUNK_CHARS):
+        self.voice = voice
+        self.backend = backend or get_tts_backend()
+        self.streaming = self.backend.capabilities.streaming
+        self.engine = engine or get_playback_engine()
+        self.chunk_chars = chunk_chars
+        self.first_chunk_chars = first_chunk_chars
+
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="tts")
+        self._pending = deque()           # futures in playback order
+        self._cond = threading.Condition()
+        self._closed = False
+        self._chunks_submitted = 0
+        self._process = None
+        self._stopped = threading.Event()
+        self._lock = threading.Lock()     # orders stop() against starting playback
+        self.turn = metrics.current_turn()
+        # Worker threads do not inherit context vars; carry the current turn along
+        self._player = threading.Thread(target=contextvars.copy_context().run, args=(self._run,), daemon=True)
+        self._player.start()
+
+    def put(self, text: str):
+        """Queues text (a sentence or a whole reply) for synthesis and playback."""
+        if self._stopped.is_set():
+            return
+        first_max = self.first_chunk_chars if self._chunks_submitted == 0 else None
+        for chunk in split_chunks(text, self.chunk_chars, first_max):
+            pieces = queue.Queue() if self.streaming else None
+            try:
+                future = self._executor.submit(contextvars.copy_context().run, self._synthesize, chunk, pieces)
+            except RuntimeError:
+                return  # stopped meanwhile, executor already shut down
+            with self._cond:
+                self._pending.append((chunk, future, pieces))
+                self._chunks_submitted += 1
+                self._cond.notify()
+
+    def close(self):
+        """Marks the end of the reply; the pipeline plays what it has and exits."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+
+    @property
+    def started(self) -> bool:
+        """True once the first chunk has started playing."""
+        return self._process is not None
+
+    @property
+    def is_active(self) -> bool:
+        """True while anything is playing or still waiting to be spoken."""
+        if self._stopped.is_set():
+            return False
+        playing = self._process is not None and self._process.poll() is None
+        return playing or self._player.is_alive()
+
+    def stop(self) -> bool:
+        """Stops playback and cancels every pending synthesis. Returns True if anything was cut off."""
+        was_active = self.is_active
+        with self._lock:
+            self._stopped.set()
+            process = self._process
+        with self._cond:
+            cancelled = 0
+            while self._pending:
+                _, future, _ = self._pending.popleft()
+                cancelled += future.cancel()
+            self._cond.notify()
+        self._executor.shutdown(wait=False)
+        if process and process.poll() is None:
+            try:
+                process.terminate()
+                process.wait(timeout=0.5)
+            except Exception as e:
+                logger.error(f"[TTS] Error killing playback: {e}")
+        if cancelled:
+            logger.info(f"[TTS] Cancelled {cancelled} pending chunk(s).")
+        return was_active
+
+    def wait(self, timeout: float = None):
+        self._player.join(timeout)
+
+    def _synthesize(self, chunk: str, pieces: queue.Queue = None):
+        """Synthesizes a chunk; with `pieces`, streams it there piece by piece (None at the end)."""
+        with metrics.span("tts_synth"):
+            if pieces is None:
+                return self.backend.synthesize(chunk, self.voice)
+            try:
+                for piece in self.backend.stream(chunk, self.voice):
+                    if self._stopped.is_set():
+                        break
+                    pieces.put(piece)
+            finally:
+                pieces.put(None)
+
+    def _audio(self, future, pieces):
+        """Yields the (pcm, sample_rate) pieces of one chunk as they become ready."""
+        if pieces is None:
+            yield future.result()
+            return
+        while True:
+            try:
+                piece = pieces.get(timeout=0.05)
+            except queue.Empty:
+                if future.cancelled():
+                    raise CancelledError()
+                if self._stopped.is_set():
+                    return
+                continue
+            if piece is None:
+                future.result()     # raises the synthesis error, if there was one
+                return
+            yield piece
+
+    def _run(self):
+        try:
+            while True:
+                with self._cond:
+                    self._cond.wait_for(lambda: self._pending or self._closed or self._stopped.is_set())
+                    if self._stopped.is_set() or not self._pending:
+                        break
+                    chunk, future, pieces = self._pending.popleft()
+                try:
+                    for pcm, sample_rate in self._audio(future, pieces):
+                        # Wait for the previous chunk (or piece) before starting this one
+                        self._wait_playback()
+                        with self._lock:
+                            if self._stopped.is_set():
+                                break
+                            self._process = self.engine.play(pcm, sample_rate)
+                        metrics.mark("first_audio")
+                except CancelledError:
+                    break
+                except Exception as e:
+                    logger.error(f"[TTS] Synthesis failed for '{chunk[:40]}': {e}")
+                    continue
+                if self._stopped.is_set():
+                    break
+            self._wait_playback()
+        finally:
+            self._executor.shutdown(wait=False)
+            if self.turn:
+                if not self._stopped.is_set():
+                    self.turn.mark("playback_end")
+                self.turn.finish("interrupted" if self._stopped.is_set() else "ok")
+
+    def _wait_playback(self):
+        while self._process is not None and self._process.poll() is None:
+            if self._stopped.wait(0.02):
+                return
@@ -0,0 +1,181 @@
+# src/vad.py
+import numpy as np
+from .config import (
+    SAMPLE_RATE, SILENCE_DURATION, VAD_FRAME_MS, VAD_ONSET_DB, VAD_OFFSET_DB,
+    VAD_MIN_RMS, VAD_ONSET_FRAMES
+)
+
+# VAD states
+SILENCE = "silence"
+ONSET = "onset"        # energy above onset threshold, waiting for VAD_ONSET_FRAMES
+SPEECH = "speech"
+HANGOVER = "hangover"  # energy dropped below offset threshold, waiting out the hangover
+
+# Events returned by VoiceActivityDetector.process()
+SPEECH_START = "speech_start"
+SPEECH_END = "speech_end"
+
+
+class VoiceActivityDetector:
+    """
+    Frame-level, noise-adaptive energy VAD.
+
+    Each chunk of int16 PCM is viewed (not copied) as a matrix of fixed-size
+    frames and the per-frame energy is computed in one vectorized pass. A
+    running noise floor is tracked while no one is speaking, and speech is
+    declared when the energy rises `onset_db` above it (hysteresis: it must
+    fall below `offset_db` above the floor to count as silence again).
+    Short bursts are rejected by requiring `onset_frames` consecutive active
+    frames, and trailing silence is tolerated for `hangover_s` seconds. The
+    first `calibration_ms` of audio only seed the noise floor.
+    """
+
+    def __init__(self, sample_rate: int = SAMPLE_RATE, frame_ms: int = VAD_FRAME_MS,
+                 onset_db: float = VAD_ONSET_DB, offset_db: float = VAD_OFFSET_DB,
+                 min_rms: float = VAD_MIN_RMS, onset_frames: int = VAD_ONSET_FRAMES,
+                 hangover_s: float = SILENCE_DURATION, initial_floor_rms: float = None,
+                 calibration_ms: int = 200):
+        self.sample_rate = sample_rate
+        self.frame_length = max(1, int(sample_rate * frame_ms / 1000))
+        self.onset_frames = max(1, onset_frames)
+        self.hangover_frames = max(1, int(round(hangover_s * 1000 / frame_ms)))
+
+        # Work in the energy (mean square) domain so no sqrt is needed per frame
+        self._onset_ratio = 10 ** (onset_db / 10)
+        self._offset_ratio = 10 ** (offset_db / 10)
+        self._min_energy = float(min_rms) ** 2
+
+        # Noise floor adapts quickly downwards and slowly upwards, so a loud
+        # transient in a quiet room does not drag the floor up with it. While
+        # in speech it still creeps up (much slower) so that a room that got
+        # noisier mid-utterance cannot hold the detector in speech forever.
+        self._floor_fall = 0.5
+        self._floor_rise = 0.02
+        self._floor_rise_speech = 0.002
+        if initial_floor_rms is None:
+            initial_floor_rms = min_rms / 2
+        self.noise_floor = float(initial_floor_rms) ** 2
+        # The first frames only seed the floor (quietest frame wins) so that
+        # a noisy room is not mistaken for speech before the floor adapts.
+        self._calibration_left = int(calibration_ms / frame_ms)
+        self._calibration_min = None
+
+        # Leftover samples that did not fill a whole frame in the last chunk
+        self._tail = np.empty(self.frame_length, dtype=np.int16)
+        self._tail_len = 0
+        self.reset()
+
+    def reset(self):
+        """Returns to the silence state, keeping the learned noise floor."""
+        self.state = SILENCE
+        self._run = 0
+        self._tail_len = 0
+        self.last_energy = 0.0
+
+    def prime(self, pcm: np.ndarray):
+        """Seeds the noise floor from audio captured before recording started."""
+        energies = self.frame_energies(pcm)
+        if len(energies):
+            self.noise_floor = max(float(np.percentile(energies, 10)), 1.0)
+            self._calibration_left = 0
+
+    @property
+    def is_speech(self) -> bool:
+        return self.state in (SPEECH, HANGOVER)
+
+    @property
+    def noise_floor_rms(self) -> float:
+        return float(np.sqrt(self.noise_floor))
+
+    def frame_energies(self, pcm: np.ndarray) -> np.ndarray:
+        """Mean-square energy of each whole frame in an int16 array."""
+        n_frames = len(pcm) // self.frame_length
+        if n_frames == 0:
+            return np.empty(0, dtype=np.float64)
+        frames = pcm[:n_frames * self.frame_length].reshape(n_frames, self.frame_length)
+        # einsum casts per block, so the int16 data is never materialized as floats
+        return np.einsum("ij,ij->i", frames, frames, dtype=np.float64) / self.frame_length
+
+    def process(self, data) -> list:
+        """
+        Feeds a chunk of int16 PCM (bytes or ndarray) through the detector.
+        Returns the list of events (SPEECH_START / SPEECH_END) it triggered.
+        """
+        pcm = np.frombuffer(data, dtype=np.int16) if isinstance(data, (bytes, bytearray, memoryview)) else data
+
+        if self._tail_len:
+            need = self.frame_length - self._tail_len
+            head = pcm[:need]
+            self._tail[self._tail_len:self._tail_len + len(head)] = head
+            self._tail_len += len(head)
+            pcm = pcm[len(head):]
+            if self._tail_len < self.frame_length:
+                return []
+            events = self._step_frames(self.frame_energies(self._tail))
+            self._tail_len = 0
+        else:
+            events = []
+
+        events.extend(self._step_frames(self.frame_energies(pcm)))
+
+        rest = len(pcm) % self.frame_length
+        if rest:
+            self._tail[:rest] = pcm[len(pcm) - rest:]
+            self._tail_len = rest
+        return events
+
+    def _step_frames(self, energies: np.ndarray) -> list:
+        events = []
+        for energy in energies.tolist():
+            self.last_energy = energy
+            if self._calibration_left:
+                self._calibrate(energy)
+                continue
+            onset_level = max(self.noise_floor * self._onset_ratio, self._min_energy)
+            offset_level = max(self.noise_floor * self._offset_ratio, self._min_energy)
+
+            if self.state == SILENCE:
+                if energy > onset_level:
+                    self.state = ONSET
+                    self._run = 1
+                else:
+                    self._update_floor(energy)
+            elif self.state == ONSET:
+                if energy > offset_level:
+                    self._run += 1
+                else:
+                    self.state = SILENCE
+                    self._update_floor(energy)
+            elif self.state == SPEECH:
+                if energy < offset_level:
+                    self.state = HANGOVER
+                    self._run = 1
+                self._update_floor(energy, self._floor_rise_speech)
+            elif self.state == HANGOVER:
+                if energy >= offset_level:
+                    self.state = SPEECH
+                else:
+                    self._run += 1
+                self._update_floor(energy, self._floor_rise_speech)
+
+            if self.state == ONSET and self._run >= self.onset_frames:
+                self.state = SPEECH
+                events.append(SPEECH_START)
+            elif self.state == HANGOVER and self._run >= self.hangover_frames:
+                self.state = SILENCE
+                events.append(SPEECH_END)
+        return events
+
+    def _calibrate(self, energy: float):
+        if self._calibration_min is None or energy < self._calibration_min:
+            self._calibration_min = energy
+        self._calibration_left -= 1
+        if not self._calibration_left:
+            self.noise_floor = max(self._calibration_min, 1.0)
+
+    def _update_floor(self, energy: float, rise: float = None):
+        if energy < self.noise_floor:
+            alpha = self._floor_fall
+        else:
+            alpha = self._floor_rise if rise is None else rise
+        self.noise_floor += alpha * (energy - self.noise_floor)
@@ -1,75 +1,264 @@
-import pvporcupine
-import pvrecorder
 import os
+import re
+import time
+import numpy as np
+from contextlib import nullcontext
 from .logger import logger
-from .config import PICOVOICE_ACCESS_KEY, WAKE_WORD_MODEL_PATH
+from .config import (
+    PICOVOICE_ACCESS_KEY, WAKE_WORD_MODEL_PATH, WAKE_WORD_KEYWORDS, WAKE_WORD_SENSITIVITY, SAMPLE_RATE,
+    VAD_MIN_RMS, WAKE_WORD_IDLE_GATE, WAKE_WORD_GATE_DB, WAKE_WORD_GATE_PREROLL_MS, WAKE_WORD_GATE_HANGOVER_MS
+)
+from .capture import CaptureEngine, get_capture_engine
+from .cancel import CancelToken
+from .metrics import RollingHistogram
+from .tools import AVAILABLE_TOOLS, execute_tool_calls, make_tool_call
+
+# Keyword actions (WAKE_WORD_KEYWORDS)
+WAKE = "wake"       # start listening for a request
+STOP = "stop"       # cut the current reply
+MUTE = "mute"       # toggle speaker mute
+TOOL = "tool:"      # run a tool and speak its result, no STT/LLM round trip
+
+# What Picovoice Console appends to a .ppn file name: _<language>_<platform>_v<version>
+_PPN_SUFFIX = re.compile(r"_[a-z]{2}_[a-z0-9-]+_v\d+(?:_\d+)*$", re.IGNORECASE)
+
+# How a keyword-triggered tool result is spoken (default: the result as is)
+TOOL_REPLIES = {
+    "get_current_time": "It's {}.",
+    "get_current_date": "Today is {}.",
+    "calculate": "That's {}.",
+}
+
+
+class Keyword:
+    def __init__(self, name: str, path: str, action: str):
+        self.name = name
+        self.path = path
+        self.action = action
+
+    def __repr__(self):
+        return f"Keyword({self.name!r}, {self.action!r})"
+
+
+def parse_keywords(spec: str = WAKE_WORD_KEYWORDS, model_path: str = WAKE_WORD_MODEL_PATH) -> list:
+    """
+    Parses "name=action,..." into Keywords. A name is a built-in Porcupine
+    keyword or a path to a .ppn file. Without a spec, the single wake word
+    is WAKE_WORD_MODEL_PATH if it exists, else "jarvis".
+    """
+    if not spec.strip():
+        spec = f"{model_path}={WAKE}" if model_path and os.path.exists(model_path) else f"jarvis={WAKE}"
+
+    keywords = []
+    for entry in spec.split(","):
+        if not entry.strip():
+            continue
+        name, _, action = entry.strip().rpartition("=")
+        if not name:
+            name, action = action, WAKE
+        name, action = name.strip(), action.strip().lower()
+        if action.startswith(TOOL):
+            tool = action[len(TOOL):].split(":", 1)[0]
+            if tool not in AVAILABLE_TOOLS:
+                raise ValueError(f"Unknown tool '{tool}' for keyword '{name}'")
+        elif action not in (WAKE, STOP, MUTE):
+            raise ValueError(f"Unknown action '{action}' for keyword '{name}'")
+
+        if name.endswith(".ppn"):
+            path = name
+            name = _PPN_SUFFIX.sub("", os.path.splitext(os.path.basename(path))[0])
+        else:
+            import pvporcupine
+            path = pvporcupine.KEYWORD_PATHS.get(name.lower())
+            if path is None:
+                raise ValueError(f"'{name}' is neither a .ppn file nor a built-in keyword "
+                                 f"({', '.join(sorted(pvporcupine.KEYWORD_PATHS))})")
+        keywords.append(Keyword(name, path, action))
+    return keywords
+
+
+def run_keyword_tool(keyword: Keyword) -> str:
+    """Runs a keyword's tool action and phrases the result for speech."""
+    name, _, argument = keyword.action[len(TOOL):].partition(":")
+    result = execute_tool_calls([make_tool_call(name, argument or None)])[0]
+    return TOOL_REPLIES.get(name, "{}").format(result)
+
+
+class EnergyGate:
+    """
+    Idle-mode front end for Porcupine (WAKE_WORD_IDLE_GATE): one dot product
+    per frame against an adaptive noise floor. The gate opens on a frame
+    WAKE_WORD_GATE_DB above the floor and stays open for the hangover, so
+    Porcupine only runs while there is something to hear. The listener
+    replays the pre-roll on opening, so the start of the keyword is not lost.
+    """
+
+    def __init__(self, margin_db: float = WAKE_WORD_GATE_DB, hangover_ms: int = WAKE_WORD_GATE_HANGOVER_MS,
+                 min_rms: float = VAD_MIN_RMS, sample_rate: int = SAMPLE_RATE):
+        self._margin = 10 ** (margin_db / 10)
+        self._min_energy = (float(min_rms) / 2) ** 2    # 6 dB under the VAD floor: rather wake than miss
+        self._hangover = int(hangover_ms * sample_rate / 1000)
+        self.noise_floor = self._min_energy / 4
+        self._open_for = 0      # samples left before the gate closes again
+        self.openings = 0
+
+    @property
+    def is_open(self) -> bool:
+        return self._open_for > 0
+
+    def update(self, frame: np.ndarray) -> bool:
+        """Feeds one int16 frame. Returns True if Porcupine should process it."""
+        samples = frame.astype(np.float32)
+        energy = float(np.dot(samples, samples)) / len(samples)
+        if energy > max(self._margin * self.noise_floor, self._min_energy):
+            if not self.is_open:
+                self.openings += 1
+            self._open_for = self._hangover
+            return True
+        self.noise_floor += (0.5 if energy < self.noise_floor else 0.02) * (energy - self.noise_floor)
+        self._open_for = max(0, self._open_for - len(frame))
+        return self._open_for > 0
+
 
 class WakeWordListener:
-    def __init__(self):
+    """
+    Runs Porcupine over the capture stream. Several keywords can be loaded
+    at once (WAKE_WORD_KEYWORDS), each mapped to an action: after listen()
+    returns True, `detected` is the Keyword that fired.
+
+    listen() reads its own cursor on the shared capture stream and returns
+    as soon as its CancelToken is cancelled. See stats() for per-frame
+    processing time and the duty cycle (CPU time / listening time).
+    """
+
+    def __init__(self, capture: CaptureEngine = None, keywords: list = None, idle_gate: bool = WAKE_WORD_IDLE_GATE):
         self.access_key = PICOVOICE_ACCESS_KEY
         self.porcupine = None
-        self.recorder = None
+        self.capture = capture
+        self.keywords = []
+        self.detected = None
         self.keyword_name = "Jarvis" # Default
+        # Ring buffer position right after the last detected wake word, so the
+        # recorder can start exactly there ("Jarvis, what time is it")
+        self.detection_position = None
+        self.detection_latency = None
+
+        self.gate = EnergyGate() if idle_gate else None
+        self.frame_times = RollingHistogram()    # Porcupine seconds per frame
+        self.frames = 0                          # frames read
+        self.processed = 0                       # frames that went through Porcupine
+        self.busy_seconds = 0.0                  # gate + Porcupine
+        self.listen_seconds = 0.0                # wall time spent in listen()
         
         if not self.access_key:
             logger.warning("⚠️ No PICOVOICE_ACCESS_KEY found. Wake word will not work.")
             return
 
         try:
-            if WAKE_WORD_MODEL_PATH and os.path.exists(WAKE_WORD_MODEL_PATH):
-                logger.info(f"📂 Loading custom wake word model: {WAKE_WORD_MODEL_PATH}")
-                self.porcupine = pvporcupine.create(
-                    access_key=self.access_key,
-                    keyword_paths=[WAKE_WORD_MODEL_PATH]
-                )
-                self.keyword_name = os.path.basename(WAKE_WORD_MODEL_PATH)
-            else:
-                # Use default
-                self.porcupine = pvporcupine.create(
-                    access_key=self.access_key,
-                    keywords=['jarvis'] 
-                )
-            
-            self.recorder = pvrecorder.PvRecorder(
-                device_index=-1, 
-                frame_length=self.porcupine.frame_length
+            import pvporcupine
+            self.keywords = keywords if keywords is not None else parse_keywords()
+            self.porcupine = pvporcupine.create(
+                access_key=self.access_key,
+                keyword_paths=[keyword.path for keyword in self.keywords],
+                sensitivities=[WAKE_WORD_SENSITIVITY] * len(self.keywords)
             )
-            logger.info(f"✅ Wake Word Listener initialized (Keyword: {self.keyword_name})")
+            wake_names = [keyword.name for keyword in self.keywords if keyword.action == WAKE]
+            self.keyword_name = " / ".join(wake_names) or self.keyword_name
+            logger.info(f"✅ Wake Word Listener initialized (Keywords: "
+                        f"{', '.join(f'{k.name}={k.action}' for k in self.keywords)})")
             
         except Exception as e:
             logger.error(f"❌ Error initializing Porcupine: {e}")
+            self.porcupine = None
 
-    def listen(self):
+    def listen(self, cancel: CancelToken = None):
         """
-        Blocks until the wake word is detected.
-        Returns True if detected, False if stopped/error.
+        Blocks until a keyword is detected (see `detected`) or `cancel` is cancelled.
+        Returns True if detected, False if cancelled/stopped/error.
         """
-        if not self.porcupine or not self.recorder:
+        if not self.porcupine:
             logger.error("❌ Wake word listener not initialized properly.")
             return False
 
+        capture = self.capture or get_capture_engine()
+        if capture.sample_rate != self.porcupine.sample_rate:
+            logger.error(f"❌ Porcupine needs {self.porcupine.sample_rate} Hz audio, capture runs at {capture.sample_rate} Hz.")
+            return False
+
         logger.info(f"👂 Listening for wake word '{self.keyword_name}'...")
-        self.recorder.start()
+        reader = capture.reader("wake_word")
+        frame_length = self.porcupine.frame_length
         
+        started = time.monotonic()
         try:
-            while True:
-                pcm = self.recorder.read()
-                result = self.porcupine.process(pcm)
-                
-                if result >= 0:
-                    logger.info("⚡ Wake word detected!")
-                    return True
-                    
+            with cancel.on_cancel(reader.ring.interrupt) if cancel else nullcontext():
+                return self._detect(reader, capture, frame_length, cancel)
         except KeyboardInterrupt:
             return False
         except Exception as e:
             logger.error(f"❌ Error in wake word loop: {e}")
             return False
         finally:
-            self.recorder.stop()
+            self.listen_seconds += time.monotonic() - started
+
+    def _detect(self, reader, capture, frame_length, cancel):
+        """Reads frames until Porcupine fires. Returns True on detection, False when cancelled/stopped."""
+        preroll = int(WAKE_WORD_GATE_PREROLL_MS * capture.sample_rate / 1000) // frame_length * frame_length
+        while True:
+            pcm = reader.read(frame_length, timeout=1.0, cancel=cancel)
+            if pcm is None:
+                if (cancel and cancel.cancelled) or not capture.is_running:
+                    return False
+                continue
+            started = time.monotonic()
+            self.frames += 1
+            frames = [pcm]
+            if self.gate is not None:
+                was_open = self.gate.is_open
+                if not self.gate.update(pcm):
+                    self.busy_seconds += time.monotonic() - started
+                    continue
+                if not was_open and preroll:
+                    # Just opened: Porcupine also gets the audio that led up to this frame
+                    history = reader.history((preroll + frame_length) / capture.sample_rate)[:-frame_length]
+                    history = history[len(history) % frame_length:]
+                    frames = [*history.reshape(-1, frame_length), pcm]
+
+            result = -1
+            for frame in frames:
+                frame_started = time.perf_counter()
+                result = self.porcupine.process(frame.tolist())
+                self.frame_times.observe(time.perf_counter() - frame_started)
+                self.processed += 1
+                if result >= 0:
+                    break
+            self.busy_seconds += time.monotonic() - started
+            
+            if result >= 0:
+                self.detected = self.keywords[result]
+                logger.info(f"⚡ Keyword detected: {self.detected.name} ({self.detected.action})")
+                self.detection_position = reader.position
+                # How far behind live audio the detection fired
+                self.detection_latency = (time.monotonic() - started) + reader.available() / capture.sample_rate
+                return True
+
+    def stats(self) -> dict:
+        """Frames seen and processed, Porcupine time per frame (ms) and the CPU duty cycle while listening."""
+        percentiles = self.frame_times.percentiles((50, 95))
+        return {
+            "frames": self.frames,
+            "processed": self.processed,
+            "gate_openings": self.gate.openings if self.gate else None,
+            "frame_ms_p50": percentiles.get(50, 0.0) * 1000,
+            "frame_ms_p95": percentiles.get(95, 0.0) * 1000,
+            "duty_cycle": self.busy_seconds / self.listen_seconds if self.listen_seconds else 0.0,
+        }
 
     def cleanup(self):
-        if self.recorder:
-            self.recorder.delete()
+        if self.frames:
+            stats = self.stats()
+            logger.info(f"📊 Wake word: {stats['processed']}/{stats['frames']} frames through Porcupine, "
+                        f"p50 {stats['frame_ms_p50']:.2f} ms / p95 {stats['frame_ms_p95']:.2f} ms per frame, "
+                        f"duty cycle {stats['duty_cycle']:.2%}")
         if self.porcupine:
             self.porcupine.delete()
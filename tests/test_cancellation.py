@@ -0,0 +1,141 @@
+# tests/test_cancellation.py
+"""
+CancelToken, and stop / barge-in cancellation of a turn in flight, driven
+end to end like benchmarks/replay.py: a ReplayCaptureEngine instead of the
+microphone, the mock Groq server, the silent TTS backend into a null sink.
+Whisper is skipped (fixed transcript).
+"""
+import os
+import time
+
+os.environ.setdefault("LOG_FILE", "")
+os.environ.setdefault("TRACE_FILE", "")
+
+import pytest
+
+from benchmarks.mock_groq import MockGroqServer
+from benchmarks.replay import synthetic_utterance
+from src import controller as controller_module
+from src.audio_io import capture_pcm16
+from src.cancel import CancelToken
+from src.capture import ReplayCaptureEngine
+from src.http_client import LLMClient
+from src.metrics import tracer
+from src.playback import PlaybackEngine, NullSink
+from src.session import SharedResources
+from src.settings import SettingsManager
+
+SPEED = 4.0
+
+
+def wait_for(condition, timeout: float = 10.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.005)
+    return True
+
+
+# --- CancelToken ---
+
+def test_cancel_runs_callbacks_and_children():
+    parent = CancelToken()
+    child = CancelToken(parent=parent)
+    fired = []
+    with child.on_cancel(lambda: fired.append("child")):
+        parent.cancel()
+    assert parent.cancelled and child.cancelled
+    assert fired == ["child"]
+
+
+def test_on_cancel_fires_at_once_when_already_cancelled_and_unregisters():
+    token = CancelToken()
+    fired = []
+    with token.on_cancel(lambda: fired.append(1)):
+        pass
+    token.cancel()
+    assert fired == []          # left the block before the cancel
+    with token.on_cancel(lambda: fired.append(2)):
+        pass
+    assert fired == [2]
+    assert CancelToken(parent=token).cancelled
+
+
+# --- Recording ---
+
+def test_timeout_waits_while_held():
+    engine = ReplayCaptureEngine(speed=SPEED)
+    engine.start()
+    try:
+        started = time.monotonic()
+        hold_until = started + 0.6
+        pcm, speech = capture_pcm16(timeout=0.25, capture=engine, hold_timeout=lambda: time.monotonic() < hold_until)
+        assert not speech
+        assert time.monotonic() - started >= 0.6
+
+        started = time.monotonic()
+        capture_pcm16(timeout=0.25, capture=engine)
+        assert time.monotonic() - started < 0.5
+    finally:
+        engine.stop()
+
+
+# --- Controller ---
+
+@pytest.fixture
+def assistant(monkeypatch):
+    """A running controller whose LLM answers after `mock.latency` seconds; yields (controller, capture, mock, statuses)."""
+    mock = MockGroqServer(latency=5.0, token_delay=0.0, tool_rate=0.0).start()
+    monkeypatch.setattr(controller_module, "transcribe_array", lambda audio, **kwargs: "tell me a story")
+    monkeypatch.setattr(controller_module, "STREAMING_STT", False)
+    monkeypatch.setattr(controller_module, "BARGE_IN", False)
+
+    capture = ReplayCaptureEngine(speed=SPEED)
+    capture.start()
+    playback = PlaybackEngine(sink=NullSink())
+    resources = SharedResources(capture=capture, llm=LLMClient(url=mock.url, api_key="test", max_retries=0),
+                                playback=playback)
+    settings = SettingsManager(path=None)
+    settings.update({"wake_word_enabled": False, "tts_backend": "silent"})
+
+    statuses = []
+    controller = controller_module.AssistantController(settings, lambda text, color: statuses.append(text),
+                                                       resources=resources)
+    controller.start_listening()
+    assert wait_for(lambda: any("Listening" in s for s in statuses))
+    yield controller, capture, mock, statuses
+
+    controller.stop_listening()
+    controller.thread.join(timeout=5.0)
+    capture.stop()
+    playback.shutdown()
+    mock.stop()
+
+
+def test_stop_cancels_turn_waiting_on_llm(assistant):
+    controller, capture, mock, statuses = assistant
+    finished = tracer.turns_finished
+    capture.play(synthetic_utterance())
+    assert wait_for(lambda: mock.requests >= 1)
+
+    started = time.monotonic()
+    controller.stop_listening()
+    controller.thread.join(timeout=2.0)
+    assert not controller.thread.is_alive()
+    assert time.monotonic() - started < 1.0       # not waiting for the 5 s LLM answer
+    assert wait_for(lambda: tracer.turns_finished > finished, 2.0)
+
+
+def test_barge_in_cancels_earlier_turn(assistant):
+    controller, capture, mock, statuses = assistant
+    interrupted = tracer.outcomes["interrupted"]
+    ok = tracer.outcomes["ok"]
+    capture.play(synthetic_utterance())
+    assert wait_for(lambda: mock.requests >= 1)
+
+    # Speaking again while the first turn waits on the LLM cancels it; the new one is answered
+    mock.latency = 0.05
+    capture.play(synthetic_utterance())
+    assert wait_for(lambda: tracer.outcomes["interrupted"] > interrupted)
+    assert wait_for(lambda: tracer.outcomes["ok"] > ok)
@@ -0,0 +1,80 @@
+# tests/test_http_client.py
+"""LLMClient retries and budgets, and SSE stream parsing, against the mock Groq server."""
+import os
+import time
+
+os.environ.setdefault("LOG_FILE", "")
+os.environ.setdefault("TRACE_FILE", "")
+
+import pytest
+
+from benchmarks.mock_groq import MockGroqServer
+from src.http_client import LLMClient, TurnBudget, BudgetExceeded
+from src.nlp_groq import chat_reply_stream
+
+PAYLOAD = {"model": "test", "messages": [{"role": "user", "content": "hi"}]}
+
+
+@pytest.fixture
+def mock_server():
+    servers = []
+
+    def start(**kwargs):
+        kwargs.setdefault("latency", 0.0)
+        kwargs.setdefault("token_delay", 0.0)
+        servers.append(MockGroqServer(**kwargs).start())
+        return servers[-1]
+
+    yield start
+    for server in servers:
+        server.stop()
+
+
+def client_for(server, **kwargs) -> LLMClient:
+    kwargs.setdefault("backoff", 0.01)
+    return LLMClient(url=server.url, api_key="test", **kwargs)
+
+
+@pytest.mark.parametrize("status", [429, 503])
+def test_retries_429_and_5xx(mock_server, status):
+    server = mock_server(fail_first=2, fail_status=status)
+    response = client_for(server, max_retries=3).post(PAYLOAD)
+    assert response.status_code == 200
+    assert server.requests == 3
+
+
+def test_returns_last_error_when_retries_run_out(mock_server):
+    server = mock_server(fail_first=5, fail_status=503)
+    response = client_for(server, max_retries=1).post(PAYLOAD)
+    assert response.status_code == 503
+    assert server.requests == 2
+
+
+def test_expired_budget_stops_the_request(mock_server):
+    server = mock_server(latency=2.0)
+    started = time.monotonic()
+    with pytest.raises(BudgetExceeded):
+        client_for(server, max_retries=3).post(PAYLOAD, budget=TurnBudget(0.3))
+    assert time.monotonic() - started < 1.5
+    assert server.requests == 1     # no retries once the budget is gone
+
+
+def test_stream_yields_sentences_as_they_arrive(mock_server):
+    server = mock_server(reply="First sentence here. Second one follows.")
+    sentences = list(chat_reply_stream("hi", client=client_for(server, max_retries=0)))
+    assert sentences == ["First sentence here.", "Second one follows."]
+
+
+def test_budget_expiry_during_stream_apologizes(mock_server):
+    server = mock_server(latency=2.0)
+    sentences = list(chat_reply_stream("hi", client=client_for(server, max_retries=0), budget=TurnBudget(0.3)))
+    assert sentences == ["Sorry, that took too long. Please try again."]
+
+
+def test_truncated_stream_keeps_finished_sentences(mock_server):
+    # Dropped after "Second": the complete first sentence is kept, the cut-off one is not
+    server = mock_server(reply="First sentence here. Second one never ends.", truncate_after=4)
+    started = time.monotonic()
+    sentences = list(chat_reply_stream("hi", client=client_for(server, max_retries=0)))
+    assert sentences == ["First sentence here.", "Sorry, I couldn’t reach Groq right now."]
+    assert time.monotonic() - started < 2.0
@@ -0,0 +1,75 @@
+# tests/test_intent_router.py
+"""Which utterances the intent router answers locally, and which go to the LLM."""
+import os
+
+os.environ.setdefault("LOG_FILE", "")
+
+import pytest
+
+from src import intent_router as router_module
+from src.intent_router import IntentRouter, INTENTS, REMOTE_INTENTS, KNOWN_SITES
+
+
+@pytest.fixture
+def opened(monkeypatch):
+    """Records the sites the router opens instead of starting a browser."""
+    sites = []
+    monkeypatch.setitem(router_module.AVAILABLE_TOOLS, "open_website", sites.append)
+    monkeypatch.setitem(router_module.AVAILABLE_TOOLS, "get_current_time", lambda: "10:30 AM")
+    monkeypatch.setitem(router_module.AVAILABLE_TOOLS, "get_current_date", lambda: "Monday, May 04, 2026")
+    return sites
+
+
+@pytest.mark.parametrize("utterance, reply, intent", [
+    ("What time is it?", "It's 10:30 AM.", "time"),
+    ("Jarvis, what's the time right now", "It's 10:30 AM.", "time"),
+    ("what is the date today", "Today is Monday, May 04, 2026.", "date"),
+    ("Hey Jarvis, what day is it?", "Today is Monday, May 04, 2026.", "date"),
+    ("what is 12 times 3", "12 times 3 is 36.", "calculate"),
+    ("calculate 10 divided by 4", "10 divided by 4 is 2.5.", "calculate"),
+    ("how much is 2 to the power of 8", "2 to the power of 8 is 256.", "calculate"),
+    ("open youtube", "Opening youtube.com.", "open_website"),
+    ("please open up gmail", "Opening mail.google.com.", "open_website"),
+    ("open example.org", "Opening example.org.", "open_website"),
+    ("open example dot com website", "Opening example.com.", "open_website"),
+])
+def test_answers_locally(opened, utterance, reply, intent):
+    router = IntentRouter()
+    assert router.route(utterance) == reply
+    assert router.hits_by_intent[intent] == 1
+
+
+@pytest.mark.parametrize("utterance", [
+    "open calculator",          # not a site: the LLM decides what to do
+    "open settings",
+    "open up notepad",
+    "what is the meaning of life",
+    "what is 12",               # no operator
+    "what is 1 / 0",            # calculation error
+    "tell me about the time machine",
+    "",
+])
+def test_leaves_the_rest_to_the_llm(opened, utterance):
+    router = IntentRouter()
+    assert router.route(utterance) is None
+    assert router.misses == 1
+    assert opened == []
+
+
+def test_opens_only_the_resolved_site(opened):
+    IntentRouter().route("open github")
+    assert opened == [KNOWN_SITES["github"]]
+
+
+@pytest.mark.parametrize("utterance", ["open youtube", "open example.com", "open example dot com"])
+def test_remote_router_never_opens_websites(opened, utterance):
+    assert "open_website" not in [name for name, _, _ in REMOTE_INTENTS]
+    router = IntentRouter(REMOTE_INTENTS)
+    assert router.route(utterance) is None
+    assert opened == []
+
+
+def test_remote_router_keeps_the_other_intents(opened):
+    assert [name for name, _, _ in REMOTE_INTENTS] == [name for name, _, _ in INTENTS if name != "open_website"]
+    assert router_module.remote_intent_router.intents == REMOTE_INTENTS
+    assert IntentRouter(REMOTE_INTENTS).route("what time is it") == "It's 10:30 AM."
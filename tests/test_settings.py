@@ -0,0 +1,115 @@
+# tests/test_settings.py
+"""Setting validation (coerce, LIMITS) and what server clients may change with it."""
+import asyncio
+import json
+import os
+
+os.environ.setdefault("LOG_FILE", "")
+
+import pytest
+
+from src.settings import SettingsManager, DEFAULT_TUNING, ACCENTS, coerce
+from src.tts_backends import BACKENDS
+
+
+@pytest.mark.parametrize("key, value, expected", [
+    ("chunk", "512", 512),
+    ("chunk", 1024.0, 1024),
+    ("silence_duration", "1.5", 1.5),
+    ("silence_duration", 2, 2.0),
+    ("wake_word_enabled", "off", False),
+    ("wake_word_enabled", 1, True),
+    ("whisper_model_size", "small.en", "small.en"),
+    ("whisper_beam_size", 1, 1),
+    ("llm_temperature", 0, 0.0),
+    ("voice", "co.uk", "co.uk"),
+    ("tts_backend", "silent", "silent"),
+    ("unknown_key", [1, 2], [1, 2]),    # not validated
+])
+def test_coerce_accepts(key, value, expected):
+    result = coerce(key, value)
+    assert result == expected and type(result) is type(expected)
+
+
+@pytest.mark.parametrize("key, value", [
+    # wrong type
+    ("chunk", "many"),
+    ("chunk", 512.5),
+    ("chunk", True),
+    ("silence_duration", None),
+    ("wake_word_enabled", "maybe"),
+    ("voice", ["com"]),
+    # out of range
+    ("chunk", 0),
+    ("chunk", 10 ** 6),
+    ("max_record_seconds", -5),
+    ("silence_duration", 0),
+    ("vad_min_rms", -1),
+    ("whisper_beam_size", 0),
+    ("llm_temperature", 2.5),
+    ("llm_max_tokens", 100000),
+    ("llm_turn_budget", 0),
+    # not in the allowlist
+    ("whisper_model_size", "../../evil"),
+    ("voice", "x@127.0.0.1:8080/"),
+    ("voice", "google.com"),
+    ("tts_backend", "unknown-backend"),
+])
+def test_coerce_rejects(key, value):
+    with pytest.raises(ValueError):
+        coerce(key, value)
+
+
+def test_allowlists_cover_the_known_choices():
+    for tld in ACCENTS.values():
+        assert coerce("voice", tld) == tld
+    for name in BACKENDS:
+        assert coerce("tts_backend", name) == name
+
+
+def test_update_is_all_or_nothing():
+    settings = SettingsManager(path=None)
+    with pytest.raises(ValueError):
+        settings.update({"chunk": 256, "whisper_beam_size": 0})
+    assert settings.tuning().chunk == DEFAULT_TUNING.chunk
+    settings.update({"chunk": "256"})
+    assert settings.tuning().chunk == 256
+
+
+def test_invalid_values_in_the_file_are_ignored(tmp_path):
+    path = tmp_path / "settings.json"
+    path.write_text(json.dumps({"chunk": 0, "voice": "evil.example/", "llm_temperature": "0.2"}))
+    settings = SettingsManager(path=str(path), watch_interval=0)
+    assert settings.tuning().chunk == DEFAULT_TUNING.chunk
+    assert "voice" not in settings.settings
+    assert settings.tuning().llm_temperature == 0.2
+
+
+class _IdleSocket:
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        await asyncio.Future()
+
+
+def test_server_config_only_changes_client_settings():
+    from src.server import AssistantServer, Session
+
+    async def run():
+        server = AssistantServer()
+        server.loop = asyncio.get_running_loop()
+        session = Session(server, _IdleSocket())
+        await session._on_control({"type": "config", "voice": "co.uk", "whisper_model_size": "large-v3",
+                                   "llm_max_tokens": 8000, "llm_model": "other"})
+        tuning = session.context.tuning()
+        assert session.context.voice == "co.uk"
+        assert (tuning.whisper_model_size, tuning.llm_max_tokens, tuning.llm_model) == (
+            DEFAULT_TUNING.whisper_model_size, DEFAULT_TUNING.llm_max_tokens, DEFAULT_TUNING.llm_model)
+
+        await session._on_control({"type": "config", "voice": "x@127.0.0.1:8080/"})
+        kind, message = session.send_queue.get_nowait()
+        assert message["type"] == "error"
+        assert session.context.voice == "co.uk"
+
+    asyncio.run(run())
@@ -0,0 +1,69 @@
+# tests/test_stt_streaming.py
+"""StreamingTranscriber's local agreement and its max_window bound, with a scripted model."""
+import os
+import threading
+from types import SimpleNamespace
+
+os.environ.setdefault("LOG_FILE", "")
+
+import numpy as np
+
+from src.stt_streaming import StreamingTranscriber
+
+RATE = 16000
+STEP = 0.5
+MAX_WINDOW = 2.0
+
+
+class ScriptedModel:
+    """Stands in for WhisperModel: `hypothesis(n_calls, seconds)` gives the words of each decode."""
+
+    def __init__(self, hypothesis):
+        self.hypothesis = hypothesis
+        self.windows = []       # seconds of audio per decode
+
+    def get(self, size=None):
+        return self
+
+    def transcribe(self, audio, **kwargs):
+        seconds = len(audio) / RATE
+        self.windows.append(seconds)
+        words = self.hypothesis(len(self.windows), seconds)
+        # Spread the words evenly over the window
+        span = seconds / max(1, len(words))
+        segment = SimpleNamespace(words=[SimpleNamespace(word=f" {w}", start=i * span, end=(i + 1) * span)
+                                         for i, w in enumerate(words)])
+        return [segment], None
+
+
+def run(hypothesis, seconds: float = 8.0):
+    model = ScriptedModel(hypothesis)
+    decoded = threading.Event()
+    transcriber = StreamingTranscriber(step=STEP, max_window=MAX_WINDOW, manager=model,
+                                       on_partial=lambda text: decoded.set())
+    chunk = np.zeros(int(STEP * RATE), dtype=np.int16)
+    for _ in range(int(seconds / STEP)):
+        decoded.clear()
+        transcriber.feed(chunk)
+        assert decoded.wait(5)      # one partial pass per step, in lockstep
+    return transcriber, model
+
+
+def test_agreed_words_are_committed():
+    transcriber, model = run(lambda n, seconds: ["hello", "there", f"guess{n}"], seconds=2.0)
+    assert transcriber._committed[:2] == ["hello", "there"]
+    assert max(model.windows) <= MAX_WINDOW + STEP
+
+
+def test_single_changing_word_does_not_grow_the_window():
+    # Never agrees and only ever has one word: it is committed once the window passes max_window
+    transcriber, model = run(lambda n, seconds: [f"word{n}"])
+    assert max(model.windows) <= MAX_WINDOW + STEP
+    assert transcriber._committed
+
+
+def test_no_words_does_not_grow_the_window():
+    transcriber, model = run(lambda n, seconds: [])
+    assert max(model.windows) <= MAX_WINDOW + STEP
+    assert transcriber._committed == []
+    assert transcriber.finish() == ""
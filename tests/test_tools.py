@@ -0,0 +1,67 @@
+# tests/test_tools.py
+"""The calculate() tool: plain arithmetic works, anything else (or anything huge) is refused."""
+import os
+import time
+
+os.environ.setdefault("LOG_FILE", "")
+
+import pytest
+
+from src.tools import calculate, MAX_RESULT_DIGITS
+
+
+@pytest.mark.parametrize("expression, result", [
+    ("2 + 2", "4"),
+    ("7 - 10", "-3"),
+    ("6 * 7", "42"),
+    ("10 / 4", "2.5"),
+    ("10 // 4", "2"),
+    ("10 % 4", "2"),
+    ("2 ** 10", "1024"),
+    ("-(3 + 4) * 2", "-14"),
+    ("abs(-5) + round(2.567, 2) + min(3, 9) + max(1, 2)", "12.57"),
+    ("2 ** -1", "0.5"),
+])
+def test_arithmetic(expression, result):
+    assert calculate(expression) == result
+
+
+@pytest.mark.parametrize("expression", [
+    "().__class__",                  # attribute access
+    "(1).real",
+    "__import__('os')",              # calls outside the allowlist
+    "open('/etc/passwd')",
+    "eval('1')",
+    "x + 1",                         # names
+    "abs",
+    "'a' * 3",                       # non-numeric constants
+    "True + 1",
+    "[1, 2][0]",                     # containers and subscripts
+    "(lambda: 1)()",
+    "round(1.5, ndigits=1)",         # keyword arguments
+    "1 if 1 else 2",
+])
+def test_rejects_anything_but_arithmetic(expression):
+    assert calculate(expression).startswith("Error calculating")
+
+
+@pytest.mark.parametrize("expression", [
+    "9 ** 9 ** 9",
+    "((10 ** 1000) ** 1000) ** 100",
+    "10 ** 500 * 10 ** 501",
+    "2 ** 4000",
+    "round(1.5, 10 ** 9)",
+])
+def test_rejects_huge_results_without_computing_them(expression):
+    started = time.monotonic()
+    result = calculate(expression)
+    assert time.monotonic() - started < 0.5
+    assert result.startswith("Error calculating")
+
+
+def test_result_size_limit_is_max_result_digits():
+    assert calculate(f"10 ** {MAX_RESULT_DIGITS}") == "1" + "0" * MAX_RESULT_DIGITS
+    assert calculate(f"10 ** {MAX_RESULT_DIGITS + 1}").startswith("Error calculating")
+    half = MAX_RESULT_DIGITS // 2
+    assert calculate(f"10 ** {half} * 10 ** {half}") == "1" + "0" * MAX_RESULT_DIGITS
+    assert calculate(f"10 ** {half} * 10 ** {half + 1}").startswith("Error calculating")
@@ -0,0 +1,121 @@
+# tests/test_vad.py
+"""VoiceActivityDetector on synthetic audio: onset, hangover, hysteresis and the noise floor."""
+import os
+
+os.environ.setdefault("LOG_FILE", "")
+
+import numpy as np
+import pytest
+
+from src.vad import VoiceActivityDetector, SPEECH_START, SPEECH_END, SILENCE, SPEECH
+
+RATE = 16000
+FRAME_MS = 20
+FRAME = RATE * FRAME_MS // 1000
+ONSET_FRAMES = 3
+HANGOVER_S = 0.4
+HANGOVER_FRAMES = int(HANGOVER_S * 1000 / FRAME_MS)
+CALIBRATION_FRAMES = 10
+
+
+def make_vad(**kwargs) -> VoiceActivityDetector:
+    options = dict(sample_rate=RATE, frame_ms=FRAME_MS, onset_db=9, offset_db=5, min_rms=10,
+                   onset_frames=ONSET_FRAMES, hangover_s=HANGOVER_S, calibration_ms=CALIBRATION_FRAMES * FRAME_MS)
+    options.update(kwargs)
+    return VoiceActivityDetector(**options)
+
+
+def noise(seconds: float, rms: float, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return np.clip(rng.normal(0, rms, int(seconds * RATE)), -32768, 32767).astype(np.int16)
+
+
+def tone(seconds: float, rms: float) -> np.ndarray:
+    t = np.arange(int(seconds * RATE)) / RATE
+    return (np.sqrt(2) * rms * np.sin(2 * np.pi * 440 * t)).astype(np.int16)
+
+
+def events_by_frame(vad: VoiceActivityDetector, audio: np.ndarray) -> list:
+    """Feeds audio one frame at a time; returns (frame index, event) pairs."""
+    events = []
+    for i in range(len(audio) // FRAME):
+        events += [(i, event) for event in vad.process(audio[i * FRAME:(i + 1) * FRAME])]
+    return events
+
+
+def test_silence_tone_silence():
+    vad = make_vad()
+    quiet, loud = noise(1.0, 50), tone(0.5, 3000)
+    events = events_by_frame(vad, np.concatenate([quiet, loud, noise(1.0, 50, seed=1)]))
+
+    tone_start = len(quiet) // FRAME
+    tone_end = tone_start + len(loud) // FRAME
+    # Speech is confirmed on the ONSET_FRAMES-th loud frame, and ends after the hangover
+    assert events == [(tone_start + ONSET_FRAMES - 1, SPEECH_START),
+                      (tone_end + HANGOVER_FRAMES - 1, SPEECH_END)]
+    assert vad.state == SILENCE
+
+
+def test_pause_shorter_than_hangover_keeps_speech():
+    vad = make_vad()
+    pause = noise(HANGOVER_S / 2, 50, seed=2)
+    audio = np.concatenate([noise(1.0, 50), tone(0.3, 3000), pause, tone(0.3, 3000)])
+    assert [event for _, event in events_by_frame(vad, audio)] == [SPEECH_START]
+    assert vad.state == SPEECH
+
+
+def test_burst_shorter_than_onset_is_ignored():
+    vad = make_vad()
+    burst = tone((ONSET_FRAMES - 1) * FRAME_MS / 1000, 3000)
+    audio = np.concatenate([noise(1.0, 50), burst, noise(1.0, 50, seed=3)])
+    assert events_by_frame(vad, audio) == []
+
+
+def test_hysteresis_between_offset_and_onset():
+    # 7 dB above the floor: below the onset (9 dB) so no start, above the offset (5 dB) so no end
+    def middle(vad):
+        return tone(0.5, vad.noise_floor_rms * 10 ** (7 / 20))
+
+    idle, talking = make_vad(), make_vad()
+    events_by_frame(idle, noise(1.0, 100))
+    events_by_frame(talking, np.concatenate([noise(1.0, 100), tone(0.1, 400)]))
+    assert talking.is_speech
+    assert events_by_frame(idle, middle(idle)) == []
+    assert not idle.is_speech
+    assert events_by_frame(talking, middle(talking)) == []
+    assert talking.is_speech
+
+
+def test_calibration_seeds_the_noise_floor():
+    vad = make_vad()
+    assert events_by_frame(vad, noise(CALIBRATION_FRAMES * FRAME_MS / 1000, 200)) == []
+    assert vad.noise_floor_rms == pytest.approx(200, rel=0.2)
+
+
+def test_noise_floor_adapts_without_triggering():
+    vad = make_vad()
+    # A louder but steady room (+6 dB, below the onset) pulls the floor up slowly...
+    assert events_by_frame(vad, np.concatenate([noise(1.0, 50), noise(6.0, 100, seed=4)])) == []
+    assert vad.noise_floor_rms == pytest.approx(100, rel=0.2)
+    # ...and a quieter one pulls it down within a few frames
+    events_by_frame(vad, noise(0.1, 25, seed=5))
+    assert vad.noise_floor_rms == pytest.approx(25, rel=0.3)
+    # Speech is still found relative to the new floor
+    assert [event for _, event in events_by_frame(vad, tone(0.3, 300))] == [SPEECH_START]
+
+
+def test_min_rms_gates_quiet_rooms():
+    vad = make_vad(min_rms=500)
+    # Far above the floor in dB, but below the absolute minimum
+    audio = np.concatenate([noise(1.0, 5), tone(0.5, 300)])
+    assert events_by_frame(vad, audio) == []
+
+
+def test_chunking_does_not_change_the_result():
+    audio = np.concatenate([noise(1.0, 50), tone(0.5, 3000), noise(1.0, 50, seed=6)])
+    by_frame = [event for _, event in events_by_frame(make_vad(), audio)]
+    vad = make_vad()
+    odd_chunks = []
+    for start in range(0, len(audio), 333):
+        odd_chunks += vad.process(audio[start:start + 333].tobytes())
+    assert odd_chunks == by_frame == [SPEECH_START, SPEECH_END]
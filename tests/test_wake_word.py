@@ -0,0 +1,33 @@
+# tests/test_wake_word.py
+"""Parsing of WAKE_WORD_KEYWORDS entries that name custom .ppn files."""
+import os
+
+os.environ.setdefault("LOG_FILE", "")
+
+import pytest
+
+from src.wake_word import parse_keywords, WAKE, STOP, TOOL
+
+
+@pytest.mark.parametrize("path, name", [
+    ("hey_neel.ppn", "hey_neel"),
+    ("models/hey_neel_en_mac_v3_0_0.ppn", "hey_neel"),
+    ("Jarvis_en_mac_v3_0_0.ppn", "Jarvis"),
+    ("stop-talking_en_raspberry-pi_v2_1_0.ppn", "stop-talking"),
+    ("computer_de_linux_v3.ppn", "computer"),
+])
+def test_ppn_label_is_the_whole_stem(path, name):
+    [keyword] = parse_keywords(f"{path}={WAKE}")
+    assert (keyword.name, keyword.path, keyword.action) == (name, path, WAKE)
+
+
+def test_actions():
+    keywords = parse_keywords(f"hey_neel.ppn, stop_it.ppn={STOP}, what_time.ppn={TOOL}get_current_time")
+    assert [(k.name, k.action) for k in keywords] == [
+        ("hey_neel", WAKE), ("stop_it", STOP), ("what_time", f"{TOOL}get_current_time")]
+
+
+@pytest.mark.parametrize("spec", ["a.ppn=dance", f"a.ppn={TOOL}rm_rf"])
+def test_unknown_actions_are_rejected(spec):
+    with pytest.raises(ValueError):
+        parse_keywords(spec)